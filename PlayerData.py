@@ -1,10 +1,16 @@
 import random
-from nba_api.stats.endpoints import ScoreboardV2, BoxScoreAdvancedV3, BoxScoreTraditionalV3
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from nba_api.stats.endpoints import ScoreboardV2
 from datetime import datetime, timedelta
 import pandas as pd
-import time
 import json
 
+from rate_limit import RateLimiter
+from raw_cache import fetch_box_scores
+from instrumentation import stage
+from schema import apply_schema, PLAYER_STATS_SCHEMA
+from stats_store import StatsStore, STORE_DIR
+
 # NBA API requires specific headers to work
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -12,113 +18,188 @@ HEADERS = {
     "Origin": "https://www.nba.com/",
 }
 
-CACHE_FILE = "cached_nba_stats.csv"
-
+# Traditional columns kept from the merged box scores
+PLAYER_TRADITIONAL_COLUMNS = [
+    'gameId_traditional', 'teamId_traditional', 'teamCity_traditional', 'teamName_traditional',
+    'personId', 'firstName_traditional', 'familyName_traditional', 'minutes_traditional',
+    'fieldGoalsMade', 'fieldGoalsAttempted', 'fieldGoalsPercentage', 'threePointersMade',
+    'threePointersAttempted', 'threePointersPercentage', 'freeThrowsMade', 'freeThrowsAttempted',
+    'freeThrowsPercentage', 'reboundsOffensive', 'reboundsDefensive', 'reboundsTotal', 'assists',
+    'steals', 'blocks', 'turnovers', 'points', 'plusMinusPoints'
+]
+
+# Advanced stats columns kept as they are
+PLAYER_ADVANCED_COLUMNS = [
+    'estimatedOffensiveRating', 'offensiveRating', 'estimatedDefensiveRating', 'defensiveRating',
+    'estimatedNetRating', 'netRating', 'assistPercentage', 'assistToTurnover', 'assistRatio',
+    'offensiveReboundPercentage', 'defensiveReboundPercentage', 'reboundPercentage', 'turnoverRatio',
+    'effectiveFieldGoalPercentage', 'trueShootingPercentage', 'usagePercentage', 'estimatedUsagePercentage',
+    'estimatedPace', 'pace', 'pacePer40', 'possessions', 'PIE'
+]
+
+# Clearer names for the traditional columns (optional)
+PLAYER_TRADITIONAL_RENAME = {
+    'gameId_traditional': 'GAME_ID',
+    'teamId_traditional': 'TEAM_ID',
+    'teamCity_traditional': 'TEAM_CITY',
+    'teamName_traditional': 'TEAM_NAME',
+    'personId': 'PLAYER_ID',
+    'firstName_traditional': 'FIRST_NAME',
+    'familyName_traditional': 'LAST_NAME',
+    'minutes_traditional': 'MINUTES',
+    'fieldGoalsMade': 'FGM',
+    'fieldGoalsAttempted': 'FGA',
+    'fieldGoalsPercentage': 'FG%',
+    'threePointersMade': '3PM',
+    'threePointersAttempted': '3PA',
+    'threePointersPercentage': '3P%',
+    'freeThrowsMade': 'FTM',
+    'freeThrowsAttempted': 'FTA',
+    'freeThrowsPercentage': 'FT%',
+    'reboundsOffensive': 'OREB',
+    'reboundsDefensive': 'DREB',
+    'reboundsTotal': 'TREB',
+    'assists': 'AST',
+    'steals': 'STL',
+    'blocks': 'BLK',
+    'turnovers': 'TO',
+    'points': 'PTS',
+    'plusMinusPoints': '+/-'
+}
 
-# Fetch box scores and merge advanced and traditional stats
-def fetch_combined_stats(game_ids):
-    all_games_df = []
-    for game_id in game_ids:
-        print(f"Fetching stats for game {game_id}...")
 
-        # Fetch the Advanced stats
-        box_score_advanced = BoxScoreAdvancedV3(game_id, headers=HEADERS)
-        player_stats_advanced = box_score_advanced.player_stats
-        player_stats_data_advanced = player_stats_advanced.data
+# Fetch the raw advanced and traditional player box scores for one game
+def fetch_player_box_scores(game_id, limiter=None, timeout=30, cache=None):
+    # Both responses come from the raw response cache when TeamData (or an earlier run) already fetched them
+    data_sets_advanced, data_sets_traditional = fetch_box_scores(game_id, HEADERS, cache, limiter, timeout)
+    return data_sets_advanced["PlayerStats"], data_sets_traditional["PlayerStats"]
 
-        # Fetch the Traditional stats
-        box_score_traditional = BoxScoreTraditionalV3(game_id, headers=HEADERS)
-        player_stats_traditional = box_score_traditional.player_stats
-        player_stats_data_traditional = player_stats_traditional.data
 
-        # Check if advanced stats have 'headers' and 'data'
-        if 'headers' in player_stats_data_advanced and 'data' in player_stats_data_advanced:
-            headers_advanced = player_stats_data_advanced['headers']  # Advanced stat categories
-            data_advanced = player_stats_data_advanced['data']  # Advanced player data
+# Merge the advanced and traditional player stats of one game into a single frame
+def combine_player_stats(game_id, player_stats_data_advanced, player_stats_data_traditional):
+    # Check if advanced stats have 'headers' and 'data'
+    if 'headers' in player_stats_data_advanced and 'data' in player_stats_data_advanced:
+        headers_advanced = player_stats_data_advanced['headers']  # Advanced stat categories
+        data_advanced = player_stats_data_advanced['data']  # Advanced player data
+        with stage("player_stats.build"):
             df_advanced = pd.DataFrame(data_advanced, columns=headers_advanced)
-        else:
-            print(f"Error: Missing advanced stats for game {game_id}")
-            continue
-
-        # Check if traditional stats have 'headers' and 'data'
-        if 'headers' in player_stats_data_traditional and 'data' in player_stats_data_traditional:
-            headers_traditional = player_stats_data_traditional['headers']  # Traditional stat categories
-            data_traditional = player_stats_data_traditional['data']  # Traditional player data
+    else:
+        print(f"Error: Missing advanced stats for game {game_id}")
+        return None
+
+    # Check if traditional stats have 'headers' and 'data'
+    if 'headers' in player_stats_data_traditional and 'data' in player_stats_data_traditional:
+        headers_traditional = player_stats_data_traditional['headers']  # Traditional stat categories
+        data_traditional = player_stats_data_traditional['data']  # Traditional player data
+        with stage("player_stats.build"):
             df_traditional = pd.DataFrame(data_traditional, columns=headers_traditional)
-        else:
-            print(f"Error: Missing traditional stats for game {game_id}")
-            continue
+    else:
+        print(f"Error: Missing traditional stats for game {game_id}")
+        return None
 
-        # Merge Advanced and Traditional stats on 'personId' (or other unique player identifier)
+    # Merge Advanced and Traditional stats on 'personId' (or other unique player identifier)
+    with stage("player_stats.merge"):
         combined_df = pd.merge(df_advanced, df_traditional, how='left', on='personId',
                                suffixes=('_advanced', '_traditional'))
-        combined_df["GAME_ID"] = game_id  # Add game_id to the DataFrame for tracking purposes
-
-        relevant_columns_traditional = [
-            'gameId_traditional', 'teamId_traditional', 'teamCity_traditional', 'teamName_traditional',
-            'personId', 'firstName_traditional', 'familyName_traditional', 'minutes_traditional',
-            'fieldGoalsMade', 'fieldGoalsAttempted', 'fieldGoalsPercentage', 'threePointersMade',
-            'threePointersAttempted', 'threePointersPercentage', 'freeThrowsMade', 'freeThrowsAttempted',
-            'freeThrowsPercentage', 'reboundsOffensive', 'reboundsDefensive', 'reboundsTotal', 'assists',
-            'steals', 'blocks', 'turnovers', 'points', 'plusMinusPoints'
-        ]
-
-        # Keep the advanced stats columns
-        relevant_columns_advanced = [
-            'estimatedOffensiveRating', 'offensiveRating', 'estimatedDefensiveRating', 'defensiveRating',
-            'estimatedNetRating', 'netRating', 'assistPercentage', 'assistToTurnover', 'assistRatio',
-            'offensiveReboundPercentage', 'defensiveReboundPercentage', 'reboundPercentage', 'turnoverRatio',
-            'effectiveFieldGoalPercentage', 'trueShootingPercentage', 'usagePercentage', 'estimatedUsagePercentage',
-            'estimatedPace', 'pace', 'pacePer40', 'possessions', 'PIE'
-        ]
-
-        # Filter the DataFrame to keep only relevant columns (traditional stats + advanced stats)
-        df_traditional = combined_df[relevant_columns_traditional]
-        df_advanced = combined_df[relevant_columns_advanced]
-
-        # Rename the traditional columns to make them clear (optional)
-        df_traditional = df_traditional.rename(columns={
-            'gameId_traditional': 'GAME_ID',
-            'teamId_traditional': 'TEAM_ID',
-            'teamCity_traditional': 'TEAM_CITY',
-            'teamName_traditional': 'TEAM_NAME',
-            'personId': 'PLAYER_ID',
-            'firstName_traditional': 'FIRST_NAME',
-            'familyName_traditional': 'LAST_NAME',
-            'minutes_traditional': 'MINUTES',
-            'fieldGoalsMade': 'FGM',
-            'fieldGoalsAttempted': 'FGA',
-            'fieldGoalsPercentage': 'FG%',
-            'threePointersMade': '3PM',
-            'threePointersAttempted': '3PA',
-            'threePointersPercentage': '3P%',
-            'freeThrowsMade': 'FTM',
-            'freeThrowsAttempted': 'FTA',
-            'freeThrowsPercentage': 'FT%',
-            'reboundsOffensive': 'OREB',
-            'reboundsDefensive': 'DREB',
-            'reboundsTotal': 'TREB',
-            'assists': 'AST',
-            'steals': 'STL',
-            'blocks': 'BLK',
-            'turnovers': 'TO',
-            'points': 'PTS',
-            'plusMinusPoints': '+/-'
-        })
-
-        # Combine traditional and advanced stats by concatenating them
-        final_df = pd.concat([df_traditional, df_advanced], axis=1)
-        all_games_df.append(final_df)
-        pd.concat(all_games_df, ignore_index=True).to_csv("cached_nba_stats.csv")
+    combined_df["GAME_ID"] = game_id  # Add game_id to the DataFrame for tracking purposes
 
-        time.sleep(1)  # Prevent rate limiting (adjust based on API limits)
+    # Filter the DataFrame to keep only relevant columns (traditional stats + advanced stats)
+    df_traditional = combined_df[PLAYER_TRADITIONAL_COLUMNS]
+    df_advanced = combined_df[PLAYER_ADVANCED_COLUMNS]
 
-    # Concatenate all game DataFrames into one large DataFrame
-    final_combined_df = pd.concat(all_games_df, ignore_index=True)
-    return final_combined_df
+    # Rename the traditional columns to make them clear (optional)
+    df_traditional = df_traditional.rename(columns=PLAYER_TRADITIONAL_RENAME)
 
+    # Combine traditional and advanced stats by concatenating them
+    with stage("player_stats.schema"):
+        final_df = pd.concat([df_traditional, df_advanced], axis=1)
+        return apply_schema(final_df, PLAYER_STATS_SCHEMA)  # numeric MINUTES, int32 IDs, categorical names
 
-all_game_ids = [f"002240{str(i).zfill(4)}" for i in range(701)]
 
-NBA2022 = (fetch_combined_stats(all_game_ids[525:]))
-NBA2022.to_csv('NBA2024restseason.csv')
\ No newline at end of file
+# Fetch box scores and merge advanced and traditional stats
+def fetch_combined_stats(game_ids, max_workers=1, requests_per_second=None, store=None, cache=None,
+                         batch_size=None):
+    """Fetch and combine player stats for every game in game_ids.
+
+    Each game is written once to the append-only store (player_stats table), and
+    games already in the store are not fetched again, so an interrupted backfill
+    resumes where it stopped. Raw responses go through the raw response cache
+    shared with TeamData.
+
+    Fetched games are combined batch_size at a time (batch_transform.BATCH_SIZE
+    by default) and written as each batch completes, so an interruption redoes
+    at most one batch of transforms; the downloads are already in the cache.
+
+    Requests are paced by the shared stats.nba.com rate controller (http_client).
+    With max_workers=1 games are fetched one at a time. With more workers, up to
+    max_workers games are in flight at once and requests_per_second optionally
+    caps the total request rate below what the controller allows (two requests
+    per game). The returned frame is the same in both modes.
+    """
+    # batch_transform imports this module's column lists, so it is imported here
+    from batch_transform import BATCH_SIZE
+
+    if store is None:
+        store = StatsStore(STORE_DIR, "player_stats")
+    if batch_size is None:
+        batch_size = BATCH_SIZE
+
+    pending_game_ids = [game_id for game_id in game_ids if not store.has_game(game_id)]
+    if len(pending_game_ids) < len(game_ids):
+        print(f"Skipping {len(game_ids) - len(pending_game_ids)} games already in {store.path}")
+
+    if max_workers <= 1:
+        _fetch_combined_stats_sequential(pending_game_ids, store, cache, batch_size)
+    else:
+        _fetch_combined_stats_concurrent(pending_game_ids, store, cache, batch_size, max_workers,
+                                         requests_per_second)
+
+    # Read back in the requested order so resumed and fresh runs return the same frame
+    return store.load(games=game_ids)
+
+
+def _fetch_combined_stats_sequential(game_ids, store, cache, batch_size):
+    from batch_transform import write_batch
+
+    batch = []
+    for game_id in game_ids:
+        print(f"Fetching stats for game {game_id}...")
+        batch.append((game_id, *fetch_box_scores(game_id, HEADERS, cache)))
+        if len(batch) >= batch_size:
+            write_batch(batch, store, None)
+            batch = []
+    write_batch(batch, store, None)
+
+
+def _fetch_combined_stats_concurrent(game_ids, store, cache, batch_size, max_workers, requests_per_second):
+    from batch_transform import write_batch
+
+    limiter = RateLimiter(requests_per_second) if requests_per_second else None
+
+    batch = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch_box_scores, game_id, HEADERS, cache, limiter): game_id
+            for game_id in game_ids
+        }
+        for future in as_completed(futures):
+            game_id = futures[future]
+            try:
+                data_sets_advanced, data_sets_traditional = future.result()
+            except Exception as e:
+                print(f"❌ Error fetching stats for game {game_id}: {e}")
+                continue
+
+            print(f"Fetched stats for game {game_id}")
+            batch.append((game_id, data_sets_advanced, data_sets_traditional))
+            if len(batch) >= batch_size:
+                write_batch(batch, store, None)
+                batch = []
+    write_batch(batch, store, None)
+
+
+if __name__ == "__main__":
+    all_game_ids = [f"002240{str(i).zfill(4)}" for i in range(701)]
+
+    NBA2022 = (fetch_combined_stats(all_game_ids[525:]))
+    NBA2022.to_csv('NBA2024restseason.csv')
@@ -0,0 +1,375 @@
+import os
+import sys
+import time
+import socket
+import sqlite3
+import argparse
+import multiprocessing
+from datetime import datetime
+
+# pandas / nba_api are imported by the functions that need them, so worker
+# processes and status checks start quickly
+
+MANIFEST_FILE = "backfill_manifest.sqlite"
+
+# --types name -> (nba_api season type, game ID prefix digit)
+GAME_TYPES = {
+    "regular": ("Regular Season", "2"),
+    "playin": ("PlayIn", "5"),
+    "playoffs": ("Playoffs", "4"),
+}
+
+# A worker still holding a lease after this long is presumed dead and its game is reclaimed
+LEASE_SECONDS = 300
+MAX_ATTEMPTS = 5
+# Failed games wait min(2 ** attempts, MAX_BACKOFF) seconds before they can be claimed again
+MAX_BACKOFF = 120
+# Throughput for the ETA is measured over this trailing window
+ETA_WINDOW = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id TEXT PRIMARY KEY,
+    season INTEGER,
+    game_type TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    not_before REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS games_by_state ON games (state, game_id);
+CREATE INDEX IF NOT EXISTS games_by_finished ON games (finished_at);
+
+CREATE TABLE IF NOT EXISTS enumerated (
+    season INTEGER,
+    game_type TEXT,
+    game_count INTEGER,
+    enumerated_at TEXT,
+    PRIMARY KEY (season, game_type)
+);
+"""
+
+
+class BackfillManifest:
+    """SQLite work queue of the games a backfill has to ingest.
+
+    Each game is pending, leased (being worked on until lease_expires), done or
+    failed. Workers claim one game at a time inside a write transaction, so any
+    number of processes, or machines sharing the directory, can drain the same
+    manifest without taking the same game twice. A worker that dies leaves its
+    lease to expire, and the game goes back to the queue: a crash costs at most
+    the one game in flight.
+    """
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        # Autocommit; claim() and friends open their own BEGIN IMMEDIATE transactions.
+        # The default rollback journal (not WAL) keeps locking safe on network filesystems.
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def _transaction(self, statements):
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            result = statements(cursor)
+            cursor.execute("COMMIT")
+            return result
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+
+    def is_enumerated(self, season, game_type):
+        row = self.connection.execute(
+            "SELECT 1 FROM enumerated WHERE season = ? AND game_type = ?", (season, game_type)
+        ).fetchone()
+        return row is not None
+
+    def add_games(self, game_ids, season, game_type):
+        """Queue game IDs for one season and game type; games already in the manifest are kept as they are."""
+        def add(cursor):
+            before = self.connection.total_changes
+            cursor.executemany(
+                "INSERT OR IGNORE INTO games (game_id, season, game_type) VALUES (?, ?, ?)",
+                [(game_id, season, game_type) for game_id in game_ids],
+            )
+            cursor.execute(
+                "INSERT OR REPLACE INTO enumerated (season, game_type, game_count, enumerated_at) VALUES (?, ?, ?, ?)",
+                (season, game_type, len(game_ids), datetime.now().isoformat(timespec="seconds")),
+            )
+            return self.connection.total_changes - before - 1
+        return self._transaction(add)
+
+    def claim(self, worker, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        """Lease the next available game to worker. Returns its game ID, or None if nothing is claimable now.
+
+        Expired leases are reclaimed; a game whose lease expired max_attempts
+        times (its workers keep dying on it) is marked failed instead.
+        """
+        def claim(cursor):
+            now = time.time()
+            cursor.execute(
+                "UPDATE games SET state = 'failed', worker = NULL, last_error = 'lease expired' "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?", (now, max_attempts),
+            )
+            row = cursor.execute(
+                "SELECT game_id FROM games WHERE (state = 'pending' AND not_before <= ?) "
+                "OR (state = 'leased' AND lease_expires < ?) ORDER BY game_id LIMIT 1", (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            cursor.execute(
+                "UPDATE games SET state = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE game_id = ?", (worker, now + lease_seconds, row["game_id"]),
+            )
+            return row["game_id"]
+        return self._transaction(claim)
+
+    def complete(self, game_id):
+        self._transaction(lambda cursor: cursor.execute(
+            "UPDATE games SET state = 'done', worker = NULL, lease_expires = NULL, last_error = NULL, "
+            "finished_at = ? WHERE game_id = ?", (time.time(), game_id),
+        ))
+
+    def fail(self, game_id, error, max_attempts=MAX_ATTEMPTS):
+        """Return a game to the queue after a backoff, or mark it failed once it used up its attempts."""
+        def fail(cursor):
+            attempts = cursor.execute("SELECT attempts FROM games WHERE game_id = ?", (game_id,)).fetchone()[0]
+            state = "failed" if attempts >= max_attempts else "pending"
+            cursor.execute(
+                "UPDATE games SET state = ?, worker = NULL, lease_expires = NULL, not_before = ?, last_error = ? "
+                "WHERE game_id = ?",
+                (state, time.time() + min(2 ** attempts, MAX_BACKOFF), str(error)[:500], game_id),
+            )
+            return state
+        return self._transaction(fail)
+
+    def retry_failed(self):
+        """Put every failed game back in the queue with a fresh set of attempts."""
+        return self._transaction(lambda cursor: cursor.execute(
+            "UPDATE games SET state = 'pending', attempts = 0, not_before = 0 WHERE state = 'failed'"
+        ).rowcount)
+
+    def has_unfinished(self):
+        row = self.connection.execute(
+            "SELECT 1 FROM games WHERE state IN ('pending', 'leased') LIMIT 1"
+        ).fetchone()
+        return row is not None
+
+    def progress(self, window=ETA_WINDOW):
+        """Counts per state, recent throughput (games/s across all workers) and the ETA in seconds."""
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        for row in self.connection.execute("SELECT state, COUNT(*) AS n FROM games GROUP BY state"):
+            counts[row["state"]] = row["n"]
+        now = time.time()
+        recent = self.connection.execute(
+            "SELECT COUNT(*) AS n, MIN(finished_at) AS first FROM games WHERE finished_at >= ?", (now - window,)
+        ).fetchone()
+        rate = recent["n"] / (now - recent["first"]) if recent["n"] > 1 and now > recent["first"] else None
+        remaining = counts["pending"] + counts["leased"]
+        eta = remaining / rate if rate else None
+        return {**counts, "total": sum(counts.values()), "games_per_second": rate, "eta_seconds": eta}
+
+    def errors(self, limit=10):
+        rows = self.connection.execute(
+            "SELECT game_id, attempts, last_error FROM games WHERE state = 'failed' ORDER BY game_id LIMIT ?", (limit,)
+        )
+        return [dict(row) for row in rows]
+
+
+def season_label(season):
+    """2024 -> '2024-25', the form the stats endpoints expect."""
+    return f"{season}-{str(season + 1)[-2:]}"
+
+
+def parse_season(value):
+    """Accept 2024 or '2024-25' and return the season start year."""
+    return int(str(value)[:4])
+
+
+def enumerate_game_ids(season, game_type):
+    """Every game ID of one season and game type, from the league game log (one request).
+
+    Returns None when the game log can't be fetched, so the season is not
+    recorded as enumerated and the next enqueue asks again.
+    """
+    from nba_api.stats.endpoints import LeagueGameLog
+    from http_client import load_endpoint
+
+    season_type, prefix = GAME_TYPES[game_type]
+    game_log = LeagueGameLog(season=season_label(season), season_type_all_star=season_type,
+                             player_or_team_abbreviation="T", get_request=False)
+    if not load_endpoint(game_log):
+        print(f"❌ Could not fetch the {season_label(season)} {game_type} game log")
+        return None
+    games = game_log.get_data_frames()[0]
+    if games.empty:
+        return []
+    # One row per team per game; keep each game once, and only the requested type
+    game_ids = sorted(set(games["GAME_ID"].astype(str).str.zfill(10)))
+    return [game_id for game_id in game_ids if game_id[2] == prefix]
+
+
+def enqueue(manifest, seasons, game_types, refresh=False):
+    """Enumerate and queue the games of every season / game type not enumerated yet (all of them with refresh)."""
+    added = 0
+    for season in seasons:
+        for game_type in game_types:
+            if not refresh and manifest.is_enumerated(season, game_type):
+                continue
+            game_ids = enumerate_game_ids(season, game_type)
+            if game_ids is None:
+                continue
+            new = manifest.add_games(game_ids, season, game_type)
+            print(f"{season_label(season)} {game_type}: {len(game_ids)} games, {new} new")
+            added += new
+    return added
+
+
+def run_worker(manifest_path=MANIFEST_FILE, store_root=None, raw_cache_dir=None, worker=None,
+               lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS, requests_per_second=None, share=1):
+    """Claim and ingest games until the manifest has nothing left. Returns the number of games done.
+
+    Each game is fetched, written to both stores and only then marked done, so
+    whatever a crash interrupts is simply claimed again. A game whose lease is
+    still held by another worker, or that is waiting out its backoff, is waited for.
+    share is the number of worker processes splitting the stats.nba.com rate.
+    """
+    from box_score_ingest import ingest_game
+    from raw_cache import RawResponseCache, RAW_CACHE_DIR
+    from urllib.parse import urlparse
+    from nba_api.stats.library.http import NBAStatsHTTP
+    from rate_limit import RateLimiter, split_controller
+    from stats_store import StatsStore, STORE_DIR
+
+    store_root = store_root or STORE_DIR
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    manifest = BackfillManifest(manifest_path)
+    cache = RawResponseCache(raw_cache_dir or RAW_CACHE_DIR)
+    player_store = StatsStore(store_root, "player_stats")
+    team_store = StatsStore(store_root, "team_stats")
+    limiter = RateLimiter(requests_per_second) if requests_per_second else None
+    if share > 1:
+        split_controller(urlparse(NBAStatsHTTP.base_url).netloc, share)
+
+    done = 0
+    try:
+        while True:
+            game_id = manifest.claim(worker, lease_seconds, max_attempts)
+            if game_id is None:
+                if not manifest.has_unfinished():
+                    return done
+                time.sleep(1.0)
+                continue
+            try:
+                ingest_game(game_id, cache, player_store, team_store, limiter)
+            except Exception as e:
+                state = manifest.fail(game_id, e, max_attempts)
+                print(f"❌ {worker}: game {game_id} failed ({e}); {'giving up' if state == 'failed' else 'will retry'}")
+                continue
+            manifest.complete(game_id)
+            done += 1
+    finally:
+        manifest.close()
+
+
+def _format_seconds(seconds):
+    if seconds is None:
+        return "?"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def format_progress(progress):
+    rate = progress["games_per_second"]
+    percent = 100.0 * (progress["done"] + progress["failed"]) / progress["total"] if progress["total"] else 100.0
+    return (f"{progress['done']}/{progress['total']} done ({percent:.1f}%), {progress['leased']} in flight, "
+            f"{progress['pending']} pending, {progress['failed']} failed, "
+            f"{f'{rate:.2f}' if rate else '?'} games/s, ETA {_format_seconds(progress['eta_seconds'])}")
+
+
+def run_backfill(manifest_path=MANIFEST_FILE, workers=4, store_root=None, raw_cache_dir=None,
+                 lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS, requests_per_second=None,
+                 report_every=10.0):
+    """Drain the manifest with worker processes, printing progress and an ETA every report_every seconds.
+
+    The stats.nba.com controller is per process, so each worker gets 1/workers
+    of its start rate and ceiling (rate_limit.split_controller) and the workers
+    together never exceed one process's max_rate. requests_per_second, if
+    given, is a total cap on top of that, also split across the workers.
+    """
+    per_worker_rate = requests_per_second / workers if requests_per_second else None
+    processes = [
+        multiprocessing.Process(
+            target=run_worker, name=f"backfill-{i}",
+            args=(manifest_path, store_root, raw_cache_dir, None, lease_seconds, max_attempts, per_worker_rate, workers),
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    manifest = BackfillManifest(manifest_path)
+    try:
+        while any(process.is_alive() for process in processes):
+            for process in processes:
+                process.join(timeout=report_every / len(processes))
+            print(format_progress(manifest.progress()))
+        progress = manifest.progress()
+        for error in manifest.errors():
+            print(f"❌ {error['game_id']} failed after {error['attempts']} attempts: {error['last_error']}")
+        return progress
+    finally:
+        manifest.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resumable multi-season box score backfill driven by a SQLite manifest.")
+    parser.add_argument("--manifest", default=MANIFEST_FILE)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = commands.add_parser("enqueue", help="enumerate game IDs and add them to the manifest")
+    enqueue_parser.add_argument("--seasons", nargs="+", required=True, help="e.g. 2022 2023 or 2024-25")
+    enqueue_parser.add_argument("--types", nargs="+", default=["regular", "playoffs"], choices=sorted(GAME_TYPES))
+    enqueue_parser.add_argument("--refresh", action="store_true", help="re-enumerate seasons already queued")
+
+    run_parser = commands.add_parser("run", help="ingest queued games with worker processes")
+    run_parser.add_argument("--workers", type=int, default=4)
+    run_parser.add_argument("--store", help="StatsStore root (default: nba_stats)")
+    run_parser.add_argument("--raw-cache", help="raw response cache directory (default: raw_responses)")
+    run_parser.add_argument("--lease-seconds", type=float, default=LEASE_SECONDS)
+    run_parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+    run_parser.add_argument("--requests-per-second", type=float, help="total request budget across workers")
+
+    commands.add_parser("status", help="show progress and the ETA")
+    commands.add_parser("retry-failed", help="queue failed games again")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        progress = run_backfill(args.manifest, args.workers, args.store, args.raw_cache,
+                                args.lease_seconds, args.max_attempts, args.requests_per_second)
+        return 1 if progress["failed"] else 0
+
+    manifest = BackfillManifest(args.manifest)
+    try:
+        if args.command == "enqueue":
+            added = enqueue(manifest, [parse_season(season) for season in args.seasons], args.types, args.refresh)
+            print(f"Queued {added} new games")
+        elif args.command == "retry-failed":
+            print(f"Queued {manifest.retry_failed()} failed games again")
+        print(format_progress(manifest.progress()))
+    finally:
+        manifest.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from schema import minutes_to_float
+from props_cleaning import clean_props, expand_combo_props
+from stats_store import game_order
+
+# PrizePicks stat name (without the "(Combo)" suffix) -> weights over box score columns
+STAT_MAP = {
+    'Points': {'PTS': 1.0},
+    'Rebounds': {'TREB': 1.0},
+    'Assists': {'AST': 1.0},
+    'Pts+Rebs': {'PTS': 1.0, 'TREB': 1.0},
+    'Pts+Asts': {'PTS': 1.0, 'AST': 1.0},
+    'Rebs+Asts': {'TREB': 1.0, 'AST': 1.0},
+    'Pts+Rebs+Asts': {'PTS': 1.0, 'TREB': 1.0, 'AST': 1.0},
+    '3-PT Made': {'3PM': 1.0},
+    '3-PT Attempted': {'3PA': 1.0},
+    'FG Made': {'FGM': 1.0},
+    'FG Attempted': {'FGA': 1.0},
+    'Free Throws Made': {'FTM': 1.0},
+    'Free Throws Attempted': {'FTA': 1.0},
+    'Offensive Rebounds': {'OREB': 1.0},
+    'Defensive Rebounds': {'DREB': 1.0},
+    'Steals': {'STL': 1.0},
+    'Blocked Shots': {'BLK': 1.0},
+    'Blks+Stls': {'BLK': 1.0, 'STL': 1.0},
+    'Turnovers': {'TO': 1.0},
+    'Fantasy Score': {'PTS': 1.0, 'TREB': 1.2, 'AST': 1.5, 'BLK': 3.0, 'STL': 3.0, 'TO': -1.0},
+}
+
+LAST_N = (5, 10, 20)
+
+
+def base_stat(stat):
+    """'Points (Combo)' -> 'Points'."""
+    return pd.Series(stat, dtype='string').str.replace(r'\s*\(Combo\)$', '', regex=True)
+
+
+def stat_values(history, stats):
+    """Box score value of every requested PrizePicks stat, for every history row, in one matrix product."""
+    source_columns = sorted({column for stat in stats for column in STAT_MAP.get(stat, {})})
+    weights = np.zeros((len(source_columns), len(stats)))
+    for j, stat in enumerate(stats):
+        for column, weight in STAT_MAP.get(stat, {}).items():
+            weights[source_columns.index(column), j] = weight
+    values = history[source_columns].to_numpy(dtype='float64') @ weights
+    # Stats with no mapping (e.g. Dunks) stay missing rather than scoring as zero
+    values[:, [j for j, stat in enumerate(stats) if stat not in STAT_MAP]] = np.nan
+    return values
+
+
+def hit_rates(legs, history, last_n=LAST_N, season=None, combo_key='GAME_ID'):
+    """Historical over/under rates for every projection on the board at once.
+
+    legs is expand_combo_props output with PLAYER_ID attached (PlayerIndex.resolve_props).
+    Each leg is joined to the player's played games, the legs of a combo are summed
+    per shared game (combo_key: GAME_ID, or GAME_DATE for "same night"), and rates
+    are computed per projection over the last N games, one season (default: the
+    latest in history) and all history.
+    """
+    legs = legs.dropna(subset=['PLAYER_ID']).copy()
+
+    # Only the board's players matter; drop everyone else before any parsing
+    history = history[history['PLAYER_ID'].isin(legs['PLAYER_ID'].astype('int64').unique()).to_numpy()]
+    history = history[minutes_to_float(history['MINUTES'] if 'MINUTES' in history else history['MIN']).to_numpy() > 0]
+    legs['BaseStat'] = base_stat(legs['Stat']).to_numpy()
+    stats = sorted(legs['BaseStat'].dropna().unique())
+    stat_index = {stat: j for j, stat in enumerate(stats)}
+
+    # Integer game keys keep every groupby below on the fast (cython) path
+    game_numbers = pd.to_numeric(history['GAME_ID']).to_numpy(dtype='int64')
+    if 'GAME_DATE' in history:
+        dates = pd.to_datetime(history['GAME_DATE']).to_numpy(dtype='datetime64[ns]').astype('int64')
+    else:
+        # Raw IDs would rank last season's playoffs after this season's games
+        dates = game_order(game_numbers)
+    games = pd.DataFrame({
+        'PLAYER_ID': history['PLAYER_ID'].to_numpy(dtype='int64'),
+        'Game': game_numbers,
+        'Order': dates,
+        'ComboKey': dates if combo_key == 'GAME_DATE' else game_numbers,
+        'Row': np.arange(len(history)),
+    })
+
+    # One row per (leg, game the leg's player played), carrying that leg's stat value
+    values = stat_values(history, stats)
+    joined = legs[['ProjectionId', 'LegCount', 'PLAYER_ID', 'BaseStat', 'PropLine']] \
+        .astype({'PLAYER_ID': 'int64'}).merge(games, on='PLAYER_ID')
+    joined['Value'] = values[joined['Row'].to_numpy(), joined['BaseStat'].map(stat_index).to_numpy(dtype='int64')]
+
+    # Combos count only games every leg played, with the legs summed
+    per_game = joined.groupby(['ProjectionId', 'ComboKey'], sort=False).agg(
+        Value=('Value', 'sum'), Legs=('Value', 'count'), LegCount=('LegCount', 'first'),
+        PropLine=('PropLine', 'first'), Order=('Order', 'max'), Game=('Game', 'max'),
+    ).reset_index()
+    per_game = per_game[per_game['Legs'] == per_game['LegCount']]
+
+    # Game IDs look like 00SYYNNNNN, so the season start year is (id // 100000) % 100
+    per_game['Season'] = per_game['Game'] // 100000 % 100 + 2000
+    if season is None:
+        season = int(per_game['Season'].max()) if len(per_game) else None
+    per_game['Over'] = (per_game['Value'] > per_game['PropLine']).astype('float64')
+    per_game['Under'] = (per_game['Value'] < per_game['PropLine']).astype('float64')
+    per_game['Recency'] = per_game.groupby('ProjectionId')['Order'].rank(method='first', ascending=False)
+
+    # Every window is a masked mean over the same per-game frame
+    windows = {f'L{n}': per_game['Recency'] <= n for n in last_n}
+    windows['Season'] = per_game['Season'] == season
+    windows['All'] = pd.Series(True, index=per_game.index)
+
+    results = []
+    grouped_key = per_game['ProjectionId']
+    for name, mask in windows.items():
+        selected = per_game[mask.to_numpy()]
+        summary = selected.groupby(grouped_key[mask.to_numpy()]).agg(
+            Games=('Over', 'size'), OverRate=('Over', 'mean'), UnderRate=('Under', 'mean'), AvgValue=('Value', 'mean'),
+        )
+        results.append(summary.add_prefix(f'{name}_'))
+    rates = pd.concat(results, axis=1)
+    rates.index.name = 'ProjectionId'
+    return rates.reset_index()
+
+
+def score_board(board, history, player_index, **kwargs):
+    """Raw call_endpoint board -> props with hit rates, one row per projection."""
+    props = clean_props(board)
+    legs = player_index.resolve_props(expand_combo_props(props))
+    rates = hit_rates(legs, history, **kwargs)
+    return props.merge(rates, on='ProjectionId', how='left')
+
+
+def _benchmark(board_path, store_root):
+    from player_index import PlayerIndex
+    from stats_store import StatsStore
+
+    board = pd.read_csv(board_path, index_col=0)
+    history = StatsStore(store_root, 'player_stats').load()
+    index = PlayerIndex(f'{store_root}/player_index')
+    index.update_from_store(StatsStore(store_root, 'player_stats'))
+
+    start = time.perf_counter()
+    scored = score_board(board, history, index)
+    seconds = time.perf_counter() - start
+    print(f"Scored {len(scored)} props against {len(history)} box score rows in {seconds * 1000:.1f} ms")
+    print(scored[['PlayerName', 'Stat', 'PropLine', 'L10_Games', 'L10_OverRate', 'Season_OverRate']].head(10).to_string())
+
+
+if __name__ == "__main__":
+    _benchmark(sys.argv[1] if len(sys.argv) > 1 else 'UnusedCSV/NBA_Prize_picks.csv',
+               sys.argv[2] if len(sys.argv) > 2 else 'nba_stats')
@@ -0,0 +1,159 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from PlayerData import (HEADERS, combine_player_stats, PLAYER_TRADITIONAL_COLUMNS, PLAYER_ADVANCED_COLUMNS,
+                        PLAYER_TRADITIONAL_RENAME)
+from TeamData import (combine_team_stats, TEAM_TRADITIONAL_COLUMNS, TEAM_ADVANCED_COLUMNS,
+                      TEAM_TRADITIONAL_RENAME)
+from instrumentation import stage
+from schema import apply_schema, PLAYER_STATS_SCHEMA, TEAM_STATS_SCHEMA
+
+# Games transformed together by the ingest paths
+BATCH_SIZE = 100
+
+# Position of each row's game within the batch; part of every join key so games never mix
+GAME_KEY = "_game"
+
+
+def _stack(data_sets, table):
+    # One frame for the rows of every game, built from the raw lists in a single construction
+    rows = [row for data_set in data_sets for row in data_set['data']]
+    with stage(f"{table}.build"):
+        df = pd.DataFrame(rows, columns=data_sets[0]['headers'])
+    df[GAME_KEY] = np.repeat(np.arange(len(data_sets)), [len(data_set['data']) for data_set in data_sets])
+    return df
+
+
+def _split(final_df, positions, game_ids, schema):
+    # Rows are still in game order after the left join, so each game is one contiguous slice
+    bounds = np.searchsorted(positions, np.arange(len(game_ids) + 1))
+    categories = [column for column, dtype in schema.items() if dtype == 'category' and column in final_df]
+    frames = {}
+    for i, game_id in enumerate(game_ids):
+        game_df = final_df.iloc[bounds[i]:bounds[i + 1]].reset_index(drop=True)
+        # A single game's frame only lists its own teams and players as categories
+        for column in categories:
+            game_df[column] = game_df[column].cat.remove_unused_categories()
+        frames[game_id] = game_df
+    return frames
+
+
+def _combine_batch(table, game_ids, advanced, traditional, keys, traditional_columns, advanced_columns,
+                   rename, schema, combine_one):
+    """Shared body of combine_player_stats_batch and combine_team_stats_batch."""
+    usable, frames = [], {}
+    for game_id, data_set_advanced, data_set_traditional in zip(game_ids, advanced, traditional):
+        if not ('headers' in data_set_advanced and 'data' in data_set_advanced):
+            print(f"Error: Missing advanced stats for game {game_id}")
+        elif not ('headers' in data_set_traditional and 'data' in data_set_traditional):
+            print(f"Error: Missing traditional stats for game {game_id}")
+        elif (data_set_advanced['headers'] != advanced[0]['headers']
+              or data_set_traditional['headers'] != traditional[0]['headers']):
+            # A game with a different column layout can't share the batch frame
+            frames[game_id] = combine_one(game_id, data_set_advanced, data_set_traditional)
+        else:
+            usable.append((game_id, data_set_advanced, data_set_traditional))
+    if not usable:
+        return frames
+
+    batch_ids = [game_id for game_id, _, _ in usable]
+    df_advanced = _stack([data_set for _, data_set, _ in usable], table)
+    df_traditional = _stack([data_set for _, _, data_set in usable], table)
+
+    # One key join for the whole batch
+    with stage(f"{table}.merge"):
+        combined_df = pd.merge(df_advanced, df_traditional, how='left', on=[GAME_KEY] + keys,
+                               suffixes=('_advanced', '_traditional'))
+
+    with stage(f"{table}.schema"):
+        final_df = pd.concat([combined_df[traditional_columns].rename(columns=rename),
+                              combined_df[advanced_columns]], axis=1)
+        final_df = apply_schema(final_df, schema)
+    frames.update(_split(final_df, combined_df[GAME_KEY].to_numpy(), batch_ids, schema))
+    return frames
+
+
+def combine_player_stats_batch(game_ids, advanced, traditional):
+    """combine_player_stats for many games at once.
+
+    advanced and traditional are the games' PlayerStats data sets, in game_ids
+    order. Returns {game_id: frame}, each frame identical to what
+    combine_player_stats returns for that game. Games with missing stats are
+    left out, as combine_player_stats would return None for them.
+    """
+    return _combine_batch("player_stats", game_ids, advanced, traditional, ['personId'],
+                          PLAYER_TRADITIONAL_COLUMNS, PLAYER_ADVANCED_COLUMNS, PLAYER_TRADITIONAL_RENAME,
+                          PLAYER_STATS_SCHEMA, combine_player_stats)
+
+
+def combine_team_stats_batch(game_ids, advanced, traditional):
+    """combine_team_stats for many games at once; same contract as combine_player_stats_batch."""
+    return _combine_batch("team_stats", game_ids, advanced, traditional, ['gameId', 'teamId'],
+                          TEAM_TRADITIONAL_COLUMNS, TEAM_ADVANCED_COLUMNS, TEAM_TRADITIONAL_RENAME,
+                          TEAM_STATS_SCHEMA, combine_team_stats)
+
+
+def write_batch(games, player_store, team_store):
+    """Build both tables for a batch of (game_id, data_sets_advanced, data_sets_traditional) and store each game.
+
+    Games already in a store are left out of that table's batch; a store of None
+    skips its table, so PlayerData and TeamData can build only their own.
+    """
+    for store, combine, data_set in ((player_store, combine_player_stats_batch, "PlayerStats"),
+                                     (team_store, combine_team_stats_batch, "TeamStats")):
+        if store is None:
+            continue
+        pending = [game for game in games if not store.has_game(game[0])]
+        if not pending:
+            continue
+        frames = combine([game_id for game_id, _, _ in pending],
+                         [data_sets_advanced[data_set] for _, data_sets_advanced, _ in pending],
+                         [data_sets_traditional[data_set] for _, _, data_sets_traditional in pending])
+        for game_id, _, _ in pending:
+            if frames.get(game_id) is not None:
+                store.write_game(game_id, frames[game_id])
+
+
+def _benchmark(raw_cache_dir, game_count=300, batch_size=BATCH_SIZE):
+    from raw_cache import RawResponseCache, BOX_SCORE_ENDPOINTS, fetch_box_scores
+
+    cache = RawResponseCache(raw_cache_dir)
+    cached = [set(cache.keys(endpoint.endpoint)) for endpoint in BOX_SCORE_ENDPOINTS]
+    game_ids = sorted(set.intersection(*cached))[:game_count]
+    # Parsing the cached JSON is the same for both paths, so it is done up front
+    data_sets = [fetch_box_scores(game_id, HEADERS, cache) for game_id in game_ids]
+
+    start = time.perf_counter()
+    per_game = {
+        game_id: (combine_player_stats(game_id, advanced["PlayerStats"], traditional["PlayerStats"]),
+                  combine_team_stats(game_id, advanced["TeamStats"], traditional["TeamStats"]))
+        for game_id, (advanced, traditional) in zip(game_ids, data_sets)
+    }
+    per_game_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    players, teams = {}, {}
+    for i in range(0, len(game_ids), batch_size):
+        ids = game_ids[i:i + batch_size]
+        batch = data_sets[i:i + batch_size]
+        players.update(combine_player_stats_batch(ids, [a["PlayerStats"] for a, _ in batch], [t["PlayerStats"] for _, t in batch]))
+        teams.update(combine_team_stats_batch(ids, [a["TeamStats"] for a, _ in batch], [t["TeamStats"] for _, t in batch]))
+    batched_seconds = time.perf_counter() - start
+
+    for game_id, (player_df, team_df) in per_game.items():
+        pd.testing.assert_frame_equal(players[game_id], player_df)
+        pd.testing.assert_frame_equal(teams[game_id], team_df)
+
+    print(f"{len(game_ids)} cached games, batches of {batch_size}; outputs identical")
+    print(f"per game: {per_game_seconds * 1000:.1f} ms ({per_game_seconds / len(game_ids) * 1e6:.0f} us/game)")
+    print(f"batched:  {batched_seconds * 1000:.1f} ms ({batched_seconds / len(game_ids) * 1e6:.0f} us/game), "
+          f"{per_game_seconds / batched_seconds:.1f}x faster")
+
+
+if __name__ == "__main__":
+    _benchmark(sys.argv[1] if len(sys.argv) > 1 else 'raw_responses',
+               int(sys.argv[2]) if len(sys.argv) > 2 else 300,
+               int(sys.argv[3]) if len(sys.argv) > 3 else BATCH_SIZE)
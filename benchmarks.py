@@ -0,0 +1,234 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+
+import instrumentation
+from stub_server import FIXTURE_DIR, start_stub_server, stop_stub_server
+
+RESULTS_FILE = "benchmark_results.json"
+
+# A stage counts as a regression when wall time or peak memory grows by more than this
+REGRESSION_TOLERANCE = 0.25
+
+# ...and by at least this much in absolute terms, so noise on tiny stages isn't flagged
+MIN_REGRESSION = {"wall_seconds": 0.05, "peak_memory_mb": 1.0}
+
+
+def _recorded_keys(fixture_dir, endpoint):
+    endpoint_dir = os.path.join(fixture_dir, endpoint)
+    if not os.path.isdir(endpoint_dir):
+        return []
+    return sorted(name[:-len(".json")] for name in os.listdir(endpoint_dir) if name.endswith(".json"))
+
+
+def _measure(run, server):
+    """Run a stage twice: once timed, once under tracemalloc for its peak memory.
+
+    The stage is timed without tracemalloc so its overhead never shows up in the
+    wall time. run builds fresh scratch state on every call and returns the number
+    of rows it produced.
+    """
+    requests_before = server.stats["requests"] if server is not None else 0
+    start = time.perf_counter()
+    rows = run()
+    wall_seconds = time.perf_counter() - start
+    request_count = (server.stats["requests"] if server is not None else 0) - requests_before
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "wall_seconds": round(wall_seconds, 4),
+        "requests": request_count,
+        "requests_per_second": round(request_count / wall_seconds, 2) if wall_seconds else None,
+        "rows": rows,
+        "rows_per_second": round(rows / wall_seconds, 1) if wall_seconds else None,
+        "peak_memory_mb": round(peak / 1e6, 2),
+    }
+
+
+def projections_stage(league_ids):
+    """Fetch each league's board and normalize it into line-history tables."""
+    from gitscrap import fetch_projections
+    from line_history import normalize_board
+
+    def run():
+        rows = 0
+        for league_id in league_ids:
+            board = fetch_projections(league_id)
+            if board is not None:
+                rows += len(normalize_board(board)[0])
+        return rows
+    return run
+
+
+def scoreboard_stage(dates):
+    """Scan each date's scoreboard into a fresh game catalog."""
+    from dataCollection import get_games
+    from game_catalog import GameCatalog
+
+    def run():
+        with tempfile.TemporaryDirectory() as scratch:
+            catalog = GameCatalog(os.path.join(scratch, "catalog.sqlite"))
+            return len(get_games(dates[0], dates[-1], catalog=catalog))
+    return run
+
+
+def ingestion_stage(game_ids, max_workers, requests_per_second):
+    """Fetch, combine and store both box score tables for every game."""
+    from box_score_ingest import ingest_box_scores
+    from raw_cache import RawResponseCache
+    from stats_store import StatsStore
+
+    def run():
+        with tempfile.TemporaryDirectory() as scratch:
+            player_store = StatsStore(scratch, "player_stats")
+            ingest_box_scores(game_ids, max_workers=max_workers, requests_per_second=requests_per_second,
+                              cache=RawResponseCache(os.path.join(scratch, "raw")),
+                              player_store=player_store, team_store=StatsStore(scratch, "team_stats"))
+            return len(player_store.load(columns=["PLAYER_ID"]))
+    return run
+
+
+def props_cleaning_stage(board):
+    """Clean a board and expand its combo props into legs (no network)."""
+    from props_cleaning import clean_props, expand_combo_props
+
+    def run():
+        props = clean_props(board)
+        expand_combo_props(props)
+        return len(props)
+    return run
+
+
+def run_benchmarks(fixture_dir=FIXTURE_DIR, latency=0.0, throttle_rate=0.0, timeout_rate=0.0,
+                   games=30, dates=3, max_workers=8, requests_per_second=None, board_path=None, seed=0):
+    """Benchmark every pipeline stage against the replayed fixtures and return the results.
+
+    Stages without recorded fixtures are skipped. props cleaning uses the first
+    replayed board, or board_path (a saved call_endpoint CSV/Parquet) when given.
+    """
+    settings = {
+        "fixture_dir": fixture_dir, "latency": latency, "throttle_rate": throttle_rate,
+        "timeout_rate": timeout_rate, "games": games, "dates": dates,
+        "max_workers": max_workers, "requests_per_second": requests_per_second, "seed": seed,
+    }
+    league_ids = _recorded_keys(fixture_dir, "projections")
+    scoreboard_dates = _recorded_keys(fixture_dir, "scoreboardv2")[:dates]
+    recorded = [set(_recorded_keys(fixture_dir, endpoint)) for endpoint in ("boxscoreadvancedv3", "boxscoretraditionalv3")]
+    game_ids = sorted(set.intersection(*recorded))[:games]
+
+    stages = {}
+    server = start_stub_server(fixture_dir, latency=latency, throttle_rate=throttle_rate,
+                               timeout_rate=timeout_rate, stall_seconds=35.0, seed=seed)
+    try:
+        if league_ids:
+            stages["projections"] = _measure(projections_stage(league_ids), server)
+        if scoreboard_dates:
+            stages["scoreboard_scan"] = _measure(scoreboard_stage(scoreboard_dates), server)
+        if game_ids:
+            stages["box_score_ingestion"] = _measure(
+                ingestion_stage(game_ids, max_workers, requests_per_second), server)
+
+        board = None
+        if board_path is not None:
+            from props_cleaning import read_board
+            board = read_board(board_path)
+        elif league_ids:
+            from gitscrap import fetch_projections
+            board = fetch_projections(league_ids[0])
+        if board is not None:
+            stages["props_cleaning"] = _measure(props_cleaning_stage(board), None)
+    finally:
+        stop_stub_server(server)
+
+    skipped = [name for name, present in (("projections", league_ids), ("scoreboard_scan", scoreboard_dates),
+                                          ("box_score_ingestion", game_ids)) if not present]
+    for name in skipped:
+        print(f"⚠️ No fixtures for {name} in {fixture_dir}; stage skipped")
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "settings": settings,
+        "stages": stages,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(baseline, results, tolerance=REGRESSION_TOLERANCE):
+    """Stages whose wall time or peak memory grew by more than tolerance vs baseline."""
+    regressions = []
+    for stage, current in results["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if previous is None:
+            continue
+        for metric, floor in MIN_REGRESSION.items():
+            growth = current[metric] - previous[metric]
+            if growth > floor and growth > previous[metric] * tolerance:
+                regressions.append({"stage": stage, "metric": metric,
+                                    "baseline": previous[metric], "current": current[metric]})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages against recorded API fixtures.")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--baseline", help="earlier results JSON to check for regressions")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every replayed response")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="fraction of requests that stall")
+    parser.add_argument("--games", type=int, default=30)
+    parser.add_argument("--dates", type=int, default=3)
+    parser.add_argument("--max-workers", type=int, default=8)
+    parser.add_argument("--requests-per-second", type=float)
+    parser.add_argument("--board", help="saved board for the props cleaning stage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace", help="write a JSON-lines instrumentation trace (and <trace>.prom) here")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        instrumentation.enable(args.trace)
+    results = run_benchmarks(args.fixtures, args.latency, args.throttle_rate, args.timeout_rate,
+                             args.games, args.dates, args.max_workers, args.requests_per_second,
+                             args.board, args.seed)
+    if args.trace:
+        # Covers both runs of each stage (the timed one and the tracemalloc one)
+        recorder = instrumentation.disable()
+        with open(f"{args.trace}.prom", "w") as file:
+            file.write(recorder.prometheus_text())
+        print(recorder.summary())
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=4)
+    print(json.dumps(results["stages"], indent=4))
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            regressions = compare_results(json.load(file), results)
+        for regression in regressions:
+            print(f"⚠️ {regression['stage']} {regression['metric']}: "
+                  f"{regression['baseline']} -> {regression['current']}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
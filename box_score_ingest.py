@@ -0,0 +1,104 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PlayerData import HEADERS, combine_player_stats
+from TeamData import combine_team_stats
+from batch_transform import BATCH_SIZE, write_batch
+from rate_limit import RateLimiter
+from raw_cache import RawResponseCache, BOX_SCORE_ENDPOINTS, fetch_box_scores
+from stats_store import StatsStore, STORE_DIR
+
+
+def _write_game_tables(game_id, data_sets_advanced, data_sets_traditional, player_store, team_store):
+    # Build both derived tables from the same pair of responses
+    if not player_store.has_game(game_id):
+        player_df = combine_player_stats(game_id, data_sets_advanced["PlayerStats"], data_sets_traditional["PlayerStats"])
+        if player_df is not None:
+            player_store.write_game(game_id, player_df)
+
+    if not team_store.has_game(game_id):
+        team_df = combine_team_stats(game_id, data_sets_advanced["TeamStats"], data_sets_traditional["TeamStats"])
+        if team_df is not None:
+            team_store.write_game(game_id, team_df)
+
+
+def ingest_game(game_id, cache, player_store, team_store, limiter=None):
+    """Fetch (or read from cache) one game's box scores and store both tables. Raises if a fetch fails."""
+    _write_game_tables(game_id, *fetch_box_scores(game_id, HEADERS, cache, limiter), player_store, team_store)
+
+
+def ingest_box_scores(game_ids, max_workers=1, requests_per_second=None, cache=None,
+                      player_store=None, team_store=None, batch_size=BATCH_SIZE):
+    """Fetch each game's advanced and traditional box scores once and store both tables.
+
+    Raw responses go to the content-addressed cache first, so the player_stats and
+    team_stats tables (and any table added later) are derived from one download
+    per endpoint per game. Games already present in both stores are skipped.
+
+    Fetched games are transformed batch_size at a time (batch_transform), so an
+    interruption redoes at most one batch of transforms; the downloads themselves
+    are already in the cache.
+    """
+    if cache is None:
+        cache = RawResponseCache()
+    if player_store is None:
+        player_store = StatsStore(STORE_DIR, "player_stats")
+    if team_store is None:
+        team_store = StatsStore(STORE_DIR, "team_stats")
+
+    pending_game_ids = [
+        game_id for game_id in game_ids
+        if not (player_store.has_game(game_id) and team_store.has_game(game_id))
+    ]
+    if len(pending_game_ids) < len(game_ids):
+        print(f"Skipping {len(game_ids) - len(pending_game_ids)} games already ingested")
+
+    batch = []
+    if max_workers <= 1:
+        for game_id in pending_game_ids:
+            print(f"Fetching stats for game {game_id}...")
+            batch.append((game_id, *fetch_box_scores(game_id, HEADERS, cache)))
+            if len(batch) >= batch_size:
+                write_batch(batch, player_store, team_store)
+                batch = []
+        write_batch(batch, player_store, team_store)
+        return
+
+    limiter = RateLimiter(requests_per_second) if requests_per_second else None
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch_box_scores, game_id, HEADERS, cache, limiter): game_id
+            for game_id in pending_game_ids
+        }
+        for future in as_completed(futures):
+            game_id = futures[future]
+            try:
+                data_sets_advanced, data_sets_traditional = future.result()
+            except Exception as e:
+                print(f"❌ Error fetching stats for game {game_id}: {e}")
+                continue
+
+            print(f"Fetched stats for game {game_id}")
+            batch.append((game_id, data_sets_advanced, data_sets_traditional))
+            if len(batch) >= batch_size:
+                write_batch(batch, player_store, team_store)
+                batch = []
+    write_batch(batch, player_store, team_store)
+
+
+def rebuild_from_cache(cache=None, player_store=None, team_store=None, game_ids=None, batch_size=BATCH_SIZE):
+    """Derive the stored tables from cached raw responses only, without any network calls."""
+    if cache is None:
+        cache = RawResponseCache()
+    if player_store is None:
+        player_store = StatsStore(STORE_DIR, "player_stats")
+    if team_store is None:
+        team_store = StatsStore(STORE_DIR, "team_stats")
+
+    if game_ids is None:
+        cached = [set(cache.keys(endpoint.endpoint)) for endpoint in BOX_SCORE_ENDPOINTS]
+        game_ids = sorted(set.intersection(*cached))
+
+    for start in range(0, len(game_ids), batch_size):
+        batch = [(game_id, *fetch_box_scores(game_id, HEADERS, cache)) for game_id in game_ids[start:start + batch_size]]
+        write_batch(batch, player_store, team_store)
+    return game_ids
@@ -0,0 +1,256 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from schema import minutes_to_float
+from stats_store import game_order
+
+# Numeric player box score columns from PlayerData.combine_player_stats
+STAT_COLUMNS = [
+    'MIN', 'FGM', 'FGA', 'FG%', '3PM', '3PA', '3P%', 'FTM', 'FTA', 'FT%', 'OREB', 'DREB', 'TREB',
+    'AST', 'STL', 'BLK', 'TO', 'PTS', '+/-',
+    'estimatedOffensiveRating', 'offensiveRating', 'estimatedDefensiveRating', 'defensiveRating',
+    'estimatedNetRating', 'netRating', 'assistPercentage', 'assistToTurnover', 'assistRatio',
+    'offensiveReboundPercentage', 'defensiveReboundPercentage', 'reboundPercentage', 'turnoverRatio',
+    'effectiveFieldGoalPercentage', 'trueShootingPercentage', 'usagePercentage', 'estimatedUsagePercentage',
+    'estimatedPace', 'pace', 'pacePer40', 'possessions', 'PIE',
+]
+
+# Counting stats that also get minutes-adjusted per-36 rates
+COUNTING_STATS = ['FGM', 'FGA', '3PM', '3PA', 'FTM', 'FTA', 'OREB', 'DREB', 'TREB', 'AST', 'STL', 'BLK', 'TO', 'PTS']
+
+WINDOWS = (5, 10, 20)
+EWM_SPANS = (5, 10)
+
+KEY_COLUMNS = ['PLAYER_ID', 'GAME_ID']
+
+
+def _sort_chronologically(frame):
+    """Rows sorted by player, then GAME_DATE if present, then chronological game order.
+
+    Raw game IDs don't sort across seasons (2023 playoffs 42300xxx > 2024 regular
+    season 22400xxx), so games are ordered by stats_store.game_order instead.
+    """
+    order = ['PLAYER_ID', 'GAME_DATE', '_ORDER'] if 'GAME_DATE' in frame else ['PLAYER_ID', '_ORDER']
+    frame = frame.assign(_ORDER=game_order(frame['GAME_ID'].to_numpy()))
+    return frame.sort_values(order, kind='stable').drop(columns=['_ORDER']).reset_index(drop=True)
+
+
+def prepare_box_scores(box_scores, stats=STAT_COLUMNS):
+    """Played games only, numeric MIN, sorted chronologically per player."""
+    order = ['PLAYER_ID', 'GAME_DATE', 'GAME_ID'] if 'GAME_DATE' in box_scores else ['PLAYER_ID', 'GAME_ID']
+    stat_columns = [stat for stat in stats if stat != 'MIN']
+    frame = box_scores[order + stat_columns].copy()
+    frame['MIN'] = minutes_to_float(box_scores['MINUTES'] if 'MINUTES' in box_scores else box_scores['MIN'])
+    frame = frame[frame['MIN'].to_numpy() > 0]
+    frame['GAME_ID'] = pd.to_numeric(frame['GAME_ID']).astype('int32')
+
+    try:
+        frame[stat_columns] = frame[stat_columns].astype('float64')
+    except (TypeError, ValueError):
+        frame[stat_columns] = frame[stat_columns].apply(pd.to_numeric, errors='coerce').astype('float64')
+    return _sort_chronologically(frame)
+
+
+def _group_positions(player_ids):
+    # Position of each row within its (contiguous) player group, and the previous row of the same player
+    starts = np.r_[True, player_ids[1:] != player_ids[:-1]]
+    group_start = np.maximum.accumulate(np.where(starts, np.arange(len(player_ids)), 0))
+    position = np.arange(len(player_ids)) - group_start
+    previous = np.where(starts, -1, np.arange(len(player_ids)) - 1)
+    return position, previous
+
+
+def _exclusive_cumsum(values):
+    # C[i] = sum of rows before i, so any window sum is a difference of two rows
+    out = np.zeros((values.shape[0] + 1,) + values.shape[1:], dtype='float64')
+    np.cumsum(values, axis=0, out=out[1:])
+    return out
+
+
+def _window_features(values, minutes, counting_values, position, windows, stats, counting_stats):
+    """Pre-game rolling mean/std over each window, plus per-36 rates, from cumulative sums."""
+    finite = np.isfinite(values)
+    clean = np.where(finite, values, 0.0)
+    sums = _exclusive_cumsum(clean)
+    squares = _exclusive_cumsum(clean * clean)
+    counts = _exclusive_cumsum(finite.astype('float64'))
+    minute_sums = _exclusive_cumsum(minutes)
+    counting_sums = _exclusive_cumsum(np.nan_to_num(counting_values))
+
+    rows = np.arange(values.shape[0])
+    features = {}
+    for window in windows:
+        # Previous min(position, window) games of the same player: rows [i - n, i)
+        start = rows - np.minimum(position, window)
+        count = counts[rows] - counts[start]
+        total = sums[rows] - sums[start]
+        total_squares = squares[rows] - squares[start]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            variance = np.maximum(total_squares - total * total / count, 0.0) / (count - 1)
+            variance[count < 2] = np.nan
+            std = np.sqrt(variance)
+
+            window_minutes = minute_sums[rows] - minute_sums[start]
+            per36 = (counting_sums[rows] - counting_sums[start]) * 36.0 / window_minutes[:, None]
+            per36[window_minutes <= 0] = np.nan
+
+        for j, stat in enumerate(stats):
+            features[f'{stat}_mean{window}'] = mean[:, j]
+            features[f'{stat}_std{window}'] = std[:, j]
+        for j, stat in enumerate(counting_stats):
+            features[f'{stat}_per36_{window}'] = per36[:, j]
+    return features
+
+
+def _ewm_post(values, position, previous, span, seed=None):
+    """Post-game EWM (adjust=False) per player; seed gives the value carried in before each group's first row."""
+    alpha = 2.0 / (span + 1.0)
+    post = np.full(values.shape, np.nan)
+    # One vectorized step per game number, across every player at once
+    for level in range(int(position.max()) + 1 if len(position) else 0):
+        rows = np.flatnonzero(position == level)
+        current = values[rows]
+        if level == 0:
+            carried = seed[rows] if seed is not None else np.full(current.shape, np.nan)
+        else:
+            carried = post[previous[rows]]
+        blended = alpha * current + (1 - alpha) * carried
+        blended = np.where(np.isnan(carried), current, blended)
+        post[rows] = np.where(np.isnan(current), carried, blended)
+    return post
+
+
+class RollingFeatureEngine:
+    """Per-player form features over the player box score history.
+
+    Every feature row describes a player's form entering that game (only earlier
+    games are used), so the features can be joined to the game's props without
+    leakage. The engine keeps each player's last max(windows) games and EWM
+    values, so update() only touches the players in the new games.
+    """
+
+    def __init__(self, stats=STAT_COLUMNS, counting_stats=COUNTING_STATS, windows=WINDOWS, spans=EWM_SPANS):
+        self.stats = list(stats)
+        self.counting_stats = list(counting_stats)
+        self.windows = tuple(windows)
+        self.spans = tuple(spans)
+        self.tail = None
+        self.ewm_state = None
+
+    def _window_features(self, frame):
+        position, _ = _group_positions(frame['PLAYER_ID'].to_numpy())
+        return _window_features(
+            frame[self.stats].to_numpy(dtype='float64'), frame['MIN'].to_numpy(dtype='float64'),
+            frame[self.counting_stats].to_numpy(dtype='float64'), position, self.windows,
+            self.stats, self.counting_stats,
+        )
+
+    def _ewm_features(self, frame, seeds=None):
+        # Returns (pre-game features, post-game EWM state per row)
+        player_ids = frame['PLAYER_ID'].to_numpy()
+        position, previous = _group_positions(player_ids)
+        values = frame[self.stats].to_numpy(dtype='float64')
+
+        features, post_columns = {}, {}
+        for span in self.spans:
+            columns = [f'{stat}_ewm{span}' for stat in self.stats]
+            seed = None if seeds is None else seeds.reindex(player_ids)[columns].to_numpy(dtype='float64')
+            post = _ewm_post(values, position, previous, span, seed)
+
+            # Entering a game, the EWM is the previous game's post-game value (or the carried-in seed)
+            pre = post[np.maximum(previous, 0)]
+            first = previous < 0
+            pre[first] = np.nan if seed is None else seed[first]
+            for j, column in enumerate(columns):
+                features[column] = pre[:, j]
+                post_columns[column] = post[:, j]
+        return features, pd.DataFrame(post_columns, index=frame.index)
+
+    def _assemble(self, frame, window_features, ewm_features):
+        keys = frame[[column for column in ['PLAYER_ID', 'GAME_DATE', 'GAME_ID'] if column in frame]]
+        # One float32 block for every feature column instead of hundreds of separate arrays
+        features = {**window_features, **ewm_features}
+        block = np.empty((len(keys), len(features)), dtype='float32')
+        for j, values in enumerate(features.values()):
+            block[:, j] = values
+        return pd.concat([keys.reset_index(drop=True), pd.DataFrame(block, columns=list(features))], axis=1)
+
+    def _remember(self, history, frame, post):
+        # Keep each player's last max(windows) games of history and the EWM after their latest game in frame
+        last_rows = history.groupby('PLAYER_ID', sort=False).tail(max(self.windows))
+        latest = frame.groupby('PLAYER_ID', sort=False).tail(1).index
+        ewm_state = post.loc[latest].set_axis(frame.loc[latest, 'PLAYER_ID'].to_numpy())
+
+        if self.tail is None:
+            self.tail, self.ewm_state = last_rows.reset_index(drop=True), ewm_state
+            return
+        touched = frame['PLAYER_ID'].unique()
+        self.tail = pd.concat([self.tail[~self.tail['PLAYER_ID'].isin(touched)], last_rows], ignore_index=True)
+        self.ewm_state = pd.concat([self.ewm_state[~self.ewm_state.index.isin(touched)], ewm_state])
+
+    def rebuild(self, box_scores):
+        """Features for the whole history; resets the engine's state."""
+        self.tail, self.ewm_state = None, None
+        frame = prepare_box_scores(box_scores, self.stats)
+        ewm_features, post = self._ewm_features(frame)
+        self._remember(frame, frame, post)
+        return self._assemble(frame, self._window_features(frame), ewm_features)
+
+    def update(self, new_box_scores):
+        """Features for newly arrived games only, updating just the players who played in them."""
+        if self.tail is None:
+            return self.rebuild(new_box_scores)
+
+        new = prepare_box_scores(new_box_scores, self.stats)
+        touched = new['PLAYER_ID'].unique()
+        context = self.tail[self.tail['PLAYER_ID'].isin(touched)]
+
+        # Windows need the players' recent games as context; the EWM only needs the carried state
+        combined = _sort_chronologically(
+            pd.concat([context.assign(_new=False), new.assign(_new=True)], ignore_index=True))
+        is_new = combined.pop('_new').to_numpy()
+        window_features = {name: values[is_new] for name, values in self._window_features(combined).items()}
+
+        new_rows = combined[is_new].reset_index(drop=True)
+        ewm_features, post = self._ewm_features(new_rows, seeds=self.ewm_state)
+
+        self._remember(combined, new_rows, post)
+        return self._assemble(new_rows, window_features, ewm_features)
+
+
+def _benchmark(store_root):
+    from stats_store import StatsStore
+
+    store = StatsStore(store_root, 'player_stats')
+    game_ids = sorted(store.stored_game_ids(), key=lambda game_id: game_order([int(game_id)])[0])
+    history = store.load(games=game_ids)
+    last_night = [int(game_id) for game_id in game_ids[-10:]]
+    before = history[~history['GAME_ID'].isin(last_night)]
+    after = history[history['GAME_ID'].isin(last_night)]
+
+    engine = RollingFeatureEngine()
+    start = time.perf_counter()
+    full = engine.rebuild(history)
+    rebuild_seconds = time.perf_counter() - start
+
+    engine.rebuild(before)
+    start = time.perf_counter()
+    incremental = engine.update(after)
+    update_seconds = time.perf_counter() - start
+
+    expected = full[full['GAME_ID'].isin(last_night)].sort_values(KEY_COLUMNS).reset_index(drop=True)
+    incremental = incremental.sort_values(KEY_COLUMNS).reset_index(drop=True)
+    feature_columns = [column for column in expected.columns if column not in KEY_COLUMNS]
+    max_difference = np.nanmax(np.abs(expected[feature_columns].to_numpy() - incremental[feature_columns].to_numpy()))
+    print(f"{len(history)} rows, {len(game_ids)} games, {len(feature_columns)} features")
+    print(f"Full rebuild: {rebuild_seconds * 1000:.1f} ms")
+    print(f"Incremental update ({len(last_night)} games, {len(after)} rows): {update_seconds * 1000:.1f} ms")
+    print(f"Max difference vs rebuild: {max_difference:.2e}")
+
+
+if __name__ == "__main__":
+    _benchmark(sys.argv[1] if len(sys.argv) > 1 else 'nba_stats')
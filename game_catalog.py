@@ -0,0 +1,164 @@
+import os
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+from stats_store import season_from_game_id
+
+CATALOG_FILE = "game_catalog.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id TEXT PRIMARY KEY,
+    game_date TEXT,
+    season INTEGER,
+    home_team_id INTEGER,
+    visitor_team_id INTEGER,
+    home_team TEXT,
+    visitor_team TEXT,
+    status_id INTEGER,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS games_by_date ON games (game_date);
+CREATE INDEX IF NOT EXISTS games_by_season ON games (season);
+CREATE INDEX IF NOT EXISTS games_by_home_team ON games (home_team_id);
+CREATE INDEX IF NOT EXISTS games_by_visitor_team ON games (visitor_team_id);
+
+CREATE TABLE IF NOT EXISTS scanned_dates (
+    game_date TEXT PRIMARY KEY,
+    game_count INTEGER,
+    scanned_at TEXT
+);
+"""
+
+GAME_COLUMNS = [
+    "game_id", "game_date", "season", "home_team_id", "visitor_team_id",
+    "home_team", "visitor_team", "status_id", "status",
+]
+
+
+class GameCatalog:
+    """SQLite index of known games and of the scoreboard dates already scanned.
+
+    Game IDs are unique, so re-scanning a date updates rows in place instead of
+    appending duplicates, and lookups by date or team use indexes instead of
+    loading the whole catalog.
+    """
+
+    def __init__(self, path=CATALOG_FILE):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def is_scanned(self, game_date):
+        row = self.connection.execute(
+            "SELECT 1 FROM scanned_dates WHERE game_date = ?", (game_date,)
+        ).fetchone()
+        return row is not None
+
+    def unscanned_dates(self, start_date, end_date):
+        """Dates in [start_date, end_date] (YYYY-MM-DD strings) that have never been scanned."""
+        scanned = set(
+            row["game_date"] for row in self.connection.execute(
+                "SELECT game_date FROM scanned_dates WHERE game_date BETWEEN ? AND ?", (start_date, end_date)
+            )
+        )
+        current_date = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+        dates = []
+        while current_date <= end:
+            date_str = current_date.strftime("%Y-%m-%d")
+            if date_str not in scanned:
+                dates.append(date_str)
+            current_date += timedelta(days=1)
+        return dates
+
+    def record_date(self, game_date, games_df, mark_scanned=True):
+        """Store one date's ScoreboardV2 GameHeader rows and mark the date scanned, atomically.
+
+        Pass mark_scanned=False for dates whose games may still change (today or
+        later), so the next scan queries them again.
+        """
+        rows = [_game_row(game, game_date) for game in games_df.to_dict("records")]
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO games ({', '.join(GAME_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in GAME_COLUMNS)})",
+                [[row[column] for column in GAME_COLUMNS] for row in rows],
+            )
+            if not mark_scanned:
+                return
+            self.connection.execute(
+                "INSERT OR REPLACE INTO scanned_dates (game_date, game_count, scanned_at) VALUES (?, ?, ?)",
+                (game_date, len(rows), datetime.now().isoformat(timespec="seconds")),
+            )
+
+    def add_game_ids(self, game_ids):
+        """Add bare game IDs (date and teams unknown) without touching games already catalogued."""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO games (game_id, season) VALUES (?, ?)",
+                [(game_id, season_from_game_id(game_id)) for game_id in game_ids],
+            )
+
+    def games_on(self, game_date):
+        return self._select("WHERE game_date = ?", (game_date,))
+
+    def games_between(self, start_date, end_date):
+        return self._select("WHERE game_date BETWEEN ? AND ?", (start_date, end_date))
+
+    def games_for_team(self, team, season=None):
+        """Games a team played, by team ID or tricode (e.g. 1610612756 or 'PHX')."""
+        if isinstance(team, str) and not team.isdigit():
+            clause, params = "WHERE (home_team = ? OR visitor_team = ?)", [team.upper(), team.upper()]
+        else:
+            clause, params = "WHERE (home_team_id = ? OR visitor_team_id = ?)", [int(team), int(team)]
+        if season is not None:
+            clause += " AND season = ?"
+            params.append(season)
+        return self._select(clause, params)
+
+    def game_ids(self, season=None):
+        if season is None:
+            rows = self.connection.execute("SELECT game_id FROM games ORDER BY game_id")
+        else:
+            rows = self.connection.execute("SELECT game_id FROM games WHERE season = ? ORDER BY game_id", (season,))
+        return [row["game_id"] for row in rows]
+
+    def _select(self, clause, params):
+        rows = self.connection.execute(
+            f"SELECT {', '.join(GAME_COLUMNS)} FROM games {clause} ORDER BY game_date, game_id", params
+        )
+        return [dict(row) for row in rows]
+
+
+def _game_row(game, game_date):
+    # GAMECODE looks like 20231201/NYKBOS: visitor tricode then home tricode
+    gamecode = str(game.get("GAMECODE") or "")
+    tricodes = gamecode.split("/")[-1] if "/" in gamecode else ""
+    season = game.get("SEASON")
+    return {
+        "game_id": str(game["GAME_ID"]),
+        "game_date": game_date,
+        "season": int(season) if season else season_from_game_id(game["GAME_ID"]),
+        "home_team_id": game.get("HOME_TEAM_ID"),
+        "visitor_team_id": game.get("VISITOR_TEAM_ID"),
+        "home_team": tricodes[3:6] or None,
+        "visitor_team": tricodes[0:3] or None,
+        "status_id": game.get("GAME_STATUS_ID"),
+        "status": str(game.get("GAME_STATUS_TEXT") or "").strip() or None,
+    }
+
+
+def import_game_ids_cache(json_path, catalog):
+    """Load the legacy game_ids_cache.json list into the catalog (duplicates collapse)."""
+    if not os.path.exists(json_path):
+        return 0
+    with open(json_path, "r") as file:
+        game_ids = json.load(file)["game_ids"]
+    catalog.add_game_ids(game_ids)
+    return len(set(game_ids))
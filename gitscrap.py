@@ -1,45 +1,43 @@
 import requests
 import pandas as pd
-import time
 
-def call_endpoint(url, max_level=3, include_new_player_attributes=False, retries=5, delay=2):
+from http_client import get
+from instrumentation import stage
+
+def call_endpoint(url, max_level=3, include_new_player_attributes=False, retries=5):
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
 
-    for attempt in range(retries):
-        resp = requests.get(url, headers=headers)
-
-        # Print the response text for debugging
-        print(f"Status Code: {resp.status_code}")
-        print(f"Response Text: {resp.text[:500]}...")  # Show only first 500 chars
-
-        # If rate-limited, wait and retry
-        if resp.status_code == 429:
-            print(f"Rate limit reached, retrying in {delay} seconds...")
-            time.sleep(delay)
-            delay *= 2  # Exponential backoff
-            continue
+    # 429s and timeouts are retried inside get(), paced by the shared PrizePicks rate controller
+    resp = get(url, headers=headers, retries=retries)
+    if resp is None:
+        print("Error: Failed to get a successful response after multiple retries.")
+        return None
 
-        if resp.status_code != 200:
-            print(f"Error: Received status code {resp.status_code}")
-            return None
+    # Status, latency and size of every response are recorded by the instrumentation in get()
+    if resp.status_code != 200:
+        print(f"Error: Received status code {resp.status_code}")
+        return None
 
-        try:
+    try:
+        with stage("projections.parse"):
             data_json = resp.json()  # Convert response to JSON
-        except requests.exceptions.JSONDecodeError:
-            print("Error: Response is not valid JSON.")
-            return None
+    except requests.exceptions.JSONDecodeError:
+        print("Error: Response is not valid JSON.")
+        return None
 
-        # Ensure 'data' and 'included' exist in JSON before accessing
-        if 'data' not in data_json or 'included' not in data_json:
-            print("Error: Expected keys ('data', 'included') not found in response.")
-            return None
+    # Ensure 'data' and 'included' exist in JSON before accessing
+    if 'data' not in data_json or 'included' not in data_json:
+        print("Error: Expected keys ('data', 'included') not found in response.")
+        return None
 
+    with stage("projections.build"):
         data = pd.json_normalize(data_json['data'], max_level=max_level)
         included = pd.json_normalize(data_json['included'], max_level=max_level)
 
-        if include_new_player_attributes:
+    if include_new_player_attributes:
+        with stage("projections.merge"):
             inc_cop = included[included['type'] == 'new_player'].copy().dropna(axis=1)
             data = pd.merge(
                 data, inc_cop, how='left',
@@ -47,29 +45,33 @@ def call_endpoint(url, max_level=3, include_new_player_attributes=False, retries
                 right_on=['id', 'type'], suffixes=('', '_new_player')
             )
 
-        return data
+    return data
+
+
+PROJECTIONS_URL = 'https://partner-api.prizepicks.com/projections?league_id={league_id}&per_page=1000'
+LEAGUE_IDS = {"NFL": 9, "NBA": 7}
 
-    print("Error: Failed to get a successful response after multiple retries.")
-    return None
 
+def fetch_projections(league_id):
+    # Full board for one league, with the new_player attributes merged in
+    return call_endpoint(PROJECTIONS_URL.format(league_id=league_id), include_new_player_attributes=True)
 
-# Call the NFL endpoint with rate limiting and retries
-nfl_url = 'https://partner-api.prizepicks.com/projections?league_id=9&per_page=1000'
-nfl = call_endpoint(nfl_url, include_new_player_attributes=True)
 
-if nfl is None:
-    print("NFL_Failed")
+if __name__ == "__main__":
+    # Call the NFL endpoint with rate limiting and retries
+    nfl = fetch_projections(LEAGUE_IDS["NFL"])
 
-if nfl is not None:
-    nfl.to_csv("NFL_Prize_picks.csv")
+    if nfl is None:
+        print("NFL_Failed")
 
-# Call the NBA endpoint with rate limiting and retries
-nba_url = 'https://partner-api.prizepicks.com/projections?league_id=7&per_page=1000'
-nba = call_endpoint(nba_url, include_new_player_attributes=True)
+    if nfl is not None:
+        nfl.to_csv("NFL_Prize_picks.csv")
 
-if nba is None:
-    print("NBA_Failed")
+    # Call the NBA endpoint with rate limiting and retries
+    nba = fetch_projections(LEAGUE_IDS["NBA"])
 
-if nba is not None:
-    nba.to_csv("NBA_Prize_picks.csv")
+    if nba is None:
+        print("NBA_Failed")
 
+    if nba is not None:
+        nba.to_csv("NBA_Prize_picks.csv")
@@ -0,0 +1,146 @@
+import sys
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from nba_api.stats.library.http import NBAStatsHTTP, NBAStatsResponse
+
+from instrumentation import record_request, record_retry, record_wait, stage
+from rate_limit import controller_for
+
+# Connections kept alive per host; enough for the concurrent box score fetchers
+POOL_SIZE = 32
+
+# Statuses that mean "slow down and try again"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """The one pooled keep-alive session, shared with nba_api so its endpoints reuse connections too."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=POOL_SIZE)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+            NBAStatsHTTP.set_session(_session)
+        return _session
+
+
+def retry_after_seconds(value):
+    """Retry-After header (seconds or an HTTP date) -> seconds to wait, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def get(url, params=None, headers=None, timeout=30, retries=5, limiter=None):
+    """GET through the shared session, paced by the host's adaptive rate controller.
+
+    429s, 5xx responses and timeouts are retried (up to retries attempts) after
+    feeding them back to the controller. Returns the last response received, or
+    None if no attempt got a response at all. limiter is an optional extra
+    caller-side cap (a RateLimiter) on top of the host controller.
+    """
+    parsed = urlparse(url)
+    host, endpoint = parsed.netloc, parsed.path.rstrip("/").rsplit("/", 1)[-1]
+    controller = controller_for(host)
+    session = get_session()
+
+    response = None
+    for attempt in range(retries):
+        waited = limiter.acquire() if limiter is not None else 0.0
+        waited += controller.acquire()
+        record_wait(host, waited)
+        start = time.monotonic()
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            reason = "timeout" if isinstance(e, requests.exceptions.Timeout) else "connection_error"
+            record_request(host, endpoint, reason, time.monotonic() - start, 0)
+            record_retry(host, reason)
+            controller.on_timeout()
+            print(f"❌ {type(e).__name__} from {host} (attempt {attempt + 1}/{retries})")
+            continue
+
+        latency = time.monotonic() - start
+        record_request(host, endpoint, response.status_code, latency, len(response.content))
+        if response.status_code in RETRY_STATUSES:
+            record_retry(host, response.status_code)
+            controller.on_throttle(retry_after_seconds(response.headers.get("Retry-After")))
+            print(f"⚠️ {host} answered {response.status_code} (attempt {attempt + 1}/{retries}), "
+                  f"slowing to {controller.rate:.2f} req/s")
+            continue
+
+        controller.on_success(latency)
+        return response
+    return response
+
+
+def nba_stats_get(endpoint, parameters, headers=None, timeout=30, retries=5, limiter=None):
+    """Send one nba_api stats request through get(). Returns an NBAStatsResponse, or None if nothing came back."""
+    url = NBAStatsHTTP.base_url.format(endpoint=endpoint)
+    # nba_api sorts the parameters because some endpoints care about their order
+    response = get(url, params=sorted(parameters.items()), headers=headers or NBAStatsHTTP.headers,
+                   timeout=timeout, retries=retries, limiter=limiter)
+    if response is None:
+        return None
+    return NBAStatsResponse(response=NBAStatsHTTP().clean_contents(response.text),
+                            status_code=response.status_code, url=response.url)
+
+
+def load_endpoint(endpoint, retries=5, limiter=None):
+    """Fill an nba_api endpoint built with get_request=False (e.g. ScoreboardV2) from nba_stats_get.
+
+    Returns False if no valid response came back.
+    """
+    response = nba_stats_get(endpoint.endpoint, endpoint.parameters, getattr(endpoint, "headers", None),
+                             endpoint.timeout, retries, limiter)
+    if response is None or not response.valid_json():
+        return False
+    endpoint.nba_response = response
+    with stage(f"{endpoint.endpoint.lower()}.parse"):
+        endpoint.load_response()
+    return True
+
+
+def _demo(server_rate, workers, request_count):
+    # Against a stub that allows server_rate req/s, the controller should settle just under it
+    from concurrent.futures import ThreadPoolExecutor
+
+    from stub_server import start_stub_server, stop_stub_server
+
+    server = start_stub_server("fixtures", server_rate_limit=server_rate)
+    url = NBAStatsHTTP.base_url.format(endpoint="boxscoreadvancedv3")
+    controller = controller_for(urlparse(url).netloc)
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda i: get(url, params={"GameID": "demo"}, retries=10), range(request_count)))
+        seconds = time.perf_counter() - start
+    finally:
+        stop_stub_server(server)
+
+    served = server.stats["requests"] - server.stats["throttled"]
+    print(f"Server limit {server_rate} req/s: {served} answered, {server.stats['throttled']} throttled "
+          f"in {seconds:.1f} s -> {served / seconds:.1f} req/s; controller settled at {controller.rate:.1f} req/s")
+
+
+if __name__ == "__main__":
+    _demo(float(sys.argv[1]) if len(sys.argv) > 1 else 20.0,
+          int(sys.argv[2]) if len(sys.argv) > 2 else 8,
+          int(sys.argv[3]) if len(sys.argv) > 3 else 600)
@@ -0,0 +1,247 @@
+import os
+import json
+import time
+import atexit
+import bisect
+import threading
+import contextlib
+from collections import Counter, defaultdict
+
+# Setting PIPELINE_TRACE=<path> turns instrumentation on for any entry point
+TRACE_ENV = "PIPELINE_TRACE"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Returned by stage() while disabled, so an instrumented block costs one function call
+_NOOP = contextlib.nullcontext()
+
+_recorder = None
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (Prometheus style buckets, plus sum/count/max)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (max for the overflow bucket)."""
+        if not self.count:
+            return None
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= q * self.count:
+                return bound
+        return self.max
+
+
+class Recorder:
+    """Collects request, retry, wait and stage measurements; optionally streams them as JSON lines."""
+
+    def __init__(self, trace_path=None):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.latency = defaultdict(Histogram)      # (host, endpoint) -> request latency
+        self.statuses = Counter()                  # (host, status)
+        self.bytes = Counter()                     # host -> response bytes
+        self.retries = Counter()                   # (host, reason)
+        self.wait_seconds = Counter()              # host -> time spent waiting on the rate controller
+        self.stages = defaultdict(Histogram)       # stage -> duration
+        self.trace_path = trace_path
+        self._trace = open(trace_path, "a") if trace_path else None
+
+    def _emit(self, event):
+        # Called with the lock held
+        if self._trace is not None:
+            event["ts"] = round(time.time(), 6)
+            event["thread"] = threading.current_thread().name
+            self._trace.write(json.dumps(event) + "\n")
+
+    def request(self, host, endpoint, status, latency, size):
+        with self.lock:
+            self.latency[(host, endpoint)].observe(latency)
+            self.statuses[(host, str(status))] += 1
+            self.bytes[host] += size
+            self._emit({"type": "request", "host": host, "endpoint": endpoint, "status": status,
+                        "latency": round(latency, 6), "bytes": size})
+
+    def retry(self, host, reason):
+        with self.lock:
+            self.retries[(host, str(reason))] += 1
+            self._emit({"type": "retry", "host": host, "reason": str(reason)})
+
+    def wait(self, host, seconds):
+        with self.lock:
+            self.wait_seconds[host] += seconds
+            self._emit({"type": "wait", "host": host, "seconds": round(seconds, 6)})
+
+    def stage(self, name, seconds):
+        with self.lock:
+            self.stages[name].observe(seconds)
+            self._emit({"type": "stage", "stage": name, "seconds": round(seconds, 6)})
+
+    def close(self):
+        with self.lock:
+            if self._trace is not None:
+                self._trace.close()
+                self._trace = None
+
+    def prometheus_text(self):
+        """The collected metrics in the Prometheus text exposition format."""
+        with self.lock:
+            lines = []
+            lines += _histogram_lines("pipeline_request_latency_seconds", "HTTP request latency",
+                                      {("host", "endpoint"): self.latency})
+            lines += ["# HELP pipeline_requests_total Responses by status", "# TYPE pipeline_requests_total counter"]
+            lines += [f'pipeline_requests_total{{host="{host}",status="{status}"}} {count}'
+                      for (host, status), count in sorted(self.statuses.items())]
+            lines += ["# HELP pipeline_response_bytes_total Response body bytes",
+                      "# TYPE pipeline_response_bytes_total counter"]
+            lines += [f'pipeline_response_bytes_total{{host="{host}"}} {size}' for host, size in sorted(self.bytes.items())]
+            lines += ["# HELP pipeline_retries_total Retried requests by reason", "# TYPE pipeline_retries_total counter"]
+            lines += [f'pipeline_retries_total{{host="{host}",reason="{reason}"}} {count}'
+                      for (host, reason), count in sorted(self.retries.items())]
+            lines += ["# HELP pipeline_rate_wait_seconds_total Time spent waiting on the rate controller",
+                      "# TYPE pipeline_rate_wait_seconds_total counter"]
+            lines += [f'pipeline_rate_wait_seconds_total{{host="{host}"}} {seconds:.6f}'
+                      for host, seconds in sorted(self.wait_seconds.items())]
+            lines += _histogram_lines("pipeline_stage_seconds", "Time spent in a transform stage",
+                                      {("stage",): {(name,): histogram for name, histogram in self.stages.items()}})
+            return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """A short human-readable report: where the time went, by host and by stage."""
+        with self.lock:
+            lines = [f"Instrumented for {time.time() - self.started:.1f} s"]
+            hosts = sorted({host for host, _ in self.latency} | set(self.wait_seconds))
+            for host in hosts:
+                histograms = [histogram for (h, _), histogram in self.latency.items() if h == host]
+                merged = _merge(histograms)
+                statuses = ", ".join(f"{status}: {count}" for (h, status), count in sorted(self.statuses.items()) if h == host)
+                retries = sum(count for (h, _), count in self.retries.items() if h == host)
+                lines.append(
+                    f"{host}: {merged.count} requests ({statuses}), {retries} retries, "
+                    f"latency p50 <= {_format(merged.quantile(0.5))} p95 <= {_format(merged.quantile(0.95))} "
+                    f"total {merged.sum:.2f} s, waiting on rate limit {self.wait_seconds[host]:.2f} s, "
+                    f"{self.bytes[host] / 1e6:.2f} MB"
+                )
+            for name, histogram in sorted(self.stages.items(), key=lambda item: -item[1].sum):
+                lines.append(f"{name}: {histogram.count} calls, total {histogram.sum:.3f} s, "
+                             f"mean {histogram.sum / histogram.count * 1000:.2f} ms, max {histogram.max * 1000:.2f} ms")
+            return "\n".join(lines)
+
+
+def _histogram_lines(metric, help_text, labelled):
+    lines = [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+    for label_names, histograms in labelled.items():
+        for label_values, histogram in sorted(histograms.items()):
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(label_names, label_values))
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else bound
+                lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{metric}_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+def _merge(histograms):
+    merged = Histogram()
+    for histogram in histograms:
+        merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+        merged.count += histogram.count
+        merged.sum += histogram.sum
+        merged.max = max(merged.max, histogram.max)
+    return merged
+
+
+def _format(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f} ms"
+
+
+class _Stage:
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.recorder.stage(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def enable(trace_path=None, report_at_exit=False):
+    """Start recording (and streaming JSON lines to trace_path, if given). Returns the recorder.
+
+    With report_at_exit the summary is printed and <trace_path>.prom written when the process ends.
+    """
+    global _recorder
+    disable()
+    _recorder = Recorder(trace_path)
+    if report_at_exit:
+        atexit.register(_report_at_exit, _recorder)
+    return _recorder
+
+
+def disable():
+    """Stop recording; returns the recorder that was active (or None) so it can still be reported."""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.close()
+    return recorder
+
+
+def recorder():
+    return _recorder
+
+
+def _report_at_exit(active):
+    active.close()
+    print(active.summary())
+    if active.trace_path:
+        with open(f"{active.trace_path}.prom", "w") as file:
+            file.write(active.prometheus_text())
+
+
+def stage(name):
+    """Context manager timing a transform stage (DataFrame build, merge, serialize...)."""
+    if _recorder is None:
+        return _NOOP
+    return _Stage(_recorder, name)
+
+
+def record_request(host, endpoint, status, latency, size):
+    if _recorder is not None:
+        _recorder.request(host, endpoint, status, latency, size)
+
+
+def record_retry(host, reason):
+    if _recorder is not None:
+        _recorder.retry(host, reason)
+
+
+def record_wait(host, seconds):
+    if _recorder is not None and seconds > 0:
+        _recorder.wait(host, seconds)
+
+
+if os.environ.get(TRACE_ENV):
+    enable(os.environ[TRACE_ENV], report_at_exit=True)
@@ -0,0 +1,326 @@
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from gitscrap import fetch_projections, LEAGUE_IDS
+from instrumentation import stage
+
+HISTORY_DIR = "line_history"
+
+# Fields whose change makes a new line-history row
+LINE_FIELDS = ["line_score", "status", "odds_type", "is_live"]
+
+LINE_COLUMNS = {
+    "id": "projection_id",
+    "attributes.updated_at": "updated_at",
+    "attributes.line_score": "line_score",
+    "attributes.status": "status",
+    "attributes.odds_type": "odds_type",
+    "attributes.is_live": "is_live",
+}
+
+PROJECTION_COLUMNS = {
+    "id": "projection_id",
+    "relationships.new_player.data.id": "player_id",
+    "relationships.league.data.id": "league_id",
+    "relationships.game.data.id": "game_id",
+    "attributes.stat_type": "stat_type",
+    "attributes.description": "description",  # the opponent, so it differs between a game's two teams
+    "attributes.start_time": "start_time",  # kept only for projections without a game
+}
+
+GAME_COLUMNS = {
+    "relationships.game.data.id": "game_id",
+    "attributes.start_time": "start_time",
+}
+
+PLAYER_COLUMNS = {
+    "relationships.new_player.data.id": "player_id",
+    "attributes.name": "name",
+    "attributes.display_name": "display_name",
+    "attributes.team": "team",
+    "attributes.position": "position",
+    "attributes.league": "league",
+    "attributes.combo": "combo",
+}
+
+# The removal marker written when a projection drops off the board
+REMOVED_STATUS = "removed"
+
+
+def _select(board, columns):
+    return pd.DataFrame({new: board[old] if old in board else None for old, new in columns.items()})
+
+
+def _differs(current, previous):
+    # Element-wise "value changed", treating two missing values as equal
+    current = current.reset_index(drop=True).astype(object)
+    previous = previous.reset_index(drop=True).astype(object)
+    both_missing = current.isna() & previous.isna()
+    return ~(both_missing | (current == previous).fillna(False))
+
+
+def normalize_board(board):
+    """Split a call_endpoint frame into (lines, projections, players, games) tables."""
+    lines = _select(board, LINE_COLUMNS)
+    lines["projection_id"] = lines["projection_id"].astype("int64")
+    lines["updated_at"] = pd.to_datetime(lines["updated_at"], utc=True)
+    lines["line_score"] = lines["line_score"].astype("float32")
+    lines["status"] = lines["status"].astype("string")
+    lines["odds_type"] = lines["odds_type"].astype("string")
+    lines["is_live"] = lines["is_live"].fillna(False).astype(bool)
+
+    projections = _select(board, PROJECTION_COLUMNS).astype({"projection_id": "int64"})
+    projections = projections.astype({column: "string" for column in projections.columns if column != "projection_id"})
+    # The start time lives in the games table; combos without a game keep their own
+    projections["start_time"] = projections["start_time"].where(projections["game_id"].isna())
+
+    players = _select(board, PLAYER_COLUMNS).dropna(subset=["player_id"])
+    players = players.astype("string").drop_duplicates("player_id", keep="last")
+
+    games = _select(board, GAME_COLUMNS).dropna(subset=["game_id"])
+    games = games.astype("string").drop_duplicates("game_id", keep="last")
+    return lines, projections, players, games
+
+
+class LineHistory:
+    """Append-only history of PrizePicks lines plus normalized dimension tables.
+
+    Each poll appends one Parquet part per table holding only what changed since
+    the previous poll: new or moved lines, and new or edited projection, player
+    and game metadata. Unchanged polls write nothing.
+    """
+
+    def __init__(self, root=HISTORY_DIR):
+        self.root = root
+        self._lines = None
+        self._latest = None
+        self._known = {}
+
+    def _part_dir(self, table):
+        return os.path.join(self.root, table)
+
+    def _read_table(self, table):
+        part_dir = self._part_dir(table)
+        if not os.path.isdir(part_dir):
+            return None
+        parts = sorted(name for name in os.listdir(part_dir) if name.endswith(".parquet"))
+        if not parts:
+            return None
+        return pd.concat([pd.read_parquet(os.path.join(part_dir, name)) for name in parts], ignore_index=True)
+
+    def _append(self, table, frame, polled_at, league_id):
+        if frame.empty:
+            return
+        part_dir = self._part_dir(table)
+        os.makedirs(part_dir, exist_ok=True)
+        # Parts sort by poll time; league and a random suffix keep same-timestamp records from colliding
+        name = f"{polled_at.strftime('%Y%m%dT%H%M%S%f')}_{league_id}_{uuid.uuid4().hex[:8]}.parquet"
+        path = os.path.join(part_dir, name)
+        tmp_path = f"{path}.tmp"
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def lines(self):
+        """Every stored line change, sorted by projection and time."""
+        if self._lines is None:
+            lines = self._read_table("lines")
+            if lines is None:
+                lines = pd.DataFrame(columns=["projection_id", "updated_at", "polled_at", "league_id"] + LINE_FIELDS)
+            self._lines = lines.sort_values(["projection_id", "updated_at"], kind="stable").reset_index(drop=True)
+        return self._lines
+
+    def projections(self):
+        projections = self._read_table("projections")
+        return None if projections is None else projections.drop_duplicates("projection_id", keep="last")
+
+    def players(self):
+        players = self._read_table("players")
+        return None if players is None else players.drop_duplicates("player_id", keep="last")
+
+    def games(self):
+        games = self._read_table("games")
+        return None if games is None else games.drop_duplicates("game_id", keep="last")
+
+    def projection_details(self):
+        """Projection metadata joined with its player and game (one row per projection), or None."""
+        projections = self.projections()
+        if projections is None:
+            return None
+        details = projections
+        players = self.players()
+        if players is not None:
+            details = details.merge(players, on="player_id", how="left")
+        games = self.games()
+        if games is not None:
+            details = details.merge(games.rename(columns={"start_time": "game_start_time"}), on="game_id", how="left")
+            # Parts written before the games table existed carry start_time on the projection
+            details["start_time"] = details["start_time"].fillna(details.pop("game_start_time"))
+        return details
+
+    def _with_details(self, frame):
+        details = self.projection_details()
+        if details is None:
+            return frame
+        # The line rows already carry league_id
+        return frame.merge(details.drop(columns="league_id"), on="projection_id", how="left")
+
+    def _latest_lines(self):
+        # Current state per projection, rebuilt from disk once per process
+        if self._latest is None:
+            latest = self.lines().drop_duplicates("projection_id", keep="last")
+            self._latest = latest.set_index("projection_id")
+        return self._latest
+
+    def _known_rows(self, table, key):
+        if table not in self._known:
+            stored = {"projections": self.projections, "players": self.players, "games": self.games}[table]()
+            self._known[table] = stored.set_index(key) if stored is not None else None
+        return self._known[table]
+
+    def _changed_dimension_rows(self, table, key, frame):
+        known = self._known_rows(table, key)
+        if known is None or known.empty:
+            return frame
+        candidate = frame.set_index(key)
+        existing = known.reindex(candidate.index)
+        same = (candidate.fillna("") == existing.fillna("")).all(axis=1)
+        return frame[~same.to_numpy()]
+
+    def record(self, board, league_id, polled_at=None):
+        """Append what changed on one league's board since the last poll. Returns rows written."""
+        if polled_at is None:
+            polled_at = datetime.now(timezone.utc)
+        polled_at = pd.Timestamp(polled_at)
+        polled_at = polled_at.tz_convert("UTC") if polled_at.tzinfo else polled_at.tz_localize("UTC")
+
+        with stage("line_history.normalize"):
+            lines, projections, players, games = normalize_board(board)
+        lines["polled_at"] = polled_at
+        lines["league_id"] = str(league_id)
+
+        # A line is written when its projection is new (or came back) or a tracked field moved
+        latest = self._latest_lines()
+        previous = latest.reindex(lines["projection_id"]).reset_index(drop=True)
+        changed = previous["updated_at"].isna() | (previous["status"] == REMOVED_STATUS).fillna(False)
+        for field in LINE_FIELDS:
+            changed |= _differs(lines[field], previous[field])
+        changed_lines = lines[changed.to_numpy()]
+
+        # Projections of this league that were on the board last poll and are gone now
+        active = latest[(latest["league_id"] == str(league_id)) & (latest["status"] != REMOVED_STATUS)]
+        gone = active[~active.index.isin(lines["projection_id"])].reset_index()
+        gone["status"] = REMOVED_STATUS
+        gone["updated_at"] = polled_at
+        gone["polled_at"] = polled_at
+
+        columns = ["projection_id", "updated_at", "polled_at", "league_id"] + LINE_FIELDS
+        new_rows = pd.concat([changed_lines[columns], gone[columns]], ignore_index=True)
+
+        new_projections = self._changed_dimension_rows("projections", "projection_id", projections)
+        new_players = self._changed_dimension_rows("players", "player_id", players)
+        new_games = self._changed_dimension_rows("games", "game_id", games)
+
+        with stage("line_history.serialize"):
+            self._append("lines", new_rows, polled_at, league_id)
+            self._append("projections", new_projections, polled_at, league_id)
+            self._append("players", new_players, polled_at, league_id)
+            self._append("games", new_games, polled_at, league_id)
+
+        # Keep the in-memory state in step with what was written
+        if not new_rows.empty:
+            self._latest = pd.concat([latest[~latest.index.isin(new_rows["projection_id"])],
+                                      new_rows.set_index("projection_id")])
+            self._lines = None
+        for table, key, frame in (("projections", "projection_id", new_projections), ("players", "player_id", new_players),
+                                  ("games", "game_id", new_games)):
+            if not frame.empty:
+                known = self._known.get(table)
+                rows = frame.set_index(key)
+                self._known[table] = rows if known is None else pd.concat([known[~known.index.isin(rows.index)], rows])
+        return len(new_rows)
+
+    def line_as_of(self, when, projection_ids=None):
+        """The line each projection showed at time `when` (one row per projection), with its details."""
+        when = pd.Timestamp(when)
+        when = when.tz_convert("UTC") if when.tzinfo else when.tz_localize("UTC")
+        lines = self.lines()
+        if projection_ids is not None:
+            lines = lines[lines["projection_id"].isin(projection_ids)]
+        # Rows are sorted by (projection_id, updated_at), so the last one per id before `when` is the answer
+        as_of = lines[lines["updated_at"] <= when].drop_duplicates("projection_id", keep="last")
+        return self._with_details(as_of[as_of["status"] != REMOVED_STATUS].reset_index(drop=True))
+
+    def lines_as_of(self, queries):
+        """Vectorized as-of lookup for a frame of (projection_id, as_of) pairs, e.g. each game's start_time."""
+        queries = queries.copy()
+        queries["as_of"] = pd.to_datetime(queries["as_of"], utc=True)
+        lines = self.lines().sort_values("updated_at", kind="stable")
+        result = pd.merge_asof(
+            queries.sort_values("as_of"), lines, left_on="as_of", right_on="updated_at",
+            by="projection_id", direction="backward",
+        )
+        return self._with_details(result)
+
+    def closing_lines(self):
+        """The last line posted before each projection's start_time (its game's, when it has one)."""
+        details = self.projection_details()
+        if details is None:
+            return pd.DataFrame()
+        queries = details[["projection_id", "start_time"]].rename(columns={"start_time": "as_of"}).dropna()
+        return self.lines_as_of(queries)
+
+    def compact(self, table="lines"):
+        """Merge a table's per-poll parts into a single file.
+
+        The merged file replaces the newest part before the older parts are
+        deleted, so an interruption leaves duplicate rows rather than lost ones;
+        exact duplicates are dropped here, so compacting again cleans them up.
+        """
+        part_dir = self._part_dir(table)
+        if not os.path.isdir(part_dir):
+            return
+        parts = sorted(name for name in os.listdir(part_dir) if name.endswith(".parquet"))
+        if not parts:
+            return
+        frame = pd.concat([pd.read_parquet(os.path.join(part_dir, name)) for name in parts], ignore_index=True)
+        frame = frame.drop_duplicates(ignore_index=True)
+        merged_path = os.path.join(part_dir, parts[-1])
+        tmp_path = f"{merged_path}.tmp"
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, merged_path)
+        for name in parts[:-1]:
+            os.remove(os.path.join(part_dir, name))
+
+        # Cached state was built from the old parts
+        self._lines = None
+        self._latest = None
+        self._known.pop(table, None)
+
+
+def poll_lines(leagues=("NBA", "NFL"), interval_seconds=300, polls=None, history=None):
+    """Poll the boards every interval_seconds and record line changes.
+
+    polls limits the number of rounds (None polls until interrupted).
+    """
+    if history is None:
+        history = LineHistory()
+
+    completed = 0
+    while polls is None or completed < polls:
+        for league in leagues:
+            league_id = LEAGUE_IDS[league]
+            board = fetch_projections(league_id)
+            if board is None:
+                print(f"{league}_Failed")
+                continue
+            written = history.record(board, league_id)
+            print(f"{league}: {len(board)} projections, {written} line changes recorded")
+
+        completed += 1
+        if polls is None or completed < polls:
+            time.sleep(interval_seconds)
+    return history
@@ -0,0 +1,150 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from player_index import TEAM_TRICODES
+from stats_store import game_order
+
+# The opponent's own per-game stats that describe its defense and tempo
+DEFENSE_COLUMNS = [
+    'defensiveRating', 'pace', 'possessions', 'defensiveReboundPercentage', 'reboundPercentage',
+    'estimatedDefensiveRating', 'estimatedPace',
+]
+
+# What the opponent gave up: the other team's box score in the same game
+ALLOWED_COLUMNS = ['PTS', 'TREB', 'AST', '3PM', 'FGA', 'FTA', 'OREB', 'TO']
+
+WINDOW = 10
+
+TEAM_IDS = {tricode: team_id for team_id, tricode in TEAM_TRICODES.items()}
+
+
+def catalog_game_dates(catalog):
+    """{int game ID: date} for every game the GameCatalog has a scoreboard date for."""
+    games = pd.DataFrame(catalog.games_between("0000-01-01", "9999-12-31"), columns=["game_id", "game_date"])
+    return pd.Series(pd.to_datetime(games["game_date"]).to_numpy(),
+                     index=pd.to_numeric(games["game_id"]).astype("int64"))
+
+
+def team_game_log(team_stats, game_dates=None):
+    """One row per team per game: the team's defensive stats, what its opponent put up, and the as-of key.
+
+    The as-of key (AS_OF) is the game date when game_dates covers every game,
+    and the chronological game order (stats_store.game_order) otherwise.
+    """
+    columns = [column for column in DEFENSE_COLUMNS if column in team_stats]
+    allowed = [column for column in ALLOWED_COLUMNS if column in team_stats]
+    log = team_stats[['gameId', 'teamId'] + columns].copy()
+    log['gameId'] = log['gameId'].astype('int64')
+    log['teamId'] = log['teamId'].astype('int64')
+
+    # Pair each row with the other team's row in the same game
+    games = team_stats[['gameId', 'teamId'] + allowed].rename(
+        columns={'teamId': 'OPP_TEAM_ID', **{column: f'{column}_allowed' for column in allowed}})
+    games['gameId'] = games['gameId'].astype('int64')
+    games['OPP_TEAM_ID'] = games['OPP_TEAM_ID'].astype('int64')
+    log = log.merge(games, on='gameId')
+    log = log[log['teamId'] != log['OPP_TEAM_ID']]
+
+    log['AS_OF'] = _as_of_key(log['gameId'], game_dates)
+    return log.sort_values(['teamId', 'AS_OF', 'gameId'], kind='stable').reset_index(drop=True)
+
+
+def _as_of_key(game_ids, game_dates):
+    if game_dates is not None:
+        dates = game_ids.map(game_dates)
+        if dates.notna().all():
+            return pd.to_datetime(dates).to_numpy()
+    return game_order(game_ids.to_numpy())
+
+
+def rolling_profiles(log, window=WINDOW):
+    """Each team's mean over its last `window` games, including the game on that row.
+
+    Keyed by (teamId, AS_OF): joined as of a later date, a row only ever covers
+    games that were already played.
+    """
+    stats = [column for column in log.columns if column in DEFENSE_COLUMNS or column.endswith('_allowed')]
+    rolled = log.groupby('teamId', sort=False)[stats].rolling(window, min_periods=1).mean()
+    profiles = pd.DataFrame(rolled.to_numpy(dtype='float64'), columns=[f'OPP_{column}_L{window}' for column in stats])
+    profiles.insert(0, 'OPP_TEAM_ID', log['teamId'].to_numpy())
+    profiles.insert(1, 'AS_OF', log['AS_OF'].to_numpy())
+    profiles[f'OPP_GAMES_L{window}'] = np.minimum(log.groupby('teamId', sort=False).cumcount().to_numpy() + 1, window)
+    # A team plays at most once per as-of key, but keep the last row if a key repeats
+    return profiles.drop_duplicates(['OPP_TEAM_ID', 'AS_OF'], keep='last')
+
+
+def _join_as_of(rows, profiles):
+    # Latest profile strictly before each row's key: the opponent's form as of the day before
+    order = np.argsort(rows['AS_OF'].to_numpy(), kind='stable')
+    left = rows.iloc[order]
+    joined = pd.merge_asof(left, profiles.sort_values('AS_OF', kind='stable'), on='AS_OF', by='OPP_TEAM_ID',
+                           allow_exact_matches=False)
+    joined.index = left.index
+    return joined.sort_index()
+
+
+def attach_to_player_games(player_games, team_stats, game_dates=None, window=WINDOW):
+    """Add the opponent's rolling defensive / pace profile, as of before each game, to player box score rows.
+
+    player_games needs GAME_ID and TEAM_ID; the opponent comes from the team
+    table's other row for that game. Rows whose game isn't in team_stats get
+    no profile (NaN), as do a team's first games.
+    """
+    log = team_game_log(team_stats, game_dates)
+    rows = player_games.reset_index(drop=True)
+    keys = pd.DataFrame({'gameId': pd.to_numeric(rows['GAME_ID']).astype('int64').to_numpy(),
+                         'teamId': pd.to_numeric(rows['TEAM_ID']).astype('int64').to_numpy()})
+    keys = keys.merge(log[['gameId', 'teamId', 'OPP_TEAM_ID', 'AS_OF']], on=['gameId', 'teamId'], how='left')
+    rows = rows.assign(OPP_TEAM_ID=keys['OPP_TEAM_ID'].to_numpy(), AS_OF=keys['AS_OF'].to_numpy())
+    return _attach(rows, rolling_profiles(log, window))
+
+
+def attach_to_props(legs, team_stats, game_dates=None, window=WINDOW):
+    """Add the opponent's rolling profile, as of before the game, to upcoming prop legs.
+
+    legs is expand_combo_props output (Opponent tricode and StartTime per leg).
+    With game dates the profile is the latest one before the game's US Eastern
+    date; without them, every stored game is already in the past, so it is
+    the opponent's latest profile.
+    """
+    profiles = rolling_profiles(team_game_log(team_stats, game_dates), window)
+    legs = legs.reset_index(drop=True)
+    rows = legs.assign(OPP_TEAM_ID=legs['Opponent'].astype('string').map(TEAM_IDS).to_numpy())
+
+    known = rows['OPP_TEAM_ID'].notna().to_numpy()
+    if np.issubdtype(profiles['AS_OF'].dtype, np.datetime64):
+        game_day = rows['StartTime'].dt.tz_convert('US/Eastern').dt.tz_localize(None).dt.normalize()
+        rows = rows.assign(AS_OF=game_day.to_numpy())
+        known = known & rows['AS_OF'].notna().to_numpy()
+    else:
+        rows = rows.assign(AS_OF=np.iinfo(np.int64).max)
+    return _attach(rows, profiles, known)
+
+
+def _attach(rows, profiles, known=None):
+    # Rows without an opponent (or as-of key) come back with an empty profile, in their original places
+    if known is None:
+        known = rows['OPP_TEAM_ID'].notna().to_numpy()
+    matched = rows[known].astype({'OPP_TEAM_ID': 'int64', 'AS_OF': profiles['AS_OF'].dtype})
+    joined = pd.concat([_join_as_of(matched, profiles), rows[~known]]).sort_index()
+    return joined.drop(columns=['AS_OF']).astype({'OPP_TEAM_ID': 'Int64'})
+
+
+def _benchmark(store_root, season=None):
+    from stats_store import StatsStore
+
+    player_games = StatsStore(store_root, 'player_stats').load(season=season)
+    team_stats = StatsStore(store_root, 'team_stats').load(season=season)
+    start = time.perf_counter()
+    joined = attach_to_player_games(player_games, team_stats)
+    seconds = time.perf_counter() - start
+    profiled = joined[f'OPP_GAMES_L{WINDOW}'].notna().sum()
+    print(f"{len(player_games)} player rows, {len(team_stats)} team rows: as-of join in {seconds * 1000:.0f} ms "
+          f"({profiled} rows with an opponent profile)")
+
+
+if __name__ == "__main__":
+    _benchmark(sys.argv[1] if len(sys.argv) > 1 else 'nba_stats', int(sys.argv[2]) if len(sys.argv) > 2 else None)
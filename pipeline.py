@@ -0,0 +1,299 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Only the standard library is imported here; each stage imports pandas / nba_api
+# itself, so --help, --dry-run and fully up-to-date runs never load them.
+
+STATE_FILE = "pipeline_state.json"
+
+# Boards change constantly, so a fetched board is reused for at most this long
+BOARD_MAX_AGE = 300
+# Scans that reach today are repeated after this long; past date ranges never change
+OPEN_SCAN_MAX_AGE = 3600
+
+DEFAULT_LEAGUES = ("NBA", "NFL")
+
+
+class Stage:
+    """One node of the pipeline DAG.
+
+    run() does the work. The stage is skipped when its fingerprint (params plus
+    the content of its input paths) matches the last successful run, all of its
+    outputs exist, and, for sources without inputs, the last run is younger
+    than max_age seconds.
+    """
+
+    def __init__(self, name, run, deps=(), inputs=(), outputs=(), params=None, max_age=None):
+        self.name = name
+        self.run = run
+        self.deps = tuple(deps)
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.params = params or {}
+        self.max_age = max_age
+
+    def fingerprint(self):
+        digest = hashlib.sha256(json.dumps(self.params, sort_keys=True, default=str).encode("utf-8"))
+        for path in self.inputs:
+            digest.update(path.encode("utf-8"))
+            digest.update(path_fingerprint(path).encode("ascii"))
+        return digest.hexdigest()
+
+    def is_fresh(self, record, fingerprint, now):
+        if record is None or record.get("fingerprint") != fingerprint:
+            return False
+        if not all(os.path.exists(path) for path in self.outputs):
+            return False
+        return self.max_age is None or now - record["finished_at"] < self.max_age
+
+
+def path_fingerprint(path):
+    """Content hash of a file, or a hash of a directory's file listing (names, sizes, mtimes)."""
+    if os.path.isfile(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(".tmp"):
+                    continue
+                stat = os.stat(os.path.join(root, name))
+                digest.update(f"{os.path.relpath(os.path.join(root, name), path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _load_state(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def _save_state(path, state):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(state, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _with_dependencies(stages, targets):
+    needed, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in stages:
+            raise ValueError(f"unknown stage {name!r}")
+        if name not in needed:
+            needed.add(name)
+            todo.extend(stages[name].deps)
+    return needed
+
+
+def run_pipeline(stages, targets=None, jobs=2, force=False, dry_run=False, state_path=STATE_FILE):
+    """Run the target stages and everything they depend on, skipping stages that are up to date.
+
+    Stages whose dependencies are done run in parallel on up to jobs threads. A
+    stage whose dependency failed is not run. State is saved after every stage,
+    so an interrupted run picks up where it stopped. Returns {stage: status}.
+
+    With dry_run a stage is reported "would run" when it is stale or when any of
+    its dependencies would run, as a real run would refresh its inputs first.
+    Raises RuntimeError if some stages can never start (a dependency cycle).
+    """
+    stages = {stage.name: stage for stage in stages}
+    needed = _with_dependencies(stages, targets or list(stages))
+    state = _load_state(state_path)
+    state_lock = threading.Lock()
+    status = {}
+
+    def execute(stage):
+        if dry_run and any(status[dep] == "would run" for dep in stage.deps):
+            return "would run"
+        fingerprint = stage.fingerprint()
+        if not force and stage.is_fresh(state.get(stage.name), fingerprint, time.time()):
+            return "up to date"
+        if dry_run:
+            return "would run"
+        start = time.time()
+        print(f"▶ {stage.name}")
+        stage.run()
+        with state_lock:
+            state[stage.name] = {"fingerprint": fingerprint, "finished_at": time.time(),
+                                 "seconds": round(time.time() - start, 3)}
+            _save_state(state_path, state)
+        return f"ran in {time.time() - start:.1f} s"
+
+    pending = set(needed)
+    running = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while pending or running:
+            progressed = False
+            for name in sorted(pending):
+                deps = stages[name].deps
+                if any(status.get(dep, "").startswith(("failed", "blocked")) for dep in deps):
+                    status[name] = "blocked"
+                    pending.discard(name)
+                    progressed = True
+                elif all(dep in status for dep in deps):
+                    running[executor.submit(execute, stages[name])] = name
+                    pending.discard(name)
+                    progressed = True
+            if not running:
+                # Nothing in flight and nothing could start: the rest wait on each other
+                if pending and not progressed:
+                    raise RuntimeError(f"stage(s) can never start, check their deps for a cycle: "
+                                       f"{', '.join(sorted(pending))}")
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    status[name] = future.result()
+                except Exception as e:
+                    status[name] = f"failed: {e}"
+                    print(f"❌ {name} failed: {e}")
+    return status
+
+
+def _write_json(path, payload):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(payload, file)
+    os.replace(tmp_path, path)
+
+
+def build_stages(workdir=".", leagues=DEFAULT_LEAGUES, start_date=None, end_date=None,
+                 max_workers=1, requests_per_second=None):
+    """The pipeline: fetch board -> clean props per league; scan games -> ingest box scores -> features."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    end_date = end_date or (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    start_date = start_date or end_date
+
+    game_ids_path = os.path.join(workdir, "game_ids.json")
+    catalog_path = os.path.join(workdir, "game_catalog.sqlite")
+    store_root = os.path.join(workdir, "nba_stats")
+    player_store_path = os.path.join(store_root, "player_stats")
+    features_path = os.path.join(workdir, "player_features.parquet")
+
+    stages = []
+    for league in leagues:
+        board_path = os.path.join(workdir, f"{league}_Prize_picks.csv")
+        props_path = os.path.join(workdir, f"{league}_PrizeProps.csv")
+
+        def fetch_board(league=league, board_path=board_path):
+            from gitscrap import fetch_projections, LEAGUE_IDS
+            board = fetch_projections(LEAGUE_IDS[league])
+            if board is None:
+                raise RuntimeError(f"{league} board fetch failed")
+            board.to_csv(f"{board_path}.tmp")
+            os.replace(f"{board_path}.tmp", board_path)
+
+        def clean_board(board_path=board_path, props_path=props_path):
+            from props_cleaning import extract_columns_from_csv
+            extract_columns_from_csv(board_path, props_path)
+
+        stages.append(Stage(f"board:{league}", fetch_board, outputs=[board_path],
+                            params={"league": league}, max_age=BOARD_MAX_AGE))
+        stages.append(Stage(f"props:{league}", clean_board, deps=[f"board:{league}"],
+                            inputs=[board_path], outputs=[props_path]))
+
+    def scan_games():
+        from dataCollection import get_games, open_catalog
+        catalog = open_catalog(catalog_path)
+        try:
+            game_ids = get_games(start_date, end_date, catalog=catalog)
+            # get_games reports failed dates and moves on; past dates left unscanned mean the
+            # list is incomplete, so fail the stage and let the next run rescan them
+            missed = [date for date in catalog.unscanned_dates(start_date, end_date) if date < today]
+        finally:
+            catalog.close()
+        if missed:
+            raise RuntimeError(f"{len(missed)} date(s) could not be scanned: {', '.join(missed[:5])}"
+                               f"{' ...' if len(missed) > 5 else ''}")
+        _write_json(game_ids_path, {"game_ids": sorted(game_ids)})
+
+    def ingest():
+        from box_score_ingest import ingest_box_scores
+        from raw_cache import RawResponseCache
+        from stats_store import StatsStore
+        with open(game_ids_path, "r") as file:
+            game_ids = json.load(file)["game_ids"]
+        player_store = StatsStore(store_root, "player_stats")
+        team_store = StatsStore(store_root, "team_stats")
+        ingest_box_scores(game_ids, max_workers=max_workers, requests_per_second=requests_per_second,
+                          cache=RawResponseCache(os.path.join(workdir, "raw_responses")),
+                          player_store=player_store, team_store=team_store)
+        # Failed games are not recorded as done, so the next run retries them
+        missing = [game_id for game_id in game_ids
+                   if not (player_store.has_game(game_id) and team_store.has_game(game_id))]
+        if missing:
+            raise RuntimeError(f"{len(missing)} of {len(game_ids)} games could not be ingested")
+
+    def build_features():
+        from features import RollingFeatureEngine
+        from stats_store import StatsStore
+        features = RollingFeatureEngine().rebuild(StatsStore(store_root, "player_stats").load())
+        features.to_parquet(f"{features_path}.tmp", index=False)
+        os.replace(f"{features_path}.tmp", features_path)
+
+    stages.append(Stage("games", scan_games, outputs=[game_ids_path],
+                        params={"start": start_date, "end": end_date},
+                        max_age=OPEN_SCAN_MAX_AGE if end_date >= today else None))
+    stages.append(Stage("box_scores", ingest, deps=["games"], inputs=[game_ids_path],
+                        outputs=[player_store_path]))
+    stages.append(Stage("features", build_features, deps=["box_scores"], inputs=[player_store_path],
+                        outputs=[features_path]))
+    return stages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the props and box score pipeline, skipping stages whose inputs haven't changed.")
+    parser.add_argument("targets", nargs="*",
+                        help="stages to bring up to date (with their dependencies); default: all. "
+                             "Names: board:<LEAGUE>, props:<LEAGUE>, games, box_scores, features")
+    parser.add_argument("--workdir", default=".")
+    parser.add_argument("--leagues", nargs="+", default=list(DEFAULT_LEAGUES))
+    parser.add_argument("--start", help="first game date to scan (YYYY-MM-DD); default: --end")
+    parser.add_argument("--end", help="last game date to scan (YYYY-MM-DD); default: yesterday")
+    parser.add_argument("--jobs", type=int, default=2, help="stages run in parallel")
+    parser.add_argument("--max-workers", type=int, default=1, help="concurrent box score fetches")
+    parser.add_argument("--requests-per-second", type=float)
+    parser.add_argument("--force", action="store_true", help="run every selected stage even if up to date")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would run")
+    parser.add_argument("--trace", help="record an instrumentation trace to this JSON-lines file")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        import instrumentation
+        instrumentation.enable(args.trace, report_at_exit=True)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    stages = build_stages(args.workdir, args.leagues, args.start, args.end,
+                          args.max_workers, args.requests_per_second)
+    names = {stage.name for stage in stages}
+    unknown = [target for target in args.targets if target not in names]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    status = run_pipeline(stages, args.targets, args.jobs, args.force, args.dry_run,
+                          os.path.join(args.workdir, STATE_FILE))
+    for stage in stages:
+        if stage.name in status:
+            print(f"{stage.name}: {status[stage.name]}")
+    return 1 if any(result.startswith("failed") for result in status.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import os
+import re
+import json
+import difflib
+import unicodedata
+
+import pandas as pd
+from nba_api.stats.static import teams as static_teams
+
+from stats_store import StatsStore, STORE_DIR, format_game_id, game_order
+
+INDEX_DIR = "player_index"
+
+# Team ID -> tricode, from nba_api's bundled static data (no network call)
+TEAM_TRICODES = {team["id"]: team["abbreviation"] for team in static_teams.get_teams()}
+
+NAME_SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "v"}
+
+# Names PrizePicks and the box scores spell differently, keyed by normalized name
+NICKNAMES = {
+    "herb jones": "herbert jones",
+    "moe wagner": "moritz wagner",
+    "kj martin": "kenyon martin",
+    "gg jackson": "gregory jackson",
+    "bub carrington": "carlton carrington",
+}
+
+FUZZY_CUTOFF = 0.85
+
+
+def normalize_name(name):
+    """Lower-case, accent-free, punctuation-free name without Jr./III style suffixes."""
+    if not isinstance(name, str):
+        return ""
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").lower()
+    name = re.sub(r"[.'`]", "", name)
+    name = re.sub(r"[^a-z0-9]+", " ", name)
+    words = [word for word in name.split() if word not in NAME_SUFFIXES]
+    key = " ".join(words)
+    return NICKNAMES.get(key, key)
+
+
+class PlayerIndex:
+    """Persistent name -> PLAYER_ID index built from the stored player box scores.
+
+    Names are normalized once when players are added, so resolving a board is a
+    dict lookup per unique (name, team) pair. Misses fall back to fuzzy matching,
+    first against the prop's team roster and then against every player.
+    """
+
+    def __init__(self, root=INDEX_DIR):
+        self.root = root
+        self.players = pd.DataFrame(columns=["PLAYER_ID", "FIRST_NAME", "LAST_NAME", "NAME_KEY", "TEAM", "GAME_ID"])
+        self.indexed_game_ids = set()
+        self._by_key = {}
+        self._by_team = {}
+        if os.path.exists(self._players_path()):
+            self._load()
+
+    def _players_path(self):
+        return os.path.join(self.root, "players.parquet")
+
+    def _games_path(self):
+        return os.path.join(self.root, "indexed_games.json")
+
+    def _load(self):
+        self.players = pd.read_parquet(self._players_path())
+        with open(self._games_path(), "r") as file:
+            self.indexed_game_ids = set(json.load(file))
+        self._build_lookups()
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        self.players.to_parquet(self._players_path(), index=False)
+        with open(self._games_path(), "w") as file:
+            json.dump(sorted(self.indexed_game_ids), file)
+
+    def _build_lookups(self):
+        self._by_key = {}
+        self._by_team = {}
+        for player_id, key, team in zip(self.players["PLAYER_ID"], self.players["NAME_KEY"], self.players["TEAM"]):
+            self._by_key.setdefault(key, []).append((int(player_id), team))
+            self._by_team.setdefault(team, {})[key] = int(player_id)
+
+    def add_box_scores(self, box_scores):
+        """Add or update players from player box score rows (GAME_ID, PLAYER_ID, FIRST_NAME, LAST_NAME, TEAM_ID)."""
+        if box_scores.empty:
+            return 0
+        rows = box_scores[["GAME_ID", "PLAYER_ID", "FIRST_NAME", "LAST_NAME", "TEAM_ID"]].copy()
+        rows["GAME_ID"] = rows["GAME_ID"].map(format_game_id)
+        rows["TEAM"] = rows["TEAM_ID"].map(TEAM_TRICODES)
+        rows["FIRST_NAME"] = rows["FIRST_NAME"].astype("string")
+        rows["LAST_NAME"] = rows["LAST_NAME"].astype("string")
+        rows["NAME_KEY"] = (rows["FIRST_NAME"].fillna("") + " " + rows["LAST_NAME"].fillna("")).map(normalize_name)
+
+        # A player's latest game decides the team used for disambiguation; raw IDs don't
+        # sort across seasons (2023 playoffs > 2024-25 regular season), game_order does
+        merged = pd.concat([self.players, rows[self.players.columns]], ignore_index=True)
+        merged["_ORDER"] = game_order(merged["GAME_ID"].astype(int).to_numpy())
+        merged = merged.sort_values(["PLAYER_ID", "_ORDER"], kind="stable").drop_duplicates("PLAYER_ID", keep="last")
+        merged = merged.drop(columns="_ORDER")
+        added = len(merged) - len(self.players)
+
+        self.players = merged.reset_index(drop=True)
+        self.indexed_game_ids.update(rows["GAME_ID"].unique())
+        self._build_lookups()
+        return added
+
+    def update_from_store(self, store=None):
+        """Index only the stored games not seen before, then save. Returns the number of new players."""
+        if store is None:
+            store = StatsStore(STORE_DIR, "player_stats")
+        new_game_ids = [game_id for game_id in store.stored_game_ids() if game_id not in self.indexed_game_ids]
+        if not new_game_ids:
+            return 0
+        box_scores = store.load(games=new_game_ids, columns=["GAME_ID", "PLAYER_ID", "FIRST_NAME", "LAST_NAME", "TEAM_ID"])
+        added = self.add_box_scores(box_scores)
+        self.save()
+        return added
+
+    def lookup(self, name, team=None):
+        """PLAYER_ID for one name (and optional team tricode), or None."""
+        key = normalize_name(name)
+        candidates = self._by_key.get(key)
+        if candidates:
+            if len(candidates) == 1 or team is None:
+                return candidates[0][0]
+            for player_id, player_team in candidates:
+                if player_team == team:
+                    return player_id
+            return candidates[0][0]
+
+        # Fuzzy: the team roster first (small and usually right), then everyone
+        if team in self._by_team:
+            roster = self._by_team[team]
+            match = difflib.get_close_matches(key, list(roster), n=1, cutoff=FUZZY_CUTOFF)
+            if match:
+                return roster[match[0]]
+        match = difflib.get_close_matches(key, list(self._by_key), n=1, cutoff=FUZZY_CUTOFF)
+        if match:
+            return self._by_key[match[0]][0][0]
+        return None
+
+    def resolve(self, names, teams=None):
+        """Vector of PLAYER_IDs (nullable Int64) for names, optionally with team tricodes."""
+        names = pd.Series(names).astype("string").reset_index(drop=True)
+        teams = pd.Series([None] * len(names) if teams is None else teams).astype("string").reset_index(drop=True)
+
+        # Each distinct (name, team) pair is resolved once
+        pairs = pd.DataFrame({"name": names, "team": teams})
+        unique_pairs = pairs.drop_duplicates()
+        resolved = {
+            (name, team): self.lookup(name, None if pd.isna(team) else team)
+            for name, team in zip(unique_pairs["name"], unique_pairs["team"])
+        }
+        return pd.Series(
+            [resolved[(name, team)] for name, team in zip(pairs["name"], pairs["team"])], dtype="Int64"
+        )
+
+    def resolve_props(self, legs):
+        """Add PLAYER_ID to expand_combo_props legs, using each leg's team to break ties."""
+        legs = legs.copy()
+        legs["PLAYER_ID"] = self.resolve(legs["PlayerName"], legs["Team"]).to_numpy()
+        return legs
@@ -1,32 +1,100 @@
-import csv
 import pandas as pd
 
+# Raw call_endpoint column -> cleaned props column
+PROP_COLUMNS = {
+    'id': 'ProjectionId',
+    'attributes.league': 'League',
+    'attributes.name': 'PlayerName',
+    'attributes.team': 'Team',
+    'attributes.stat_display_name': 'Stat',
+    'attributes.line_score': 'PropLine',
+    'attributes.odds_type': 'Type',
+    'attributes.combo': 'Combo',
+    'attributes.description': 'Description',  # the opponent, e.g. POR (PHX/POR for combos)
+    'attributes.start_time': 'StartTime',
+}
+
+# The five columns the CSV export has always had
+EXPORT_COLUMNS = ['League', 'PlayerName', 'Stat', 'PropLine', 'Type']
+
+COMBO_PLAYER_SEPARATOR = ' + '
+COMBO_TEAM_SEPARATOR = '/'
+
+
+def read_board(path):
+    """Read a saved board from Parquet or CSV, loading only the columns cleaning needs."""
+    if path.endswith('.parquet'):
+        board = pd.read_parquet(path)
+        return board[[column for column in PROP_COLUMNS if column in board.columns]]
+    return pd.read_csv(path, usecols=lambda column: column in PROP_COLUMNS)
+
+
+def clean_props(board):
+    """Turn a raw call_endpoint frame into one typed row per projection.
+
+    League, Stat and Type are categoricals and PropLine is float32. Stat names
+    have their whitespace normalized (the API sometimes sends tabs). StartTime
+    is a UTC timestamp.
+    """
+    props = pd.DataFrame({new: board[old] if old in board else None for old, new in PROP_COLUMNS.items()})
+
+    props['ProjectionId'] = pd.to_numeric(props['ProjectionId'], errors='coerce').astype('Int64')
+    props['PropLine'] = pd.to_numeric(props['PropLine'], errors='coerce').astype('float32')
+    props['Stat'] = props['Stat'].astype('string').str.replace(r'\s+', ' ', regex=True).str.strip()
+    props['PlayerName'] = props['PlayerName'].astype('string')
+    props['Team'] = props['Team'].astype('string')
+    props['Description'] = props['Description'].astype('string')
+    props['StartTime'] = pd.to_datetime(props['StartTime'], utc=True, errors='coerce')
+    props['Combo'] = props['Combo'].fillna(False).astype(bool) | \
+        props['PlayerName'].str.contains(COMBO_PLAYER_SEPARATOR, regex=False).fillna(False).astype(bool)
+    for column in ['League', 'Stat', 'Type']:
+        props[column] = props[column].astype('category')
+    return props.reset_index(drop=True)
+
+
+def expand_combo_props(props):
+    """One row per leg: combo projections split into their players and teams.
+
+    Single-player projections come through as a single leg (Leg 0). Legs keep the
+    parent's ProjectionId so they can be joined back to the projection.
+    """
+    legs = props[['ProjectionId', 'PlayerName', 'Team', 'Description']].copy()
+    legs['PlayerName'] = legs['PlayerName'].str.split(COMBO_PLAYER_SEPARATOR, regex=False)
+    player_counts = legs['PlayerName'].str.len()
+    legs['Team'] = _split_per_leg(legs['Team'], player_counts)
+    legs['Opponent'] = _split_per_leg(legs.pop('Description'), player_counts)
+
+    legs = legs.explode(['PlayerName', 'Team', 'Opponent'])
+    legs['Leg'] = legs.groupby(level=0).cumcount().astype('int8')
+    legs['PlayerName'] = legs['PlayerName'].astype('string').str.strip()
+    legs['Team'] = legs['Team'].astype('category')
+    legs['Opponent'] = legs['Opponent'].astype('category')
+    legs['LegCount'] = player_counts.reindex(legs.index).astype('int8')
+
+    legs = legs.join(props[['League', 'Stat', 'PropLine', 'Type', 'StartTime']])
+    return legs[['ProjectionId', 'Leg', 'LegCount', 'PlayerName', 'Team', 'Opponent', 'League', 'Stat', 'PropLine',
+                 'Type', 'StartTime']].reset_index(drop=True)
+
+
+def _split_per_leg(values, player_counts):
+    # 'PHX/POR' -> one entry per leg; when the list doesn't line up with the players
+    # (e.g. both legs on one team) the first entry is repeated
+    values = values.str.split(COMBO_TEAM_SEPARATOR, regex=False)
+    mismatched = (values.str.len() != player_counts).to_numpy()
+    if mismatched.any():
+        values.loc[mismatched] = pd.Series([
+            [items[0] if isinstance(items, list) else None] * count
+            for items, count in zip(values[mismatched], player_counts[mismatched])
+        ], index=values.index[mismatched], dtype=object)
+    return values
+
+
 def extract_columns_from_csv(input_filename, output_filename):
-    # Open the input CSV file to read
-    with open(input_filename, mode='r') as infile:
-        reader = csv.DictReader(infile)
-
-        # Define the output CSV headers
-        header = ['League', 'PlayerName', 'Stat', 'PropLine',
-                  'Type']
-
-        # Open the output CSV file to write
-        with open(output_filename, mode='w', newline='') as outfile:
-            writer = csv.DictWriter(outfile, fieldnames=header)
-            writer.writeheader()  # Write header to output file
-
-            # Iterate over each row in the input CSV file
-            for row in reader:
-                # Write the selected attributes to the new file
-                writer.writerow({
-                    'League': row.get('attributes.league', ''),
-                    'PlayerName': row.get('attributes.name', ''),
-                    'Stat': row.get('attributes.stat_display_name', ''),
-                    'PropLine': row.get('attributes.line_score', ''),
-                    'Type': row.get('attributes.odds_type', '')
-                })
-
-
-
-extract_columns_from_csv("UnusedCSV/NFL_Prize_picks.csv", 'UnusedCSV/NFL_PrizeProps.csv')
-extract_columns_from_csv("UnusedCSV/NBA_Prize_picks.csv", 'UnusedCSV/NBA_PrizeProps.csv')
+    # Keep the original five-column CSV export, built from the vectorized cleaner
+    props = clean_props(read_board(input_filename))
+    props[EXPORT_COLUMNS].to_csv(output_filename, index=False)
+
+
+if __name__ == "__main__":
+    extract_columns_from_csv("UnusedCSV/NFL_Prize_picks.csv", 'UnusedCSV/NFL_PrizeProps.csv')
+    extract_columns_from_csv("UnusedCSV/NBA_Prize_picks.csv", 'UnusedCSV/NBA_PrizeProps.csv')
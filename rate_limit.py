@@ -0,0 +1,129 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """Token bucket that caps how many requests per second leave this process.
+
+    One limiter is shared by every worker thread, so the budget is global no
+    matter how many requests are in flight.
+    """
+
+    def __init__(self, requests_per_second, burst=1):
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive")
+        self.rate = float(requests_per_second)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request is allowed to go out. Returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class AdaptiveRateController(RateLimiter):
+    """Token bucket whose rate follows the server's feedback (AIMD).
+
+    Until the first sign of congestion the rate doubles every second (slow
+    start); after that every success adds roughly `increase` requests/second per
+    second of traffic. A 429, a 5xx or a timeout multiplies the rate by
+    `decrease`, at most once per round trip so the requests already in flight
+    don't cut it again. A Retry-After pauses every caller until it has passed.
+    The rate only grows while callers are actually waiting on the bucket, and
+    responses slower than slow_latency hold it where it is.
+    """
+
+    def __init__(self, requests_per_second=1.0, min_rate=0.2, max_rate=20.0,
+                 increase=0.5, decrease=0.5, slow_latency=5.0):
+        super().__init__(requests_per_second, burst=1)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.increase = float(increase)
+        self.decrease = float(decrease)
+        self.slow_latency = float(slow_latency)
+        self.latency = None  # moving average, seconds
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._slow_start = True
+        self._saturated = False
+
+    def acquire(self):
+        waited = 0.0
+        while True:
+            with self._lock:
+                wait = self._paused_until - time.monotonic()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+            waited += wait
+        waited += super().acquire()
+        self._saturated = waited > 0
+        return waited
+
+    def on_success(self, latency):
+        with self._lock:
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            if latency >= self.slow_latency or not self._saturated:
+                return
+            step = 1.0 if self._slow_start else self.increase / self.rate
+            self.rate = min(self.max_rate, self.rate + step)
+
+    def on_throttle(self, retry_after=None):
+        with self._lock:
+            now = time.monotonic()
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            if now - self._last_decrease >= max(1.0 / self.rate, self.latency or 0.0):
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._last_decrease = now
+            self._slow_start = False
+
+    def on_timeout(self):
+        self.on_throttle()
+
+
+# Starting point and ceiling per host; the controller finds the real limit in between
+HOST_RATES = {
+    "stats.nba.com": {"requests_per_second": 2.0, "max_rate": 8.0},
+    "partner-api.prizepicks.com": {"requests_per_second": 1.0, "max_rate": 4.0},
+}
+DEFAULT_RATE = {"requests_per_second": 5.0, "max_rate": 200.0}
+
+_controllers = {}
+_controllers_lock = threading.Lock()
+
+
+def controller_for(host):
+    """The process-wide controller for a host, shared by every fetcher and thread."""
+    with _controllers_lock:
+        if host not in _controllers:
+            _controllers[host] = AdaptiveRateController(**HOST_RATES.get(host, DEFAULT_RATE))
+        return _controllers[host]
+
+
+def split_controller(host, processes):
+    """Replace this process's controller for a host with one holding 1/processes of its rates.
+
+    Controllers are per process, so N processes hitting one host would each
+    ramp up to the full max_rate; each takes an equal share instead.
+    """
+    controller = AdaptiveRateController(**HOST_RATES.get(host, DEFAULT_RATE))
+    controller.rate /= processes
+    controller.min_rate /= processes
+    controller.max_rate /= processes
+    with _controllers_lock:
+        _controllers[host] = controller
+    return controller
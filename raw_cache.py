@@ -0,0 +1,110 @@
+import os
+import gzip
+import hashlib
+
+from nba_api.stats.endpoints import BoxScoreAdvancedV3, BoxScoreTraditionalV3
+from nba_api.stats.library.http import NBAStatsResponse
+
+from http_client import nba_stats_get
+from instrumentation import stage
+
+RAW_CACHE_DIR = "raw_responses"
+
+# Endpoint classes in the order a game's box scores are fetched
+BOX_SCORE_ENDPOINTS = [BoxScoreAdvancedV3, BoxScoreTraditionalV3]
+
+
+class RawResponseCache:
+    """Content-addressed store of raw API response bodies.
+
+    Bodies are gzipped under objects/<sha256[:2]>/<sha256>.json.gz and looked up
+    through refs/<endpoint>/<key>, which holds the digest. Identical bodies are
+    stored once, and anything derived from a response can be rebuilt from here
+    without touching the network.
+    """
+
+    def __init__(self, root=RAW_CACHE_DIR):
+        self.root = root
+
+    def _ref_path(self, endpoint, key):
+        return os.path.join(self.root, "refs", endpoint.lower(), str(key))
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.json.gz")
+
+    def has(self, endpoint, key):
+        return os.path.exists(self._ref_path(endpoint, key))
+
+    def keys(self, endpoint):
+        ref_dir = os.path.join(self.root, "refs", endpoint.lower())
+        if not os.path.isdir(ref_dir):
+            return []
+        return sorted(name for name in os.listdir(ref_dir) if not name.endswith(".tmp"))
+
+    def get(self, endpoint, key):
+        """Return the cached body for (endpoint, key), or None if it was never stored."""
+        ref_path = self._ref_path(endpoint, key)
+        if not os.path.exists(ref_path):
+            return None
+        with open(ref_path, "r") as file:
+            digest = file.read().strip()
+        with gzip.open(self._object_path(digest), "rt", encoding="utf-8") as file:
+            return file.read()
+
+    def put(self, endpoint, key, body):
+        """Store a response body and point (endpoint, key) at it. Returns the digest."""
+        digest = hashlib.sha256(body.encode("utf-8")).hexdigest()
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            _atomic_write(object_path, gzip.compress(body.encode("utf-8")))
+
+        ref_path = self._ref_path(endpoint, key)
+        os.makedirs(os.path.dirname(ref_path), exist_ok=True)
+        _atomic_write(ref_path, digest.encode("ascii"))
+        return digest
+
+
+def _atomic_write(path, payload):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(payload)
+    os.replace(tmp_path, path)
+
+
+def fetch_raw_response(endpoint_class, game_id, headers, cache, limiter=None, timeout=30):
+    """Return the raw body for one box score endpoint, downloading it only if it isn't cached."""
+    endpoint = endpoint_class(game_id, headers=headers, timeout=timeout, get_request=False)
+    body = cache.get(endpoint.endpoint, game_id)
+    if body is not None:
+        return body
+
+    # Paced and retried by the shared stats.nba.com controller; limiter is an optional extra cap
+    response = nba_stats_get(endpoint.endpoint, endpoint.parameters, headers, timeout, limiter=limiter)
+    if response is None or not response.valid_json():
+        raise ValueError(f"Invalid {endpoint.endpoint} response for game {game_id}")
+
+    body = response.get_response()
+    with stage("raw_cache.write"):
+        cache.put(endpoint.endpoint, game_id, body)
+    return body
+
+
+def parse_box_score(endpoint_class, body):
+    """Parse a raw box score body into nba_api's {'PlayerStats': ..., 'TeamStats': ...} data sets."""
+    with stage("box_score.parse"):
+        return NBAStatsResponse(response=body, status_code=200, url=None).get_data_sets(endpoint_class.endpoint)
+
+
+def fetch_box_scores(game_id, headers, cache=None, limiter=None, timeout=30):
+    """Fetch (or read from cache) both box score endpoints for a game.
+
+    Returns (advanced_data_sets, traditional_data_sets); each maps 'PlayerStats'
+    and 'TeamStats' to the {'headers': ..., 'data': ...} dicts nba_api exposes.
+    """
+    if cache is None:
+        cache = RawResponseCache()
+    return tuple(
+        parse_box_score(endpoint_class, fetch_raw_response(endpoint_class, game_id, headers, cache, limiter, timeout))
+        for endpoint_class in BOX_SCORE_ENDPOINTS
+    )
@@ -0,0 +1,129 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Rate, percentage and rating columns shared by the player and team box scores
+RATE_COLUMNS = [
+    'estimatedOffensiveRating', 'offensiveRating', 'estimatedDefensiveRating', 'defensiveRating',
+    'estimatedNetRating', 'netRating', 'assistPercentage', 'assistToTurnover', 'assistRatio',
+    'offensiveReboundPercentage', 'defensiveReboundPercentage', 'reboundPercentage', 'turnoverRatio',
+    'effectiveFieldGoalPercentage', 'trueShootingPercentage', 'usagePercentage', 'estimatedUsagePercentage',
+    'estimatedPace', 'pace', 'pacePer40', 'possessions', 'PIE',
+]
+
+# Traditional box score columns, after the rename in combine_player_stats / combine_team_stats
+TRADITIONAL_COLUMNS = [
+    'FGM', 'FGA', 'FG%', '3PM', '3PA', '3P%', 'FTM', 'FTA', 'FT%', 'OREB', 'DREB', 'TREB',
+    'AST', 'STL', 'BLK', 'TO', 'PTS', '+/-',
+]
+
+# Counting stats are float32 too: exact for box score sized integers, and a missing
+# traditional row stays NaN instead of failing an integer cast
+PLAYER_STATS_SCHEMA = {
+    'GAME_ID': 'int32',
+    'TEAM_ID': 'int32',
+    'TEAM_CITY': 'category',
+    'TEAM_NAME': 'category',
+    'PLAYER_ID': 'int32',
+    'FIRST_NAME': 'category',
+    'LAST_NAME': 'category',
+    'MINUTES': 'float32',  # decimal minutes: "18:13" -> 18.2167, DNP -> 0
+    **{column: 'float32' for column in TRADITIONAL_COLUMNS + RATE_COLUMNS},
+}
+
+# TeamData.combine_team_stats keeps the raw V3 names for its key columns
+TEAM_STATS_SCHEMA = {
+    'gameId': 'int32',
+    'teamId': 'int32',
+    'teamCity_advanced': 'category',
+    'teamName_advanced': 'category',
+    **{column: 'float32' for column in TRADITIONAL_COLUMNS + RATE_COLUMNS},
+}
+
+# StatsStore table name -> schema
+TABLE_SCHEMAS = {
+    'player_stats': PLAYER_STATS_SCHEMA,
+    'team_stats': TEAM_STATS_SCHEMA,
+}
+
+MINUTES_COLUMNS = {'MINUTES', 'MIN'}
+
+
+def minutes_to_float(minutes):
+    """'18:13' style minutes (or numbers) -> float minutes; blanks become 0."""
+    if pd.api.types.is_numeric_dtype(minutes):
+        return minutes.astype('float64').fillna(0.0)
+    # A season has only a few thousand distinct minute strings, so parse each one once
+    codes, uniques = pd.factorize(minutes)
+    parts = pd.Series(uniques, dtype='string').str.split(':', n=1, expand=True)
+    whole = pd.to_numeric(parts[0], errors='coerce').fillna(0.0)
+    seconds = pd.to_numeric(parts[1], errors='coerce').fillna(0.0) if parts.shape[1] > 1 else 0.0
+    parsed = np.append((whole + seconds / 60.0).to_numpy(dtype='float64'), 0.0)  # code -1 (missing) -> 0
+    return pd.Series(parsed[codes], index=minutes.index, name=minutes.name)
+
+
+def apply_schema(df, schema):
+    """Cast a box score frame to a declared schema. Columns the schema doesn't name are left alone.
+
+    Safe to call on a frame that is already typed (each cast is then a no-op).
+    """
+    df = df.copy()
+    for column, dtype in schema.items():
+        if column not in df:
+            continue
+        values = df[column]
+        if str(values.dtype) == dtype:
+            continue
+        if column in MINUTES_COLUMNS:
+            df[column] = minutes_to_float(values).astype(dtype)
+        elif dtype == 'category':
+            df[column] = values.astype('string').astype('category')
+        else:
+            # Zero-padded IDs ("0022400700") and numeric strings parse the same way
+            df[column] = pd.to_numeric(values, errors='coerce').astype(dtype)
+    return df
+
+
+def read_stats_csv(path, table='player_stats'):
+    """Load a CSV export (e.g. NBA2024restseason.csv) directly into the table's schema."""
+    schema = TABLE_SCHEMAS[table]
+    # The parser reads every column straight into its schema dtype ("0022400700" parses as 22400700);
+    # only "18:13" minutes need a second step
+    dtypes = {column: 'string' if column in MINUTES_COLUMNS else dtype for column, dtype in schema.items()}
+    df = pd.read_csv(path, index_col=False, dtype=dtypes)
+    return apply_schema(df.drop(columns=[column for column in df if column.startswith('Unnamed')]), schema)
+
+
+def _memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def _benchmark(csv_path, store_root):
+    from stats_store import StatsStore
+
+    # The current path: the CSV export of fetch_combined_stats read back with default dtypes
+    start = time.perf_counter()
+    plain = pd.read_csv(csv_path, dtype={'GAME_ID': str})
+    plain_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    typed = read_stats_csv(csv_path)
+    typed_seconds = time.perf_counter() - start
+
+    print(f"{csv_path}: {len(plain)} rows, {len(plain.columns)} columns")
+    print(f"read_csv (default dtypes): {plain_seconds * 1000:.1f} ms, {_memory_mb(plain):.2f} MB")
+    print(f"read_stats_csv (schema):   {typed_seconds * 1000:.1f} ms, {_memory_mb(typed):.2f} MB")
+
+    store = StatsStore(store_root, 'player_stats')
+    if store.seasons():
+        start = time.perf_counter()
+        stored = store.load()
+        store_seconds = time.perf_counter() - start
+        print(f"StatsStore.load ({len(stored)} rows): {store_seconds * 1000:.1f} ms, {_memory_mb(stored):.2f} MB")
+
+
+if __name__ == "__main__":
+    _benchmark(sys.argv[1] if len(sys.argv) > 1 else 'UnusedCSV/NBA_stats_2025-02-03.csv',
+               sys.argv[2] if len(sys.argv) > 2 else 'nba_stats')
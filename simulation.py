@@ -0,0 +1,530 @@
+import sys
+import time
+import argparse
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtest import STAT_MAP, base_stat, stat_values
+from schema import minutes_to_float
+from stats_store import game_order
+
+# A player's outcome distribution is their last this many played games...
+SIM_GAMES = 40
+# ...and a (player, stat) with fewer than this many is not simulated
+MIN_GAMES = 5
+
+# Two players' correlation is only used once they have played this many games together,
+# and is shrunk toward zero by shared / (shared + CORRELATION_SHRINKAGE) games
+MIN_SHARED_GAMES = 8
+CORRELATION_SHRINKAGE = 10
+
+DRAWS = 100000
+# Draws are generated and reduced this many at a time, which bounds memory
+CHUNK_DRAWS = 20000
+# Slips are counted in blocks of SLIP_BLOCK slips x WORD_BLOCK words (64 draws each)
+SLIP_BLOCK = 256
+WORD_BLOCK = 256
+
+# Draws are ranked through a lookup table over [-RANK_RANGE, RANK_RANGE) with this many bins per
+# unit: narrower than the gap between any two cut points for samples of up to ~1000 games
+RANK_RANGE = 6.0
+RANK_BINS_PER_UNIT = 512
+
+MAX_LEGS = 6
+
+# Payout multiple by legs -> legs hit. Power plays need every leg; flex plays pay partial hits.
+# These are PrizePicks' standard multipliers at the time of writing; they change, so pass your own.
+POWER_PAYOUTS = {2: {2: 3.0}, 3: {3: 5.0}, 4: {4: 10.0}, 5: {5: 20.0}, 6: {6: 37.5}}
+FLEX_PAYOUTS = {
+    3: {3: 2.25, 2: 1.25},
+    4: {4: 5.0, 3: 1.5},
+    5: {5: 10.0, 4: 2.0, 3: 0.4},
+    6: {6: 25.0, 5: 2.0, 4: 0.4},
+}
+PAYOUTS = {'power': POWER_PAYOUTS, 'flex': FLEX_PAYOUTS}
+
+SIDES = ('over', 'under')
+
+# Board search: the best single picks that seed it, and how many slips are extended per size
+CANDIDATE_PICKS = 40
+BEAM_WIDTH = 200
+
+
+def payout_matrix(payouts):
+    """PAYOUTS table -> (MAX_LEGS + 1, MAX_LEGS + 1) array indexed [legs, hits]; NaN rows for unpaid slip sizes."""
+    matrix = np.full((MAX_LEGS + 1, MAX_LEGS + 1), np.nan)
+    for legs, table in payouts.items():
+        matrix[legs] = 0.0
+        for hits, multiple in table.items():
+            matrix[legs, hits] = multiple
+    return matrix
+
+
+def _game_keys(legs):
+    # Legs in the same game share a key: both teams and the start time. Without a
+    # team the leg is its own group, so it is simulated independently.
+    keys = []
+    for i, (team, opponent, start) in enumerate(zip(legs['Team'], legs['Opponent'], legs['StartTime'])):
+        teams = sorted(str(value) for value in (team, opponent) if not pd.isna(value))
+        keys.append(f"{'/'.join(teams)}@{start}" if teams else f"#{i}")
+    return keys
+
+
+def _nearest_correlation(matrix):
+    # Pairwise estimates needn't form a valid correlation matrix; clip negative eigenvalues
+    values, vectors = np.linalg.eigh(matrix)
+    if values.min() > 1e-8:
+        return matrix
+    fixed = (vectors * np.maximum(values, 1e-6)) @ vectors.T
+    scale = 1.0 / np.sqrt(np.diag(fixed))
+    return fixed * scale[:, None] * scale[None, :]
+
+
+def pack_hits(hits):
+    """(picks, draws) boolean hits -> (picks + 1, words) uint64, 64 draws per word, with an all-zero padding row."""
+    packed = np.packbits(hits, axis=1, bitorder='little')
+    words = np.zeros((len(hits) + 1, -(-packed.shape[1] // 8) * 8), dtype=np.uint8)
+    words[:-1, :packed.shape[1]] = packed
+    return words.view(np.uint64)
+
+
+def _popcount(words):
+    # Set bits per word; NumPy < 2.0 has no bitwise_count, so count a byte at a time
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    return _BYTE_BITS[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1)
+
+
+_BYTE_BITS = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint8)
+
+
+def count_hits(packed, slips, draws):
+    """Number of draws in which each slip hits exactly 0..MAX_LEGS of its legs.
+
+    packed is pack_hits output for draws draws; slips is (n, MAX_LEGS) rows into
+    it, padded with -1 (the all-zero row). The count of legs hit is kept as three
+    bit planes, so every operation handles 64 draws at once.
+    Returns an (n, MAX_LEGS + 1) int64 array.
+    """
+    frequencies = np.zeros((len(slips), MAX_LEGS + 1), dtype=np.int64)
+    words = packed.shape[1]
+    for start in range(0, len(slips), SLIP_BLOCK):
+        block = slips[start:start + SLIP_BLOCK]
+        for word_start in range(0, words, WORD_BLOCK):
+            columns = slice(word_start, min(word_start + WORD_BLOCK, words))
+            # Add each leg into the (ones, twos, fours) planes
+            ones = packed[block[:, 0], columns]
+            twos = np.zeros_like(ones)
+            fours = np.zeros_like(ones)
+            for j in range(1, block.shape[1]):
+                leg = packed[block[:, j], columns]
+                carry = ones & leg
+                ones ^= leg
+                fours |= twos & carry
+                twos ^= carry
+            for hits in range(1, MAX_LEGS + 1):
+                mask = ones if hits & 1 else ~ones
+                mask = mask & (twos if hits & 2 else ~twos)
+                mask &= fours if hits & 4 else ~fours
+                frequencies[start:start + len(block), hits] += _popcount(mask).sum(axis=1, dtype=np.int64)
+    # Padding bits past the last draw hit nothing, so zero hits is whatever is left
+    frequencies[:, 0] = draws - frequencies[:, 1:].sum(axis=1)
+    return frequencies
+
+
+class SlipSimulator:
+    """Monte Carlo outcomes for every projection on a board, with same-game correlation.
+
+    Each (player, stat) on the board is drawn from the player's last SIM_GAMES
+    played games through a Gaussian copula: correlated normals are mapped onto
+    the empirical quantiles of the player's history, so every draw is a value
+    the player has actually put up. Correlations are rank correlations over the
+    games two players (or one player's two stats) have in common, estimated for
+    players in the same board game; different games are independent.
+
+    Draws are generated chunk by chunk from (seed, chunk number), so the same
+    seed gives the same draws in any process, and are never held in full.
+    """
+
+    def __init__(self, legs, history, draws=DRAWS, seed=None, sim_games=SIM_GAMES, chunk_draws=CHUNK_DRAWS):
+        # legs is expand_combo_props output with PLAYER_ID attached (PlayerIndex.resolve_props)
+        self.draws = draws
+        self.chunk_draws = chunk_draws
+        self.seed = np.random.SeedSequence(seed).entropy
+        legs = legs.reset_index(drop=True)
+        legs = legs.assign(BaseStat=base_stat(legs['Stat']).to_numpy(), GameKey=_game_keys(legs))
+        games = self._build_variables(legs, history, sim_games)
+        self._build_correlations(games)
+        self._build_projections(legs)
+        self._probabilities = None
+
+    def _build_variables(self, legs, history, sim_games):
+        usable = legs[legs['PLAYER_ID'].notna().to_numpy() & legs['BaseStat'].isin(list(STAT_MAP)).to_numpy()]
+        variables = usable[['PLAYER_ID', 'BaseStat', 'GameKey']].astype({'PLAYER_ID': 'int64'}) \
+            .drop_duplicates(['PLAYER_ID', 'BaseStat']).reset_index(drop=True)
+
+        # Each board player's last sim_games played games
+        history = history[history['PLAYER_ID'].isin(variables['PLAYER_ID'].unique()).to_numpy()]
+        history = history[minutes_to_float(history['MINUTES'] if 'MINUTES' in history else history['MIN']).to_numpy() > 0]
+        if 'GAME_DATE' in history:
+            order = pd.to_datetime(history['GAME_DATE']).to_numpy(dtype='datetime64[ns]').astype('int64')
+        else:
+            order = game_order(pd.to_numeric(history['GAME_ID']).to_numpy(dtype='int64'))
+        recent = pd.DataFrame({
+            'PLAYER_ID': history['PLAYER_ID'].to_numpy(dtype='int64'),
+            'GAME_ID': pd.to_numeric(history['GAME_ID']).to_numpy(dtype='int64'),
+            'Order': order,
+            'Row': np.arange(len(history)),
+        }).sort_values(['PLAYER_ID', 'Order'], kind='stable')
+        recent = recent[recent.groupby('PLAYER_ID').cumcount(ascending=False).to_numpy() < sim_games]
+
+        # One row per (variable, game) with the variable's stat value in that game
+        stats = sorted(variables['BaseStat'].unique())
+        values = stat_values(history, stats)
+        games = variables.assign(Var=np.arange(len(variables))).merge(recent, on='PLAYER_ID')
+        games['Value'] = values[games['Row'].to_numpy(), games['BaseStat'].map({s: j for j, s in enumerate(stats)}).to_numpy(dtype='int64')]
+        games = games.dropna(subset=['Value'])
+
+        # Too little history to sample from: leave the variable out
+        counts = games.groupby('Var').size().reindex(range(len(variables)), fill_value=0).to_numpy()
+        keep = np.flatnonzero(counts >= MIN_GAMES)
+        self.variables = variables.iloc[keep].reset_index(drop=True)
+        games = games[games['Var'].isin(keep)]
+        games['Var'] = np.searchsorted(keep, games['Var'].to_numpy())
+        counts = counts[keep]
+
+        # Each variable's sorted sample; row n_variables stays zero and pads combo legs
+        samples = np.full((len(keep) + 1, sim_games), np.nan, dtype=np.float32)
+        samples[games['Var'].to_numpy(), games.groupby('Var').cumcount().to_numpy()] = games['Value'].to_numpy()
+        samples.sort(axis=1)
+        samples[len(keep)] = 0.0
+        self.samples = samples
+
+        # Normal cut points splitting N(0, 1) into count equally likely ranks, per sample size,
+        # with a bin -> rank table so ranking a draw is a lookup instead of a binary search
+        self.quantiles = []
+        edges = np.arange(-RANK_RANGE, RANK_RANGE, 1.0 / RANK_BINS_PER_UNIT, dtype=np.float32)
+        for count in np.unique(counts):
+            cuts = np.array([NormalDist().inv_cdf(k / count) for k in range(1, count)] + [np.inf], dtype=np.float32)
+            self.quantiles.append((np.flatnonzero(counts == count), cuts, np.searchsorted(cuts, edges).astype(np.int32)))
+        return games
+
+    def _build_correlations(self, games):
+        # Cholesky factors of each board game's correlation matrix, over that game's variables
+        self.blocks = []
+        for _, group in self.variables.groupby('GameKey', sort=False):
+            columns = group.index.to_numpy()
+            if len(columns) < 2:
+                continue
+            wide = games[games['Var'].isin(columns)].pivot(index='GAME_ID', columns='Var', values='Value')[columns]
+            rank = wide.corr(method='spearman', min_periods=MIN_SHARED_GAMES).to_numpy()
+            played = wide.notna().to_numpy(dtype='float64')
+            shared = played.T @ played
+            # Spearman -> Pearson for the normal copula, then shrink pairs of different players
+            correlation = 2.0 * np.sin(np.pi / 6.0 * rank)
+            players = group['PLAYER_ID'].to_numpy()
+            same_player = players[:, None] == players[None, :]
+            correlation = np.where(same_player, correlation, correlation * shared / (shared + CORRELATION_SHRINKAGE))
+            correlation = np.nan_to_num(correlation)
+            np.fill_diagonal(correlation, 1.0)
+            if not np.any(correlation - np.eye(len(columns))):
+                continue
+            factor = np.linalg.cholesky(_nearest_correlation(correlation))
+            self.blocks.append((columns, factor.astype(np.float32)))
+
+    def _build_projections(self, legs):
+        pad = len(self.variables)
+        variable_index = {(player, stat): i for i, (player, stat)
+                          in enumerate(zip(self.variables['PLAYER_ID'], self.variables['BaseStat']))}
+        legs = legs.assign(Var=[
+            variable_index.get((int(player), stat), -1) if not pd.isna(player) else -1
+            for player, stat in zip(legs['PLAYER_ID'], legs['BaseStat'])
+        ])
+
+        grouped = legs.groupby('ProjectionId', sort=False)
+        projections = grouped.agg(
+            PlayerName=('PlayerName', lambda names: ' + '.join(names.fillna('?'))),
+            Players=('PLAYER_ID', tuple), Teams=('Team', lambda teams: tuple(teams.astype(str))),
+            Stat=('Stat', 'first'), PropLine=('PropLine', 'first'), Type=('Type', 'first'),
+            Simulated=('Var', lambda var: bool((var >= 0).all())),
+        ).reset_index()
+        self.projections = projections
+        self.simulated = np.flatnonzero(projections['Simulated'].to_numpy())
+        self.positions = {projection_id: i for i, projection_id
+                          in enumerate(projections['ProjectionId'].to_numpy()[self.simulated])}
+
+        # (simulated projections, legs) variable rows, padded with the zero row
+        leg_count = int(legs['LegCount'].max()) if len(legs) else 1
+        self.projection_legs = np.full((len(self.simulated), leg_count), pad, dtype=np.int64)
+        simulated_legs = legs[legs['ProjectionId'].isin(projections['ProjectionId'].to_numpy()[self.simulated])]
+        rows = simulated_legs['ProjectionId'].map(self.positions).to_numpy(dtype='int64')
+        self.projection_legs[rows, simulated_legs['Leg'].to_numpy(dtype='int64')] = simulated_legs['Var'].to_numpy()
+        self.lines = projections['PropLine'].to_numpy(dtype=np.float32)[self.simulated]
+
+    def _draw(self, chunk, size):
+        rng = np.random.default_rng([self.seed, chunk])
+        normals = rng.standard_normal((len(self.variables), size), dtype=np.float32)
+        for columns, factor in self.blocks:
+            normals[columns] = factor @ normals[columns]
+        values = np.zeros((len(self.variables) + 1, size), dtype=np.float32)
+        for columns, cuts, table in self.quantiles:
+            normal = normals[columns]
+            bins = np.clip((normal + RANK_RANGE) * RANK_BINS_PER_UNIT, 0, len(table) - 1).astype(np.int32)
+            ranks = table[bins]
+            # A bin holds at most one cut point: step past it if the draw is above it
+            ranks += normal > cuts[ranks]
+            values[columns] = self.samples[columns[:, None], ranks]
+        return values
+
+    def _totals(self):
+        # (draw offset, simulated projections x draws in the chunk) totals, combo legs summed
+        for chunk, start in enumerate(range(0, self.draws, self.chunk_draws)):
+            values = self._draw(chunk, min(self.chunk_draws, self.draws - start))
+            totals = values[self.projection_legs[:, 0]]
+            for j in range(1, self.projection_legs.shape[1]):
+                totals += values[self.projection_legs[:, j]]
+            yield start, totals
+
+    def _hits(self, totals, picks):
+        # picks are 2 * simulated projection + side (0 over, 1 under); ties hit neither side
+        rows = picks // 2
+        difference = totals[rows] - self.lines[rows, None]
+        return np.where((picks % 2 == 1)[:, None], difference < 0, difference > 0)
+
+    def probabilities(self):
+        """Over / under / push probability and mean outcome of every projection; NaN where not simulated."""
+        if self._probabilities is None:
+            over = np.zeros(len(self.simulated))
+            under = np.zeros(len(self.simulated))
+            total = np.zeros(len(self.simulated))
+            for _, totals in self._totals():
+                over += np.count_nonzero(totals > self.lines[:, None], axis=1)
+                under += np.count_nonzero(totals < self.lines[:, None], axis=1)
+                total += totals.sum(axis=1, dtype=np.float64)
+            result = self.projections[['ProjectionId', 'PlayerName', 'Stat', 'PropLine', 'Type']].copy()
+            for column, value in (('OverProb', over), ('UnderProb', under),
+                                  ('PushProb', self.draws - over - under), ('SimMean', total)):
+                result[column] = np.nan
+                result.loc[self.simulated, column] = value / self.draws
+            self._probabilities = result
+        return self._probabilities
+
+    def pick_hits(self, picks):
+        """Packed hits of the given pick codes over every draw, for count_hits."""
+        picks = np.asarray(picks, dtype=np.int64)
+        hits = np.zeros((len(picks), self.draws), dtype=bool)
+        for start, totals in self._totals():
+            hits[:, start:start + totals.shape[1]] = self._hits(totals, picks)
+        return pack_hits(hits)
+
+    def encode(self, slips):
+        """[(ProjectionId, 'over' | 'under'), ...] slips -> (n, MAX_LEGS) pick codes padded with -1.
+
+        A slip with a projection that isn't simulated gets -2 in its place.
+        """
+        codes = np.full((len(slips), MAX_LEGS), -1, dtype=np.int64)
+        for i, slip in enumerate(slips):
+            if not 2 <= len(slip) <= MAX_LEGS:
+                raise ValueError(f"A slip has 2 to {MAX_LEGS} legs, got {len(slip)}")
+            for j, (projection_id, side) in enumerate(slip):
+                if str(side).lower() not in SIDES:
+                    raise ValueError(f"Unknown side {side!r}; expected 'over' or 'under'")
+                position = self.positions.get(projection_id)
+                codes[i, j] = -2 if position is None else 2 * position + SIDES.index(str(side).lower())
+        return codes
+
+    def evaluate(self, slips, play='power'):
+        """Hit probability and expected value (profit per unit staked) of each slip.
+
+        Legs of a slip are drawn jointly, so same-game correlation moves the
+        result. Ties count as misses. Slips with a leg that isn't simulated get NaN.
+        """
+        codes = self.encode(slips)
+        valid = ~(codes == -2).any(axis=1)
+        distinct = np.unique(codes[codes >= 0])
+        rows = np.where(codes >= 0, np.searchsorted(distinct, codes), -1)[valid]
+
+        frequencies = np.zeros((len(rows), MAX_LEGS + 1), dtype=np.int64)
+        for _, totals in self._totals():
+            frequencies += count_hits(pack_hits(self._hits(totals, distinct)), rows, totals.shape[1])
+
+        probabilities = np.full((len(codes), MAX_LEGS + 1), np.nan)
+        probabilities[valid] = frequencies / self.draws
+        legs = (codes != -1).sum(axis=1)
+        # Slip sizes the play doesn't offer (e.g. 2-leg flex) have an all-NaN payout row and get no EV
+        payouts = payout_matrix(PAYOUTS[play])[legs]
+        return pd.DataFrame({
+            'Legs': legs,
+            'HitProb': probabilities[np.arange(len(codes)), legs],
+            'ExpectedHits': probabilities @ np.arange(MAX_LEGS + 1),
+            'EV': (probabilities * payouts).sum(axis=1) - 1.0,
+            'Picks': [tuple((projection_id, str(side).lower()) for projection_id, side in slip) for slip in slips],
+        })
+
+    def describe(self, picks):
+        """'Anfernee Simons Points over 24.5; ...' for a slip's picks."""
+        projections = self.projections.set_index('ProjectionId')
+        return '; '.join(f"{projections.at[projection_id, 'PlayerName']} {projections.at[projection_id, 'Stat']} "
+                         f"{side} {projections.at[projection_id, 'PropLine']:g}" for projection_id, side in picks)
+
+
+# Pool workers keep the candidate hit matrix from their initializer
+_worker_hits = None
+_worker_draws = None
+
+
+def _init_worker(hits, draws):
+    global _worker_hits, _worker_draws
+    _worker_hits = hits
+    _worker_draws = draws
+
+
+def _count_worker(slips):
+    return count_hits(_worker_hits, slips, _worker_draws)
+
+
+def search_slips(simulator, play='power', sizes=(2, 3, 4, 5, 6), candidates=CANDIDATE_PICKS, beam=BEAM_WIDTH,
+                 top=20, processes=1, types=('standard',)):
+    """Best slips on the board by expected value, found by beam search.
+
+    The candidates best single picks (of the given projection types; demons
+    and goblins are over-only) are drawn once; slips are grown one leg at a
+    time, keeping the beam best of each size. Slips follow the board's rules:
+    no player twice and at least two teams. With processes > 1 each size's
+    candidate slips are counted on a process pool.
+    """
+    probabilities = simulator.probabilities()
+    pool = probabilities.loc[simulator.simulated].assign(Position=np.arange(len(simulator.simulated)))
+    pool = pool[pool['Type'].astype(str).isin(types).to_numpy()]
+    standard = (pool['Type'].astype(str) == 'standard').to_numpy()
+    under = standard & (pool['UnderProb'] > pool['OverProb']).to_numpy()
+    pool = pool.assign(Code=2 * pool['Position'].to_numpy() + under,
+                       HitProb=np.where(under, pool['UnderProb'], pool['OverProb']))
+    pool = pool.sort_values('HitProb', ascending=False, kind='stable').head(candidates)
+
+    codes = pool['Code'].to_numpy()
+    picks = [(int(projection_id), SIDES[code % 2]) for projection_id, code in zip(pool['ProjectionId'], codes)]
+    players = [frozenset(simulator.projections.at[i, 'Players']) for i in pool.index]
+    teams = [frozenset(simulator.projections.at[i, 'Teams']) for i in pool.index]
+    hits = simulator.pick_hits(codes)
+    payouts = payout_matrix(PAYOUTS[play])
+
+    executor = None
+    if processes > 1:
+        executor = ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(hits, simulator.draws))
+    results = []
+    try:
+        # (candidate positions, their players, their teams) of each slip kept for growing
+        beams = [((i,), players[i], teams[i]) for i in range(len(codes))]
+        for size in range(2, max(sizes) + 1):
+            grown = [(slip + (i,), slip_players | players[i], slip_teams | teams[i])
+                     for slip, slip_players, slip_teams in beams
+                     for i in range(slip[-1] + 1, len(codes)) if not slip_players & players[i]]
+            if not grown:
+                break
+            rows = np.full((len(grown), MAX_LEGS), -1, dtype=np.int64)
+            rows[:, :size] = [slip for slip, _, _ in grown]
+            if executor is None:
+                frequencies = count_hits(hits, rows, simulator.draws)
+            else:
+                parts = np.array_split(rows, processes)
+                frequencies = np.concatenate(list(executor.map(_count_worker, parts)))
+            probabilities = frequencies / simulator.draws
+            ev = probabilities @ payouts[size] - 1.0
+            # No payout at this size (e.g. 2-leg flex): grow by the chance of hitting every leg
+            score = probabilities[:, size] if np.isnan(payouts[size]).all() else ev
+
+            if size in sizes and not np.isnan(payouts[size]).all():
+                valid = np.flatnonzero([len(slip_teams) >= 2 for _, _, slip_teams in grown])
+                for k in valid[np.argsort(-ev[valid], kind='stable')[:top]]:
+                    results.append((size, ev[k], probabilities[k, size], probabilities[k] @ np.arange(MAX_LEGS + 1),
+                                    tuple(picks[j] for j in grown[k][0])))
+            # One-team slips can't be entered but may still grow into valid ones
+            beams = [grown[k] for k in np.argsort(-score, kind='stable')[:beam]]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    best = pd.DataFrame(results, columns=['Legs', 'EV', 'HitProb', 'ExpectedHits', 'Picks'])
+    best = best.sort_values('EV', ascending=False, kind='stable').head(top).reset_index(drop=True)
+    best['Description'] = [simulator.describe(picks) for picks in best['Picks']]
+    return best
+
+
+def load_board_legs(board_path, store_root):
+    """Raw board CSV -> resolved legs, plus the stored player history."""
+    from player_index import PlayerIndex
+    from props_cleaning import clean_props, expand_combo_props
+    from stats_store import StatsStore
+
+    board = pd.read_csv(board_path, index_col=0)
+    store = StatsStore(store_root, 'player_stats')
+    history = store.load()
+    index = PlayerIndex(f'{store_root}/player_index')
+    index.update_from_store(store)
+    return index.resolve_props(expand_combo_props(clean_props(board))), history
+
+
+def _benchmark(legs, history, draws, seed, processes, slip_count=2000):
+    start = time.perf_counter()
+    simulator = SlipSimulator(legs, history, draws=draws, seed=seed)
+    print(f"Model: {len(simulator.variables)} player stats, {len(simulator.simulated)} of "
+          f"{len(simulator.projections)} projections, {len(simulator.blocks)} correlated games "
+          f"in {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    probabilities = simulator.probabilities()
+    print(f"Probabilities for every projection x {draws} draws in {time.perf_counter() - start:.2f} s")
+    combos = probabilities[probabilities['PlayerName'].str.contains(' + ', regex=False)]
+    print(combos[['PlayerName', 'Stat', 'PropLine', 'OverProb', 'UnderProb']].head(5).to_string())
+
+    rng = np.random.default_rng(seed)
+    projection_ids = probabilities['ProjectionId'].to_numpy()[simulator.simulated]
+    slips = []
+    for _ in range(slip_count):
+        legs_in_slip = rng.integers(2, MAX_LEGS + 1)
+        picks = rng.choice(len(projection_ids), legs_in_slip, replace=False)
+        slips.append([(int(projection_ids[p]), SIDES[rng.integers(2)]) for p in picks])
+    start = time.perf_counter()
+    evaluated = simulator.evaluate(slips)
+    print(f"EV of {slip_count} random slips x {draws} draws in {time.perf_counter() - start:.2f} s "
+          f"(mean EV {evaluated['EV'].mean():+.3f})")
+
+    for workers in sorted({1, processes}):
+        start = time.perf_counter()
+        best = search_slips(simulator, processes=workers)
+        print(f"Board search with {workers} process(es) in {time.perf_counter() - start:.2f} s")
+    print(best[['Legs', 'EV', 'HitProb', 'Description']].head(5).to_string())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate a board's props and search it for the best slips.")
+    parser.add_argument("board", help="raw board CSV (gitscrap.fetch_projections output)")
+    parser.add_argument("--store", default="nba_stats")
+    parser.add_argument("--draws", type=int, default=DRAWS)
+    parser.add_argument("--seed", type=int, help="default: random, printed so the run can be repeated")
+    parser.add_argument("--play", choices=sorted(PAYOUTS), default="power")
+    parser.add_argument("--types", nargs="+", default=["standard"], help="projection types to pick from")
+    parser.add_argument("--processes", type=int, default=1, help="processes counting candidate slips")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--benchmark", action="store_true", help="time the engine on this board and exit")
+    args = parser.parse_args(argv)
+
+    legs, history = load_board_legs(args.board, args.store)
+    if args.benchmark:
+        _benchmark(legs, history, args.draws, args.seed, args.processes)
+        return 0
+
+    simulator = SlipSimulator(legs, history, draws=args.draws, seed=args.seed)
+    print(f"Seed {simulator.seed}: {len(simulator.simulated)} of {len(simulator.projections)} projections simulated")
+    best = search_slips(simulator, play=args.play, top=args.top, processes=args.processes, types=tuple(args.types))
+    with pd.option_context('display.max_colwidth', None, 'display.width', 200):
+        print(best[['Legs', 'EV', 'HitProb', 'ExpectedHits', 'Description']].to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,385 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from backtest import STAT_MAP
+from player_index import PlayerIndex, TEAM_TRICODES
+from schema import TABLE_SCHEMAS, apply_schema
+from stats_store import StatsStore, STORE_DIR, format_game_id, game_order
+
+SNAPSHOT_DIR = "stats_snapshot"
+SERVICE_PORT = 8765
+RELOAD_SECONDS = 5.0
+
+# Everyday spellings of box score columns
+STAT_ALIASES = {"REB": "TREB", "TOV": "TO", "3PTM": "3PM", "PM": "+/-"}
+
+# Per table: (entity key column, game key column)
+TABLE_KEYS = {
+    "player_stats": ("PLAYER_ID", "GAME_ID"),
+    "team_stats": ("teamId", "gameId"),
+}
+
+class Snapshot:
+    """One table's history in a memory-mapped Arrow file, with a row-offset index per player / team.
+
+    Rows are sorted by the entity key and then chronologically, so an entity's
+    games are the contiguous rows offsets[key] = (start, end), and numeric
+    columns are zero-copy NumPy views of the mapped file.
+    """
+
+    def __init__(self, path, key_column):
+        self.path = path
+        source = pa.memory_map(path, "r")
+        self.table = pa.ipc.open_file(source).read_all()
+        self.game_ids = json.loads(self.table.schema.metadata[b"game_ids"])
+        self.column_names = set(self.table.column_names)
+        self._columns = {}
+        keys = self.column(key_column)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=np.int64)
+        ends = np.r_[starts[1:], len(keys)]
+        self.offsets = {int(keys[start]): (int(start), int(end)) for start, end in zip(starts, ends)}
+
+    def column(self, name):
+        values = self._columns.get(name)
+        if values is None:
+            column = self.table.column(name)
+            values = column.chunk(0).to_numpy(zero_copy_only=True) if column.num_chunks == 1 else column.to_numpy()
+            self._columns[name] = values
+        return values
+
+    def has_column(self, name):
+        return name in self.column_names
+
+
+def write_snapshot(df, path, key_column, game_column, game_ids):
+    """Sort a table by entity and game order and write it as one uncompressed Arrow record batch."""
+    df = df.assign(GAME_ORDER=game_order(df[game_column].to_numpy()))
+    df = df.sort_values([key_column, "GAME_ORDER"], kind="stable").reset_index(drop=True)
+    if game_column == "gameId":
+        df["OPPONENT_ROW"] = _opponent_rows(df[game_column].to_numpy())
+    # Built from NumPy so NaN stays a value: nullable columns couldn't be viewed zero-copy
+    arrays = [pa.array(df[column]) if isinstance(df[column].dtype, pd.CategoricalDtype)
+              else pa.array(df[column].to_numpy()) for column in df.columns]
+    table = pa.Table.from_arrays(arrays, names=list(df.columns),
+                                 metadata={"game_ids": json.dumps(sorted(game_ids))})
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(len(df), 1))
+    os.replace(tmp_path, path)  # Open snapshots keep mapping the old file
+
+
+def _opponent_rows(game_ids):
+    # The other team's row in the same game, or -1 when a game doesn't have exactly two rows
+    order = np.argsort(game_ids, kind="stable")
+    sorted_ids = game_ids[order]
+    opponent = np.full(len(game_ids), -1, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    counts = np.diff(np.r_[starts, len(sorted_ids)])
+    pairs = starts[counts == 2]
+    opponent[order[pairs]] = order[pairs + 1]
+    opponent[order[pairs + 1]] = order[pairs]
+    return opponent
+
+
+class StatsService:
+    """In-process query client over the stored player and team box scores.
+
+    History is loaded from memory-mapped snapshots (rebuilt from the StatsStore
+    only when games were added), and each query is a dict lookup plus a slice
+    of the player's or team's rows. refresh() picks up newly appended games;
+    start_reloader() runs it in the background and swaps snapshots atomically,
+    so queries never see a half loaded history.
+    """
+
+    def __init__(self, store_root=STORE_DIR, snapshot_dir=SNAPSHOT_DIR):
+        self.store_root = store_root
+        self.snapshot_dir = snapshot_dir
+        self.snapshots = {}
+        self.player_index = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        os.makedirs(snapshot_dir, exist_ok=True)
+        self.refresh()
+
+    def refresh(self):
+        """Load any games appended to the store since the last refresh. Returns the number of new games."""
+        with self._refresh_lock:
+            added = 0
+            snapshots = dict(self.snapshots)
+            for table, (key_column, game_column) in TABLE_KEYS.items():
+                store = StatsStore(self.store_root, table)
+                path = os.path.join(self.snapshot_dir, f"{table}.arrow")
+                current = snapshots.get(table)
+                if current is None and os.path.exists(path):
+                    current = Snapshot(path, key_column)
+                stored = store.stored_game_ids()
+                known = set(current.game_ids) if current is not None else set()
+                new_game_ids = [game_id for game_id in stored if game_id not in known]
+                if new_game_ids or (current is None and stored):
+                    new_rows = store.load(games=new_game_ids)
+                    history = new_rows if current is None else pd.concat(
+                        [current.table.to_pandas().drop(columns=["GAME_ORDER", "OPPONENT_ROW"], errors="ignore"),
+                         new_rows], ignore_index=True)
+                    write_snapshot(apply_schema(history, TABLE_SCHEMAS[table]), path, key_column, game_column,
+                                   sorted(known | set(new_game_ids)))
+                    current = Snapshot(path, key_column)
+                    added += len(new_game_ids)
+                if current is not None:
+                    snapshots[table] = current
+            if added or self.player_index is None:
+                # A fresh index is swapped in whole, like the snapshots, so lookups never see it half built
+                player_index = PlayerIndex(os.path.join(self.snapshot_dir, "player_index"))
+                player_index.update_from_store(StatsStore(self.store_root, "player_stats"))
+                self.player_index = player_index
+            self.snapshots = snapshots
+            return added
+
+    def start_reloader(self, interval=RELOAD_SECONDS):
+        """Poll the store every interval seconds and hot-reload when games are appended."""
+        def watch():
+            while not self._stop.wait(interval):
+                try:
+                    added = self.refresh()
+                    if added:
+                        print(f"Reloaded {added} new games")
+                except Exception as e:
+                    print(f"❌ Reload failed: {e}")
+        thread = threading.Thread(target=watch, name="stats-reloader", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+    def _values(self, snapshot, stat, rows):
+        # A box score column, or a PrizePicks stat built from several ('Pts+Rebs', 'Fantasy Score')
+        stat = STAT_ALIASES.get(stat, stat)
+        if snapshot.has_column(stat):
+            return snapshot.column(stat)[rows].astype(np.float64)
+        if stat in STAT_MAP:
+            return sum(weight * snapshot.column(column)[rows].astype(np.float64)
+                       for column, weight in STAT_MAP[stat].items())
+        raise KeyError(f"Unknown stat: {stat}")
+
+    def player_id(self, player, team=None):
+        if isinstance(player, (int, np.integer)) or str(player).isdigit():
+            return int(player)
+        return self.player_index.lookup(player, team)
+
+    def _recent(self, player, stat, last, team=None):
+        # (player_id, rows, values) of the player's last `last` played games, or None if unknown
+        snapshot = self.snapshots.get("player_stats")
+        player_id = self.player_id(player, team)
+        if snapshot is None or player_id not in snapshot.offsets:
+            return None
+        start, end = snapshot.offsets[player_id]
+        rows = np.flatnonzero(snapshot.column("MINUTES")[start:end] > 0) + start
+        if last:
+            rows = rows[-last:]
+        return player_id, rows, self._values(snapshot, stat, rows)
+
+    def player_games(self, player, stat, last=10, team=None):
+        """A player's stat in their last `last` played games (minutes > 0), oldest first."""
+        recent = self._recent(player, stat, last, team)
+        if recent is None:
+            return None
+        player_id, rows, values = recent
+        game_ids = self.snapshots["player_stats"].column("GAME_ID")[rows]
+        return {
+            "player_id": player_id,
+            "stat": stat,
+            "games": [{"GAME_ID": format_game_id(game_id), "value": float(value)}
+                      for game_id, value in zip(game_ids, values)],
+            "mean": float(np.nanmean(values)) if len(values) else None,
+        }
+
+    def team_id(self, team):
+        if isinstance(team, (int, np.integer)) or str(team).isdigit():
+            return int(team)
+        team = str(team).upper()
+        for team_id, tricode in TEAM_TRICODES.items():
+            if tricode == team:
+                return team_id
+        return None
+
+    def opponent_allowed(self, team, stat, last=None):
+        """What a team's opponents put up against it, game by game (e.g. 'POR', 'TREB')."""
+        snapshot = self.snapshots.get("team_stats")
+        team_id = self.team_id(team)
+        if snapshot is None or team_id not in snapshot.offsets:
+            return None
+        start, end = snapshot.offsets[team_id]
+        rows = np.arange(start, end)[-last:] if last else np.arange(start, end)
+        opponents = snapshot.column("OPPONENT_ROW")[rows]
+        rows, opponents = rows[opponents >= 0], opponents[opponents >= 0]
+        values = self._values(snapshot, stat, opponents)
+        opponent_ids = snapshot.column("teamId")[opponents]
+        return {
+            "team_id": team_id,
+            "stat": stat,
+            "games": [{"GAME_ID": format_game_id(game_id), "OPPONENT": TEAM_TRICODES.get(int(opponent_id), int(opponent_id)),
+                       "value": float(value)}
+                      for game_id, opponent_id, value in zip(snapshot.column("gameId")[rows], opponent_ids, values)],
+            "mean": float(np.nanmean(values)) if len(values) else None,
+        }
+
+    def vs_line(self, stat, lines, last=10):
+        """Each player's recent games against their line: lines is {player name or ID: line}."""
+        results = []
+        for player, line in lines.items():
+            recent = self._recent(player, stat, last)
+            if recent is None:
+                results.append({"player": player, "player_id": None, "line": line})
+                continue
+            player_id, _, values = recent
+            results.append({
+                "player": player,
+                "player_id": player_id,
+                "line": line,
+                "games": len(values),
+                "mean": float(np.nanmean(values)) if len(values) else None,
+                "over": int((values > line).sum()),
+                "under": int((values < line).sum()),
+                "hit_rate": float((values > line).mean()) if len(values) else None,
+            })
+        return results
+
+
+def lines_from_board(path, stat):
+    """{PlayerName: PropLine} for one PrizePicks stat from a props_cleaning export (e.g. NBA_PrizeProps.csv)."""
+    props = pd.read_csv(path)
+    props = props[(props["Stat"] == stat) & ~props["PlayerName"].str.contains(" + ", regex=False)]
+    return dict(zip(props["PlayerName"], props["PropLine"].astype(float)))
+
+
+def _make_handler(service):
+    class QueryHandler(BaseHTTPRequestHandler):
+        def _respond(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _answer(self, path, params):
+            last = int(params["last"]) if params.get("last") else None
+            if path == "/player":
+                return service.player_games(params["name"], params["stat"], last or 10, params.get("team"))
+            if path == "/opponent":
+                return service.opponent_allowed(params["team"], params["stat"], last)
+            if path == "/vs_line":
+                lines = params.get("lines") or lines_from_board(params["board"], params["stat"])
+                if isinstance(lines, str):
+                    # Over GET, lines is the JSON object as a query string value
+                    lines = json.loads(lines)
+                if not isinstance(lines, dict):
+                    raise ValueError('lines must be a JSON object of {"player": line}')
+                return service.vs_line(params["stat"], {player: float(line) for player, line in lines.items()}, last or 10)
+            if path == "/reload":
+                return {"added": service.refresh()}
+            if path == "/health":
+                return {table: len(snapshot.game_ids) for table, snapshot in service.snapshots.items()}
+            raise LookupError(path)
+
+        def _handle(self, params):
+            path = urlparse(self.path).path
+            try:
+                result = self._answer(path, params)
+            except (KeyError, ValueError) as e:
+                # Before LookupError: a missing parameter (KeyError) is a bad request, not an unknown path
+                self._respond(400, {"error": str(e)})
+                return
+            except LookupError as e:
+                self._respond(404, {"error": f"not found: {e}"})
+                return
+            self._respond(200 if result is not None else 404, result if result is not None else {"error": "no data"})
+
+        def do_GET(self):
+            self._handle({name: values[0] for name, values in parse_qs(urlparse(self.path).query).items()})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            self._handle(json.loads(self.rfile.read(length) or b"{}"))
+
+        def log_message(self, format, *args):
+            pass  # Keep the console for reload messages
+
+    return QueryHandler
+
+
+def serve(service, port=SERVICE_PORT, host="127.0.0.1"):
+    """Answer queries over HTTP/JSON on localhost until interrupted.
+
+    GET /player?name=Kevin Durant&stat=PTS&last=10
+    GET /opponent?team=POR&stat=REB&last=10
+    POST /vs_line {"stat": "3PM", "lines": {"Kevin Durant": 2.5}} (or "board": <PrizeProps CSV>)
+    GET /vs_line?stat=3PM&lines={"Kevin Durant": 2.5} (lines URL-encoded JSON), or ?stat=3PM&board=<CSV>
+    GET /reload, GET /health
+    """
+    server = ThreadingHTTPServer((host, port), _make_handler(service))
+    print(f"Serving stats queries on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _benchmark(service, queries=2000):
+    snapshot = service.snapshots["player_stats"]
+    player_ids = list(snapshot.offsets)[:200]
+    names = {}
+    for player_id in player_ids[:50]:
+        start, _ = snapshot.offsets[player_id]
+        names[f"{snapshot.table.column('FIRST_NAME')[start]} {snapshot.table.column('LAST_NAME')[start]}"] = 10.5
+
+    def timed(label, run, count):
+        start = time.perf_counter()
+        for i in range(count):
+            run(i)
+        print(f"{label}: {(time.perf_counter() - start) / count * 1e6:.1f} us/query")
+
+    timed("player last 10 PTS (by name)", lambda i: service.player_games(list(names)[i % len(names)], "PTS"), queries)
+    timed("player last 10 Pts+Rebs (by ID)", lambda i: service.player_games(player_ids[i % len(player_ids)], "Pts+Rebs"), queries)
+    if "team_stats" in service.snapshots:
+        teams = list(service.snapshots["team_stats"].offsets)
+        timed("opponents' REB allowed", lambda i: service.opponent_allowed(teams[i % len(teams)], "REB", 10), queries)
+    timed(f"vs line for {len(names)} players", lambda i: service.vs_line("PTS", names), max(queries // 50, 1))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Low-latency queries over the stored player and team box scores.")
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--snapshots", default=SNAPSHOT_DIR)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--reload-seconds", type=float, default=RELOAD_SECONDS)
+    parser.add_argument("--benchmark", action="store_true", help="time in-process queries and exit")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    service = StatsService(args.store, args.snapshots)
+    print(f"Loaded {', '.join(f'{table}: {len(snapshot.game_ids)} games' for table, snapshot in service.snapshots.items())} "
+          f"in {time.perf_counter() - start:.2f} s")
+    if args.benchmark:
+        _benchmark(service)
+        return 0
+    service.start_reloader(args.reload_seconds)
+    serve(service, args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from instrumentation import stage
+from schema import TABLE_SCHEMAS, apply_schema
+
+STORE_DIR = "nba_stats"
+
+
+def season_from_game_id(game_id):
+    """NBA game IDs look like 00SYYNNNNN; YY is the season start year (0022400700 -> 2024)."""
+    return 2000 + int(format_game_id(game_id)[3:5])
+
+
+def format_game_id(game_id):
+    """Zero-padded string form of a game ID, whether stored as "0022400700" or as the int32 22400700."""
+    return str(game_id).zfill(10)
+
+
+# Game ID type digit -> position within a season (preseason, regular/all-star, play-in, playoffs)
+GAME_TYPE_RANK = np.array([0, 0, 1, 1, 3, 2, 0, 0, 0, 0], dtype=np.int64)
+
+
+def game_order(game_ids):
+    """Chronological sort key for integer game IDs: season, then game type, then game number.
+
+    Raw IDs don't sort across seasons ("0042300101", 2023 playoffs, > "0022400001"), this does.
+    """
+    game_ids = np.asarray(game_ids, dtype=np.int64)
+    season = (game_ids // 100000) % 100
+    game_type = (game_ids // 10000000) % 10
+    return (season * 4 + GAME_TYPE_RANK[game_type]) * 100000 + game_ids % 100000
+
+
+class StatsStore:
+    """Append-only Parquet store with one file per game, partitioned by season.
+
+    Layout: <root>/<table>/season=<YYYY>/<GAME_ID>.parquet. A game is written once
+    and never rewritten, so checkpointing a backfill costs one small file per game
+    instead of re-serializing the whole history.
+
+    Tables with a declared schema (schema.TABLE_SCHEMAS) are written and loaded in
+    it; files written before the schema existed are cast when they are read.
+    """
+
+    def __init__(self, root=STORE_DIR, table="player_stats"):
+        self.root = root
+        self.table = table
+        self.path = os.path.join(root, table)
+        self.schema = TABLE_SCHEMAS.get(table)
+
+    def _season_dir(self, season):
+        return os.path.join(self.path, f"season={season}")
+
+    def _game_path(self, game_id):
+        season_dir = self._season_dir(season_from_game_id(game_id))
+        path = os.path.join(season_dir, f"{format_game_id(game_id)}.parquet")
+        # Files written from integer IDs before they were normalized lack the leading zeros
+        legacy_path = os.path.join(season_dir, f"{int(game_id)}.parquet")
+        if not os.path.exists(path) and os.path.exists(legacy_path):
+            return legacy_path
+        return path
+
+    def seasons(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(int(name.split("=", 1)[1]) for name in os.listdir(self.path) if name.startswith("season="))
+
+    def has_game(self, game_id):
+        return os.path.exists(self._game_path(game_id))
+
+    def stored_game_ids(self, season=None):
+        seasons = self.seasons() if season is None else _as_list(season)
+        game_ids = []
+        for season in seasons:
+            season_dir = self._season_dir(season)
+            if not os.path.isdir(season_dir):
+                continue
+            game_ids.extend(name[:-len(".parquet")] for name in os.listdir(season_dir) if name.endswith(".parquet"))
+        return sorted(game_ids)
+
+    def write_game(self, game_id, df):
+        """Write one game's rows. Returns False if the game is already stored."""
+        path = self._game_path(game_id)
+        if os.path.exists(path):
+            return False
+
+        with stage(f"{self.table}.serialize"):
+            if self.schema is not None:
+                df = apply_schema(df, self.schema)
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            df.reset_index(drop=True).to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)  # Readers never see a half written game
+        return True
+
+    def load(self, season=None, players=None, columns=None, games=None):
+        """Read stored rows, touching only the partitions and columns asked for.
+
+        season and games prune whole files; columns are read from Parquet column
+        chunks directly; players filters on PLAYER_ID using row group statistics.
+        """
+        if games is not None:
+            game_ids = [format_game_id(game_id) for game_id in _as_list(games) if self.has_game(game_id)]
+            if season is not None:
+                seasons = set(_as_list(season))
+                game_ids = [game_id for game_id in game_ids if season_from_game_id(game_id) in seasons]
+        else:
+            game_ids = self.stored_game_ids(season)
+
+        filters = None
+        if players is not None:
+            filters = [("PLAYER_ID", "in", [int(player) for player in _as_list(players)])]
+
+        tables = [pq.read_table(self._game_path(game_id), columns=columns, filters=filters) for game_id in game_ids]
+        if not tables:
+            return pd.DataFrame(columns=columns)
+        if self.schema is not None:
+            tables = self._cast_legacy(tables)
+        return pa.concat_tables(tables, promote_options="permissive").to_pandas()
+
+    def _cast_legacy(self, tables):
+        # Files written before the schema existed are cast together in one pass, then
+        # put back in their places so the typed and legacy games concatenate in order
+        legacy = [i for i, table in enumerate(tables) if not _conforms(table.schema, self.schema)]
+        if not legacy:
+            return tables
+        combined = pa.concat_tables([tables[i] for i in legacy], promote_options="permissive")
+        cast = pa.Table.from_pandas(apply_schema(combined.to_pandas(), self.schema), preserve_index=False)
+        offset = 0
+        for i in legacy:
+            tables[i], offset = cast.slice(offset, tables[i].num_rows), offset + tables[i].num_rows
+        return tables
+
+
+ARROW_TYPES = {"int32": pa.int32(), "float32": pa.float32()}
+
+
+def _conforms(arrow_schema, schema):
+    for field in arrow_schema:
+        dtype = schema.get(field.name)
+        if dtype == "category":
+            if not pa.types.is_dictionary(field.type):
+                return False
+        elif dtype is not None and field.type != ARROW_TYPES[dtype]:
+            return False
+    return True
+
+
+def _as_list(value):
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    return [value]
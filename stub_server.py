@@ -0,0 +1,266 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import tempfile
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import requests
+from nba_api.stats.library.http import NBAStatsHTTP
+
+import gitscrap
+from PlayerData import HEADERS
+from http_client import nba_stats_get
+
+# Recorded responses live in FIXTURE_DIR/<endpoint>/<key>.json (see fixture_path)
+FIXTURE_DIR = "fixtures"
+BOX_SCORE_ENDPOINTS = ["boxscoreadvancedv3", "boxscoretraditionalv3"]
+NBA_STATS_BASE_URL = NBAStatsHTTP.base_url
+PRIZEPICKS_PROJECTIONS_URL = gitscrap.PROJECTIONS_URL
+
+# The parameter that names a recorded response, per endpoint
+FIXTURE_KEYS = {
+    "boxscoreadvancedv3": "GameID",
+    "boxscoretraditionalv3": "GameID",
+    "scoreboardv2": "GameDate",
+    "projections": "league_id",
+}
+
+# Stub path prefix -> real API, used when recording
+UPSTREAM_URLS = {
+    "stats": "https://stats.nba.com/stats/{endpoint}",
+    "prizepicks": "https://partner-api.prizepicks.com/{endpoint}",
+}
+
+
+def record_box_scores(game_ids, fixture_dir=FIXTURE_DIR):
+    """Save the raw box score JSON for each game so it can be served offline later."""
+    for endpoint in BOX_SCORE_ENDPOINTS:
+        os.makedirs(os.path.join(fixture_dir, endpoint), exist_ok=True)
+
+    for game_id in game_ids:
+        for endpoint in BOX_SCORE_ENDPOINTS:
+            path = os.path.join(fixture_dir, endpoint, f"{game_id}.json")
+            if os.path.exists(path):
+                continue
+            response = nba_stats_get(endpoint, {"GameID": game_id}, HEADERS)
+            if response is None or not response.valid_json():
+                print(f"❌ Could not record {endpoint} for game {game_id}")
+                continue
+            with open(path, "w") as file:
+                file.write(response.get_response())
+            print(f"Recorded {endpoint} for game {game_id}")
+
+
+def fixture_path(fixture_dir, endpoint, query):
+    """Where the response for one request is kept: <fixture_dir>/<endpoint>/<key>.json.
+
+    The key is the parameter that identifies the response (GameID, GameDate,
+    league_id) for known endpoints, and the whole sorted query string otherwise.
+    """
+    param = FIXTURE_KEYS.get(endpoint)
+    if param is not None:
+        key = query.get(param, [""])[0]
+    else:
+        key = "&".join(f"{name}={values[0]}" for name, values in sorted(query.items()))
+    key = re.sub(r"[^A-Za-z0-9_.=&-]", "_", key) or "default"
+    return os.path.join(fixture_dir, endpoint, f"{key}.json")
+
+
+def _make_handler(fixture_dir, latency, record, throttle_rate, timeout_rate, stall_seconds, rng, server_rate_limit):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            upstream, endpoint = parts[0], parts[-1].lower()
+            query = parse_qs(url.query, keep_blank_values=True)
+            path = fixture_path(fixture_dir, endpoint, query)
+
+            with self.server.stats_lock:
+                self.server.stats["requests"] += 1
+                fault = rng.random()
+                over_limit = server_rate_limit and not self._take_token()
+
+            if latency:
+                time.sleep(latency)
+
+            # A real limit: requests beyond server_rate_limit per second get a bare 429
+            if over_limit:
+                self._count("throttled")
+                self._reply(429, b"Too Many Requests", {})
+                return
+
+            # Injected faults: a 429 with Retry-After, or a stall that outlasts the client's timeout
+            if fault < throttle_rate:
+                self._count("throttled")
+                self._reply(429, b"Too Many Requests", {"Retry-After": "1"})
+                return
+            if fault < throttle_rate + timeout_rate:
+                self._count("stalled")
+                time.sleep(stall_seconds)
+                self.close_connection = True
+                return
+
+            if not os.path.exists(path) and record and upstream in UPSTREAM_URLS:
+                self._record(upstream, endpoint, url.query, path)
+
+            if not os.path.exists(path):
+                self._count("missing")
+                self._reply(404, b"", {})
+                return
+
+            with open(path, "rb") as file:
+                body = file.read()
+            self._count("bytes", len(body))
+            self._reply(200, body, {"Content-Type": "application/json"})
+
+        def _record(self, upstream, endpoint, query_string, path):
+            # Forward the client's own headers, so nba.com and PrizePicks see the same request
+            headers = {name: value for name, value in self.headers.items()
+                       if name.lower() not in ("host", "connection", "content-length", "accept-encoding")}
+            url = UPSTREAM_URLS[upstream].format(endpoint=endpoint)
+            response = requests.get(f"{url}?{query_string}", headers=headers, timeout=30)
+            if response.status_code != 200:
+                print(f"❌ {endpoint} answered {response.status_code}; nothing recorded")
+                return
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as file:
+                file.write(response.text)
+            self._count("recorded")
+            print(f"Recorded {path}")
+
+        def _take_token(self):
+            # Token bucket holding at most one second of requests; called with stats_lock held
+            now = time.monotonic()
+            bucket = self.server.bucket
+            bucket["tokens"] = min(server_rate_limit, bucket["tokens"] + (now - bucket["last"]) * server_rate_limit)
+            bucket["last"] = now
+            if bucket["tokens"] < 1:
+                return False
+            bucket["tokens"] -= 1
+            return True
+
+        def _count(self, name, amount=1):
+            with self.server.stats_lock:
+                self.server.stats[name] += amount
+
+        def _reply(self, status, body, headers):
+            self._count(f"status_{status}")
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+def start_stub_server(fixture_dir=FIXTURE_DIR, latency=0.0, port=0, record=False,
+                      throttle_rate=0.0, timeout_rate=0.0, stall_seconds=35.0, seed=None, server_rate_limit=None):
+    """Serve recorded nba_api and PrizePicks responses on localhost and point both clients at it.
+
+    latency adds a fixed delay to every response so the stub behaves like a slow
+    remote API. throttle_rate is the fraction of requests answered with a 429 and
+    timeout_rate the fraction that stall for stall_seconds and then drop the
+    connection; seed makes the fault sequence repeatable. server_rate_limit
+    enforces a requests-per-second limit, answering the excess with 429s the
+    way the real APIs do. With record=True,
+    requests without a fixture are forwarded to the real API once and saved.
+
+    server.stats counts requests, statuses, faults and bytes served. Returns the
+    server; call stop_stub_server when done.
+    """
+    rng = random.Random(seed)
+    handler = _make_handler(fixture_dir, latency, record, throttle_rate, timeout_rate, stall_seconds, rng,
+                            server_rate_limit)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.stats = Counter()
+    server.stats_lock = threading.Lock()
+    server.bucket = {"tokens": server_rate_limit or 0.0, "last": time.monotonic()}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    host, port = server.server_address
+    NBAStatsHTTP.base_url = f"http://{host}:{port}/stats/{{endpoint}}"
+    gitscrap.PROJECTIONS_URL = f"http://{host}:{port}/prizepicks/projections?league_id={{league_id}}&per_page=1000"
+    return server
+
+
+def stop_stub_server(server):
+    server.shutdown()
+    server.server_close()
+    NBAStatsHTTP.base_url = NBA_STATS_BASE_URL
+    gitscrap.PROJECTIONS_URL = PRIZEPICKS_PROJECTIONS_URL
+
+
+def record_fixtures(fixture_dir=FIXTURE_DIR, leagues=("NBA", "NFL"), dates=(), game_ids=()):
+    """Run the real fetchers once through a recording stub so every response they need is saved.
+
+    Afterwards the same calls replay offline from fixture_dir.
+    """
+    from dataCollection import get_games
+    from game_catalog import GameCatalog
+    from raw_cache import RawResponseCache, fetch_box_scores
+
+    server = start_stub_server(fixture_dir, record=True)
+    try:
+        for league in leagues:
+            gitscrap.fetch_projections(gitscrap.LEAGUE_IDS[league])
+        with tempfile.TemporaryDirectory() as scratch:
+            for game_date in dates:
+                get_games(game_date, game_date, catalog=GameCatalog(os.path.join(scratch, "catalog.sqlite")))
+            for game_id in game_ids:
+                fetch_box_scores(game_id, HEADERS, RawResponseCache(scratch))
+    finally:
+        stop_stub_server(server)
+    return dict(server.stats)
+
+
+def _recorded_game_ids(fixture_dir=FIXTURE_DIR):
+    recorded = [
+        set(name[:-len(".json")] for name in os.listdir(os.path.join(fixture_dir, endpoint)))
+        for endpoint in BOX_SCORE_ENDPOINTS
+    ]
+    return sorted(set.intersection(*recorded))
+
+
+# Compare the sequential and concurrent fetchers against the stub server
+if __name__ == "__main__":
+    import PlayerData
+    from raw_cache import RawResponseCache
+    from stats_store import StatsStore
+
+    fixture_dir = sys.argv[1] if len(sys.argv) > 1 else FIXTURE_DIR
+    game_count = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    game_ids = _recorded_game_ids(fixture_dir)[:game_count]
+    server = start_stub_server(fixture_dir, latency=0.25)
+    try:
+        start = time.perf_counter()
+        sequential = PlayerData.fetch_combined_stats(game_ids, store=StatsStore(tempfile.mkdtemp()),
+                                                     cache=RawResponseCache(tempfile.mkdtemp()))
+        sequential_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        concurrent = PlayerData.fetch_combined_stats(game_ids, max_workers=16, requests_per_second=50,
+                                                     store=StatsStore(tempfile.mkdtemp()),
+                                                     cache=RawResponseCache(tempfile.mkdtemp()))
+        concurrent_time = time.perf_counter() - start
+    finally:
+        stop_stub_server(server)
+
+    print(json.dumps({
+        "games": len(game_ids),
+        "sequential_seconds": round(sequential_time, 3),
+        "concurrent_seconds": round(concurrent_time, 3),
+        "speedup": round(sequential_time / concurrent_time, 2),
+        "identical": sequential.equals(concurrent),
+    }, indent=4))
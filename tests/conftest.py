@@ -0,0 +1,62 @@
+import os
+import sys
+import json
+import random
+
+import pytest
+
+# The modules live flat at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _box_score_bodies(game_id, rng, players_per_team=5):
+    """Raw boxscoreadvancedv3 / boxscoretraditionalv3 bodies for one synthetic game."""
+    from nba_api.stats.endpoints._parsers import boxscoreadvancedv3, boxscoretraditionalv3
+
+    home, away = rng.sample(range(30), 2)
+    advanced = {"gameId": game_id, "homeTeamId": 1610612737 + home, "awayTeamId": 1610612737 + away}
+    traditional = dict(advanced)
+    for key, team in (("homeTeam", home), ("awayTeam", away)):
+        meta = {"teamId": 1610612737 + team, "teamCity": f"City{team}", "teamName": f"Team{team}",
+                "teamTricode": f"T{team:02d}", "teamSlug": f"team{team}"}
+        advanced_players, traditional_players = [], []
+        for j in range(players_per_team):
+            person = {"personId": 1600000 + team * 20 + j, "firstName": f"First{team}_{j}",
+                      "familyName": f"Last{team}_{j}", "nameI": "F. Last", "playerSlug": "x", "position": "G",
+                      "comment": "", "jerseyNum": "1"}
+            minutes = f"{rng.randint(0, 40)}:{rng.randint(0, 59):02d}"
+            advanced_stats = {field: round(rng.random() * 100, 3) for field in boxscoreadvancedv3.PLAYER_STATS_FIELDS}
+            traditional_stats = {field: rng.randint(0, 30) for field in boxscoretraditionalv3.TRADITIONAL_STATS_FIELDS}
+            for field in ("fieldGoalsPercentage", "threePointersPercentage", "freeThrowsPercentage"):
+                traditional_stats[field] = round(rng.random(), 3)
+            advanced_stats["minutes"] = traditional_stats["minutes"] = minutes
+            advanced_players.append({**person, "statistics": advanced_stats})
+            traditional_players.append({**person, "statistics": traditional_stats})
+        advanced[key] = {**meta, "players": advanced_players,
+                         "statistics": {field: round(rng.random() * 100, 2)
+                                        for field in boxscoreadvancedv3.TEAM_STATS_FIELDS}}
+        traditional[key] = {**meta, "players": traditional_players, "starters": {}, "bench": {},
+                            "statistics": {field: rng.randint(50, 130)
+                                           for field in boxscoretraditionalv3.TRADITIONAL_STATS_FIELDS}}
+    return (json.dumps({"meta": {}, "boxScoreAdvanced": advanced}),
+            json.dumps({"meta": {}, "boxScoreTraditional": traditional}))
+
+
+@pytest.fixture
+def raw_box_scores():
+    """{game_id: (advanced body, traditional body)} for synthetic games, in raw API form."""
+    def make(game_ids, seed=0):
+        rng = random.Random(seed)
+        return {game_id: _box_score_bodies(game_id, rng) for game_id in game_ids}
+    return make
+
+
+@pytest.fixture
+def box_score_data_sets(raw_box_scores):
+    """[(game_id, advanced data sets, traditional data sets)] as fetch_box_scores returns them."""
+    from raw_cache import BOX_SCORE_ENDPOINTS, parse_box_score
+
+    def make(game_ids, seed=0):
+        return [(game_id, *(parse_box_score(endpoint, body) for endpoint, body in zip(BOX_SCORE_ENDPOINTS, bodies)))
+                for game_id, bodies in raw_box_scores(game_ids, seed).items()]
+    return make
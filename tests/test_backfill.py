@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+import backfill
+from backfill import BackfillManifest, MAX_BACKOFF
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(backfill.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = BackfillManifest(str(tmp_path / "manifest.sqlite"))
+    yield manifest
+    manifest.close()
+
+
+def state(manifest, game_id):
+    return dict(manifest.connection.execute("SELECT * FROM games WHERE game_id = ?", (game_id,)).fetchone())
+
+
+def test_add_games_keeps_existing_rows(manifest):
+    assert manifest.add_games(["0022400001", "0022400002"], 2024, "regular") == 2
+    manifest.complete(manifest.claim("w1"))
+    assert manifest.add_games(["0022400001", "0022400002", "0022400003"], 2024, "regular") == 1
+    assert state(manifest, "0022400001")["state"] == "done"
+    assert manifest.is_enumerated(2024, "regular")
+
+
+def test_claims_never_overlap(tmp_path, manifest):
+    manifest.add_games([f"00224{i:05d}" for i in range(1, 6)], 2024, "regular")
+    other = BackfillManifest(manifest.path)
+    claimed = [manifest.claim("w1"), other.claim("w2"), manifest.claim("w1"), other.claim("w2"),
+               manifest.claim("w1"), other.claim("w2")]
+    other.close()
+    assert claimed[-1] is None
+    assert sorted(claimed[:-1]) == [f"00224{i:05d}" for i in range(1, 6)]
+    assert manifest.progress()["leased"] == 5
+
+
+def test_fail_backs_off_then_retries(manifest, clock):
+    manifest.add_games(["0022400001"], 2024, "regular")
+    game_id = manifest.claim("w1")
+    assert manifest.fail(game_id, "HTTP 500") == "pending"
+    row = state(manifest, game_id)
+    assert row["attempts"] == 1 and row["last_error"] == "HTTP 500"
+
+    # Not claimable until the backoff has passed
+    assert manifest.claim("w1") is None
+    clock[0] += 2
+    assert manifest.claim("w1") == game_id
+    manifest.complete(game_id)
+    row = state(manifest, game_id)
+    assert row["state"] == "done" and row["last_error"] is None
+    assert not manifest.has_unfinished()
+
+
+def test_fails_for_good_after_max_attempts(manifest, clock):
+    manifest.add_games(["0022400001"], 2024, "regular")
+    for attempt in range(1, 4):
+        game_id = manifest.claim("w1")
+        assert game_id == "0022400001"
+        assert manifest.fail(game_id, f"error {attempt}", max_attempts=3) == ("failed" if attempt == 3 else "pending")
+        clock[0] += MAX_BACKOFF
+    assert manifest.claim("w1") is None
+    assert manifest.errors() == [{"game_id": "0022400001", "attempts": 3, "last_error": "error 3"}]
+
+    assert manifest.retry_failed() == 1
+    assert manifest.claim("w1") == "0022400001"
+    assert state(manifest, "0022400001")["attempts"] == 1
+
+
+def test_expired_lease_is_reclaimed(manifest, clock):
+    manifest.add_games(["0022400001"], 2024, "regular")
+    assert manifest.claim("dead", lease_seconds=60) == "0022400001"
+    assert manifest.claim("w2") is None
+    clock[0] += 61
+    assert manifest.claim("w2") == "0022400001"
+    assert state(manifest, "0022400001")["worker"] == "w2"
+
+
+def test_lease_expiring_too_often_fails_the_game(manifest, clock):
+    manifest.add_games(["0022400001"], 2024, "regular")
+    for _ in range(2):
+        assert manifest.claim("dead", lease_seconds=60, max_attempts=2) == "0022400001"
+        clock[0] += 61
+    assert manifest.claim("w2", max_attempts=2) is None
+    assert state(manifest, "0022400001")["state"] == "failed"
+    assert state(manifest, "0022400001")["last_error"] == "lease expired"
@@ -0,0 +1,80 @@
+import pandas as pd
+
+import PlayerData
+import TeamData
+from batch_transform import combine_player_stats_batch, combine_team_stats_batch, write_batch
+from raw_cache import RawResponseCache, BOX_SCORE_ENDPOINTS
+from stats_store import StatsStore
+
+GAME_IDS = [f"00224{i:05d}" for i in range(1, 9)] + ["0042300101"]
+
+
+def per_game(games, combine, data_set):
+    return {game_id: combine(game_id, advanced[data_set], traditional[data_set])
+            for game_id, advanced, traditional in games}
+
+
+def test_batch_matches_per_game(box_score_data_sets):
+    games = box_score_data_sets(GAME_IDS)
+    for combine_batch, combine, data_set in ((combine_player_stats_batch, PlayerData.combine_player_stats, "PlayerStats"),
+                                             (combine_team_stats_batch, TeamData.combine_team_stats, "TeamStats")):
+        batched = combine_batch([game_id for game_id, _, _ in games],
+                                [advanced[data_set] for _, advanced, _ in games],
+                                [traditional[data_set] for _, _, traditional in games])
+        expected = per_game(games, combine, data_set)
+        assert list(batched) == GAME_IDS
+        for game_id in GAME_IDS:
+            pd.testing.assert_frame_equal(batched[game_id], expected[game_id])
+
+
+def test_odd_headers_and_missing_stats(box_score_data_sets):
+    games = box_score_data_sets(GAME_IDS[:4])
+    # A game with an extra column falls back to the per-game path; one without data is left out
+    odd = games[1][1]["PlayerStats"]
+    odd["headers"] = odd["headers"] + ["extra"]
+    odd["data"] = [row + [0] for row in odd["data"]]
+    del games[2][2]["PlayerStats"]["data"]
+
+    batched = combine_player_stats_batch([game_id for game_id, _, _ in games],
+                                         [advanced["PlayerStats"] for _, advanced, _ in games],
+                                         [traditional["PlayerStats"] for _, _, traditional in games])
+    assert sorted(batched) == sorted([GAME_IDS[0], GAME_IDS[1], GAME_IDS[3]])
+    for game_id, advanced, traditional in games[:2] + games[3:]:
+        expected = PlayerData.combine_player_stats(game_id, advanced["PlayerStats"], traditional["PlayerStats"])
+        pd.testing.assert_frame_equal(batched[game_id], expected)
+
+
+def test_write_batch_matches_per_game_store(tmp_path, box_score_data_sets):
+    games = box_score_data_sets(GAME_IDS)
+    player_store = StatsStore(str(tmp_path / "batched"), "player_stats")
+    team_store = StatsStore(str(tmp_path / "batched"), "team_stats")
+    write_batch(games, player_store, team_store)
+
+    expected_players = StatsStore(str(tmp_path / "per_game"), "player_stats")
+    expected_teams = StatsStore(str(tmp_path / "per_game"), "team_stats")
+    for game_id, advanced, traditional in games:
+        expected_players.write_game(game_id, PlayerData.combine_player_stats(
+            game_id, advanced["PlayerStats"], traditional["PlayerStats"]))
+        expected_teams.write_game(game_id, TeamData.combine_team_stats(
+            game_id, advanced["TeamStats"], traditional["TeamStats"]))
+    pd.testing.assert_frame_equal(player_store.load(), expected_players.load())
+    pd.testing.assert_frame_equal(team_store.load(), expected_teams.load())
+
+
+def test_fetchers_use_batches(tmp_path, raw_box_scores, box_score_data_sets):
+    # Every response is already cached, so nothing is downloaded
+    cache = RawResponseCache(str(tmp_path / "raw"))
+    for game_id, bodies in raw_box_scores(GAME_IDS).items():
+        for endpoint, body in zip(BOX_SCORE_ENDPOINTS, bodies):
+            cache.put(endpoint.endpoint, game_id, body)
+
+    players = PlayerData.fetch_combined_stats(GAME_IDS, store=StatsStore(str(tmp_path / "p"), "player_stats"),
+                                              cache=cache, batch_size=4)
+    teams = TeamData.fetch_team_stats(GAME_IDS, store=StatsStore(str(tmp_path / "t"), "team_stats"),
+                                      cache=cache, batch_size=4)
+
+    expected = StatsStore(str(tmp_path / "expected"), "player_stats")
+    expected_teams = StatsStore(str(tmp_path / "expected"), "team_stats")
+    write_batch(box_score_data_sets(GAME_IDS), expected, expected_teams)
+    pd.testing.assert_frame_equal(players, expected.load(games=GAME_IDS))
+    pd.testing.assert_frame_equal(teams, expected_teams.load(games=GAME_IDS))
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from features import RollingFeatureEngine, STAT_COLUMNS
+
+# Two seasons with the 2023 playoffs in between: raw IDs sort the playoffs last
+GAME_IDS = ([22300001 + i for i in range(12)] + [42300101 + i for i in range(6)]
+            + [22400001 + i for i in range(12)])
+
+
+def box_scores(seed=0, players=4):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for player_id in range(1, players + 1):
+        # Each player misses a few games, and some appear with zero minutes
+        for game_id in GAME_IDS:
+            if rng.random() < 0.15:
+                continue
+            minutes = 0 if rng.random() < 0.05 else rng.integers(10, 40)
+            rows.append({"PLAYER_ID": player_id, "GAME_ID": f"{game_id:010d}", "MINUTES": f"{minutes}:00"})
+    frame = pd.DataFrame(rows)
+    for stat in STAT_COLUMNS:
+        if stat != "MIN":
+            frame[stat] = rng.integers(0, 30, len(frame)).astype("float64")
+    return frame
+
+
+def chronological(frame):
+    position = {f"{game_id:010d}": i for i, game_id in enumerate(GAME_IDS)}
+    return frame.iloc[np.argsort(frame["GAME_ID"].map(position).to_numpy(), kind="stable")]
+
+
+def test_incremental_matches_rebuild():
+    history = chronological(box_scores())
+    full = RollingFeatureEngine().rebuild(history).set_index(["PLAYER_ID", "GAME_ID"])
+
+    engine = RollingFeatureEngine()
+    parts = [engine.rebuild(history.iloc[:40])]
+    # Night-by-night updates through the playoffs and into the next season
+    rest = history.iloc[40:]
+    for _, night in rest.groupby(rest["GAME_ID"].map({f"{g:010d}": i for i, g in enumerate(GAME_IDS)}), sort=True):
+        parts.append(engine.update(night))
+    incremental = pd.concat(parts, ignore_index=True).set_index(["PLAYER_ID", "GAME_ID"])
+
+    assert len(incremental) == len(full)
+    pd.testing.assert_frame_equal(incremental.loc[full.index], full)
+
+
+def test_features_use_only_earlier_games():
+    history = box_scores(seed=1)
+    features = RollingFeatureEngine().rebuild(history.sample(frac=1, random_state=0))
+    played = chronological(history[history["MINUTES"] != "0:00"])
+    for player_id, games in played.groupby("PLAYER_ID"):
+        points = games["PTS"].to_numpy()
+        rows = features[features["PLAYER_ID"] == player_id]
+        assert rows["GAME_ID"].tolist() == games["GAME_ID"].astype(int).tolist()
+        assert np.isnan(rows["PTS_mean5"].iloc[0])
+        for i in range(1, len(points)):
+            assert np.isclose(rows["PTS_mean5"].iloc[i], points[max(0, i - 5):i].mean())
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from game_catalog import GameCatalog
+
+
+def scoreboard(*games):
+    return pd.DataFrame([{"GAME_ID": game_id, "GAMECODE": f"20231201/{code}", "SEASON": "2023",
+                          "HOME_TEAM_ID": 1, "VISITOR_TEAM_ID": 2, "GAME_STATUS_ID": status,
+                          "GAME_STATUS_TEXT": "Final "} for game_id, code, status in games])
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = GameCatalog(str(tmp_path / "catalog.sqlite"))
+    yield catalog
+    catalog.close()
+
+
+def test_unscanned_dates_skip_scanned_ones(catalog):
+    assert catalog.unscanned_dates("2023-11-30", "2023-12-02") == ["2023-11-30", "2023-12-01", "2023-12-02"]
+    catalog.record_date("2023-12-01", scoreboard(("0022300301", "NYKBOS", 3)))
+    catalog.record_date("2023-11-30", pd.DataFrame())
+    assert catalog.unscanned_dates("2023-11-30", "2023-12-02") == ["2023-12-02"]
+    # Across a month boundary, and a range of one day
+    assert catalog.unscanned_dates("2023-11-29", "2023-12-01") == ["2023-11-29"]
+    assert catalog.unscanned_dates("2023-12-01", "2023-12-01") == []
+
+
+def test_unfinished_dates_stay_unscanned(catalog):
+    catalog.record_date("2023-12-01", scoreboard(("0022300301", "NYKBOS", 1)), mark_scanned=False)
+    assert catalog.unscanned_dates("2023-12-01", "2023-12-01") == ["2023-12-01"]
+    assert catalog.games_on("2023-12-01")[0]["status_id"] == 1
+
+    # Rescanning updates the game in place
+    catalog.record_date("2023-12-01", scoreboard(("0022300301", "NYKBOS", 3)))
+    games = catalog.games_between("2023-12-01", "2023-12-01")
+    assert len(games) == 1
+    assert games[0]["status_id"] == 3 and games[0]["status"] == "Final"
+    assert catalog.is_scanned("2023-12-01")
+
+
+def test_games_by_team_and_season(catalog):
+    catalog.record_date("2023-12-01", scoreboard(("0022300301", "NYKBOS", 3), ("0022300302", "LALPHX", 3)))
+    catalog.add_game_ids(["0022400001", "0022300301"])
+    assert [game["game_id"] for game in catalog.games_for_team("phx")] == ["0022300302"]
+    assert catalog.games_on("2023-12-01")[0]["visitor_team"] == "NYK"
+    assert catalog.game_ids(season=2024) == ["0022400001"]
+    assert catalog.game_ids(season=2023) == ["0022300301", "0022300302"]
@@ -0,0 +1,67 @@
+import pandas as pd
+
+from line_history import LineHistory
+
+
+def board(rows):
+    # (projection id, player id, game id, line, start time, updated at)
+    return pd.DataFrame({
+        "id": [str(row[0]) for row in rows],
+        "relationships.new_player.data.id": [str(row[1]) for row in rows],
+        "relationships.league.data.id": ["7"] * len(rows),
+        "relationships.game.data.id": [row[2] for row in rows],
+        "attributes.stat_type": ["Points"] * len(rows),
+        "attributes.description": ["POR"] * len(rows),
+        "attributes.start_time": [row[4] for row in rows],
+        "attributes.updated_at": [row[5] for row in rows],
+        "attributes.line_score": [str(row[3]) for row in rows],
+        "attributes.status": ["pre_game"] * len(rows),
+        "attributes.odds_type": ["standard"] * len(rows),
+        "attributes.is_live": ["False"] * len(rows),
+        "attributes.name": [f"Player {row[1]}" for row in rows],
+    })
+
+
+START = "2025-02-03T22:10:00-05:00"
+
+
+def test_game_metadata_is_stored_once_per_game(tmp_path):
+    history = LineHistory(str(tmp_path))
+    history.record(board([
+        (1, 10, "500", 20.5, START, "2025-02-03T12:00:00Z"),
+        (2, 11, "500", 5.5, START, "2025-02-03T12:00:00Z"),
+        (3, 12, None, 30.5, START, "2025-02-03T12:00:00Z"),
+    ]), 7, "2025-02-03T12:01:00Z")
+
+    games = history.games()
+    assert games["game_id"].tolist() == ["500"]
+    projections = history.projections().set_index("projection_id")
+    # Only the projection without a game keeps its own start time
+    assert projections["start_time"].isna().tolist() == [True, True, False]
+
+    details = history.projection_details().set_index("projection_id")
+    assert (details["start_time"] == START).all()
+    assert details.loc[2, "name"] == "Player 11"
+
+
+def test_as_of_queries_carry_game_start_time(tmp_path):
+    history = LineHistory(str(tmp_path))
+    history.record(board([(1, 10, "500", 20.5, START, "2025-02-03T12:00:00Z")]), 7, "2025-02-03T12:01:00Z")
+    history.record(board([(1, 10, "500", 21.5, START, "2025-02-03T20:00:00Z")]), 7, "2025-02-03T20:01:00Z")
+    history.record(board([(1, 10, "500", 25.5, START, "2025-02-04T04:00:00Z")]), 7, "2025-02-04T04:01:00Z")
+
+    as_of = history.line_as_of("2025-02-03T13:00:00Z")
+    assert as_of.loc[0, "line_score"] == 20.5
+    assert as_of.loc[0, "start_time"] == START
+
+    closing = history.closing_lines()
+    assert closing.loc[0, "line_score"] == 21.5
+    assert closing.loc[0, "game_id"] == "500"
+
+
+def test_unchanged_game_is_not_rewritten(tmp_path):
+    history = LineHistory(str(tmp_path))
+    rows = [(1, 10, "500", 20.5, START, "2025-02-03T12:00:00Z")]
+    history.record(board(rows), 7, "2025-02-03T12:01:00Z")
+    history.record(board(rows), 7, "2025-02-03T12:06:00Z")
+    assert len(list((tmp_path / "games").iterdir())) == 1
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from opponent_context import attach_to_player_games, DEFENSE_COLUMNS
+
+TEAMS = [1610612737, 1610612738, 1610612739, 1610612740]
+
+
+def schedule(games=24, seed=0):
+    """Team rows for a round robin over two seasons and a playoff round, plus each game's date."""
+    rng = np.random.default_rng(seed)
+    game_ids = ([22300001 + i for i in range(games // 3)] + [42300101 + i for i in range(games // 3)]
+                + [22400001 + i for i in range(games // 3)])
+    rows, dates = [], {}
+    for i, game_id in enumerate(game_ids):
+        home, away = rng.choice(TEAMS, 2, replace=False)
+        dates[game_id] = pd.Timestamp("2023-11-01") + pd.Timedelta(days=2 * i)
+        for team in (home, away):
+            row = {"gameId": f"{game_id:010d}", "teamId": int(team), "PTS": float(rng.integers(90, 130))}
+            row.update({column: float(rng.normal(100, 5)) for column in DEFENSE_COLUMNS})
+            rows.append(row)
+    # Stored order is not chronological
+    team_stats = pd.DataFrame(rows).sample(frac=1, random_state=seed).reset_index(drop=True)
+    return team_stats, pd.Series(dates), game_ids
+
+
+def expected_profile(team_stats, game_ids, game_id, team, window):
+    # Brute force: the opponent's games strictly before this one, in chronological order
+    position = {f"{g:010d}": i for i, g in enumerate(game_ids)}
+    this = team_stats[team_stats["gameId"] == f"{game_id:010d}"]
+    opponent = int(this.loc[this["teamId"] != team, "teamId"].iloc[0])
+    earlier = []
+    for other_id, game in team_stats.groupby("gameId"):
+        if position[other_id] < position[f"{game_id:010d}"] and opponent in game["teamId"].tolist():
+            allowed = game.loc[game["teamId"] != opponent, "PTS"].iloc[0]
+            earlier.append((position[other_id], allowed, game.loc[game["teamId"] == opponent, "pace"].iloc[0]))
+    earlier = sorted(earlier)[-window:]
+    return opponent, earlier
+
+
+def test_profiles_only_use_earlier_games():
+    team_stats, dates, game_ids = schedule()
+    player_games = team_stats[["gameId", "teamId"]].rename(columns={"gameId": "GAME_ID", "teamId": "TEAM_ID"})
+    for game_dates in (None, dates):
+        joined = attach_to_player_games(player_games, team_stats, game_dates, window=3)
+        for row in joined.itertuples():
+            opponent, earlier = expected_profile(team_stats, game_ids, int(row.GAME_ID), row.TEAM_ID, 3)
+            assert row.OPP_TEAM_ID == opponent
+            if not earlier:
+                assert np.isnan(row.OPP_PTS_allowed_L3)
+                continue
+            assert row.OPP_GAMES_L3 == len(earlier)
+            assert np.isclose(row.OPP_PTS_allowed_L3, np.mean([allowed for _, allowed, _ in earlier]))
+            assert np.isclose(row.OPP_pace_L3, np.mean([pace for _, _, pace in earlier]))
+
+
+def test_later_games_do_not_change_earlier_rows():
+    team_stats, dates, game_ids = schedule(seed=1)
+    player_games = team_stats[["gameId", "teamId"]].rename(columns={"gameId": "GAME_ID", "teamId": "TEAM_ID"})
+    before = attach_to_player_games(player_games, team_stats, dates)
+
+    # Rewrite the last season's numbers; nothing before it may move
+    changed = team_stats.copy()
+    later = changed["gameId"].astype(int).isin(game_ids[-8:])
+    changed.loc[later, ["PTS"] + DEFENSE_COLUMNS] += 1000
+    after = attach_to_player_games(player_games, changed, dates)
+
+    earlier = ~later.to_numpy()
+    pd.testing.assert_frame_equal(before[earlier], after[earlier])
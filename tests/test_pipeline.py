@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from pipeline import Stage, run_pipeline
+
+
+def touch(path):
+    with open(path, "w") as file:
+        file.write("x")
+
+
+def chain(tmp_path):
+    source = str(tmp_path / "source.txt")
+    middle = str(tmp_path / "middle.txt")
+    final = str(tmp_path / "final.txt")
+    return [
+        Stage("source", lambda: touch(source), outputs=[source], params={"v": 1}),
+        Stage("middle", lambda: touch(middle), deps=["source"], inputs=[source], outputs=[middle]),
+        Stage("final", lambda: touch(final), deps=["middle"], inputs=[middle], outputs=[final]),
+    ]
+
+
+def test_second_run_is_up_to_date(tmp_path):
+    state_path = str(tmp_path / "state.json")
+    first = run_pipeline(chain(tmp_path), state_path=state_path)
+    assert all(result.startswith("ran") for result in first.values())
+    second = run_pipeline(chain(tmp_path), state_path=state_path)
+    assert set(second.values()) == {"up to date"}
+
+
+def test_dry_run_propagates_to_dependents(tmp_path):
+    state_path = str(tmp_path / "state.json")
+    run_pipeline(chain(tmp_path), state_path=state_path)
+    stages = chain(tmp_path)
+    stages[0].params = {"v": 2}
+    status = run_pipeline(stages, dry_run=True, state_path=state_path)
+    assert status == {"source": "would run", "middle": "would run", "final": "would run"}
+    # Nothing actually ran
+    assert run_pipeline(chain(tmp_path), dry_run=True, state_path=state_path)["source"] == "up to date"
+
+
+def test_failed_dependency_blocks_dependents(tmp_path):
+    def fail():
+        raise ValueError("boom")
+
+    stages = chain(tmp_path)
+    stages[0].run = fail
+    status = run_pipeline(stages, state_path=str(tmp_path / "state.json"))
+    assert status == {"source": "failed: boom", "middle": "blocked", "final": "blocked"}
+
+
+def test_dependency_cycle_raises(tmp_path):
+    stages = [Stage("a", lambda: None, deps=["b"]), Stage("b", lambda: None, deps=["a"]),
+              Stage("c", lambda: None)]
+    with pytest.raises(RuntimeError, match="a, b"):
+        run_pipeline(stages, state_path=str(tmp_path / "state.json"))
+
+
+def test_unknown_dependency_raises(tmp_path):
+    with pytest.raises(ValueError, match="missing"):
+        run_pipeline([Stage("a", lambda: None, deps=["missing"])], state_path=str(tmp_path / "state.json"))
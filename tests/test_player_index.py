@@ -0,0 +1,39 @@
+import pandas as pd
+
+from player_index import PlayerIndex
+
+SUNS = 1610612756
+BLAZERS = 1610612757
+
+
+def box_scores(rows):
+    return pd.DataFrame(rows, columns=["GAME_ID", "PLAYER_ID", "FIRST_NAME", "LAST_NAME", "TEAM_ID"])
+
+
+def test_latest_game_decides_team_across_seasons(tmp_path):
+    # 2023 playoffs for PHX, then traded to POR for 2024-25: the raw ID of the
+    # playoff game sorts after the regular-season one, the team must still be POR
+    index = PlayerIndex(str(tmp_path))
+    index.add_box_scores(box_scores([
+        ["0022400010", 1, "Jusuf", "Nurkic", BLAZERS],
+        ["0042300101", 1, "Jusuf", "Nurkic", SUNS],
+    ]))
+    assert index.players.loc[0, "TEAM"] == "POR"
+
+
+def test_same_name_resolved_by_team(tmp_path):
+    index = PlayerIndex(str(tmp_path))
+    index.add_box_scores(box_scores([
+        ["0042300101", 1, "Chris", "Smith", SUNS],
+        ["0022400010", 1, "Chris", "Smith", BLAZERS],
+        ["0022400011", 2, "Chris", "Smith", SUNS],
+    ]))
+    assert index.lookup("Chris Smith", "POR") == 1
+    assert index.lookup("Chris Smith", "PHX") == 2
+
+
+def test_incremental_update_keeps_latest_team(tmp_path):
+    index = PlayerIndex(str(tmp_path))
+    index.add_box_scores(box_scores([["0022400010", 1, "Jusuf", "Nurkic", BLAZERS]]))
+    index.add_box_scores(box_scores([["0042300101", 1, "Jusuf", "Nurkic", SUNS]]))
+    assert index.players.loc[0, "TEAM"] == "POR"
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import simulation
+from simulation import MAX_LEGS, count_hits, pack_hits
+
+
+def brute_force(hits, slips, draws):
+    counts = np.zeros((len(slips), MAX_LEGS + 1), dtype=np.int64)
+    for i, slip in enumerate(slips):
+        legs = [leg for leg in slip if leg >= 0]
+        hit_count = hits[legs].sum(axis=0) if legs else np.zeros(draws, dtype=int)
+        counts[i] = np.bincount(hit_count, minlength=MAX_LEGS + 1)
+    return counts
+
+
+def random_slips(rng, picks, count):
+    slips = np.full((count, MAX_LEGS), -1, dtype=np.int64)
+    for i in range(count):
+        legs = rng.integers(1, MAX_LEGS + 1)
+        slips[i, :legs] = rng.choice(picks, legs, replace=False)
+    return slips
+
+
+@pytest.mark.parametrize("draws", [1, 63, 64, 65, 1000])
+def test_count_hits_matches_brute_force(draws):
+    rng = np.random.default_rng(draws)
+    hits = rng.random((12, draws)) < rng.random((12, 1))
+    slips = random_slips(rng, 12, 200)
+    counts = count_hits(pack_hits(hits), slips, draws)
+    np.testing.assert_array_equal(counts, brute_force(hits, slips, draws))
+    assert (counts.sum(axis=1) == draws).all()
+
+
+def test_count_hits_across_blocks(monkeypatch):
+    # Small blocks so both the slip and the word loops take several passes
+    monkeypatch.setattr(simulation, "SLIP_BLOCK", 7)
+    monkeypatch.setattr(simulation, "WORD_BLOCK", 3)
+    rng = np.random.default_rng(0)
+    draws = 64 * 10 + 5
+    hits = rng.random((10, draws)) < 0.5
+    slips = random_slips(rng, 10, 50)
+    np.testing.assert_array_equal(count_hits(pack_hits(hits), slips, draws), brute_force(hits, slips, draws))
+
+
+def test_all_legs_hit():
+    draws = 130
+    hits = np.ones((MAX_LEGS, draws), dtype=bool)
+    slips = np.arange(MAX_LEGS, dtype=np.int64)[None, :]
+    counts = count_hits(pack_hits(hits), slips, draws)
+    assert counts[0, MAX_LEGS] == draws and counts[0, :MAX_LEGS].sum() == 0